@@ -1,12 +1,21 @@
 import os
 from flask import Flask
-from flask_jwt_extended import JWTManager
 from flask_swagger_ui import get_swaggerui_blueprint
 from .models import db
-from .utils.logging import configure_logging
+from .utils.logging import configure_logging, log_stats
 from .routes.integration import integration_bp
 from .routes.auth import auth_bp
 from .middleware.logging import LoggingMiddleware
+from .middleware.metrics import MetricsMiddleware, label_route
+from .services import page_cache
+from .services.transport import transport
+from .redis import lookup_index
+from .redis.local_cache import local_cache
+from .redis.circuit import circuit
+from .redis.revocation import revoked_tokens
+from .middleware.auth import claim_cache, CachingJWTManager
+from .redis.redis_client import fallback_store
+from .utils.metrics import metrics, CONTENT_TYPE
 
 
 def create_app(config_class=None):
@@ -37,13 +46,18 @@ def create_app(config_class=None):
 
     # Initialize extensions
     db.init_app(app)
-    jwt = JWTManager(app)
+    jwt = CachingJWTManager(app)
+
+    @jwt.token_in_blocklist_loader
+    def token_revoked(jwt_header, jwt_data):
+        return revoked_tokens.is_revoked(jwt_data.get("jti"))
 
     # Configure logging
     configure_logging(app)
 
-    # Register middleware
-    app.wsgi_app = LoggingMiddleware(app.wsgi_app)
+    # Register middleware, metrics time the request until its body is sent
+    app.wsgi_app = MetricsMiddleware(LoggingMiddleware(app.wsgi_app))
+    app.before_request(label_route)
 
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -54,4 +68,34 @@ def create_app(config_class=None):
     def health_check():
         return {"status": "healthy"}, 200
 
+    @app.route("/transport_stats")
+    def transport_stats():
+        # Connection pool usage of this worker, for sizing gunicorn workers
+        return transport.stats(), 200
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        # Latency, payload size and in-flight histograms and gauges in the
+        # Prometheus text format, of all workers when METRICS_MULTIPROC_DIR is set
+        return metrics.render(), 200, {"Content-Type": CONTENT_TYPE}
+
+    @app.route("/log_stats")
+    def logging_stats():
+        # Log queue usage of this worker and the records dropped while it was full
+        return log_stats(), 200
+
+    @app.route("/cache_stats")
+    def cache_stats():
+        # Hit and miss counters of this worker's lookup indexes, page cache and L1/L2 tiers,
+        # and whether it is serving from Redis or from the in-process fallback
+        return {
+            "lookup_indexes": {
+                name: index.stats() for name, index in lookup_index.indexes.items()
+            },
+            "page_cache": page_cache.stats(),
+            "tiers": local_cache.stats(),
+            "redis": {**circuit.stats(), "fallback": fallback_store.stats()},
+            "jwt_claims": claim_cache.stats()
+        }, 200
+
     return app
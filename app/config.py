@@ -10,6 +10,8 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    # Verified JWT claims kept in memory per process, by token hash
+    JWT_CLAIM_CACHE_SIZE = int(os.getenv('JWT_CLAIM_CACHE_SIZE', 10000))
 
     DATABASE_URL = os.getenv("DATABASE_URL")
     if DATABASE_URL.startswith("postgres://"):
@@ -25,6 +27,59 @@ class Config:
     HUBSPOT_CLIENT_SECRET = os.getenv('HUBSPOT_CLIENT_SECRET')
     HUBSPOT_REFRESH_TOKEN = os.getenv('HUBSPOT_REFRESH_TOKEN')
 
+    # HubSpot token refresh: seconds before expiry to refresh in the background,
+    # how long the cluster-wide refresh lock is held and how long others wait on it
+    HUBSPOT_TOKEN_REFRESH_MARGIN = int(os.getenv('HUBSPOT_TOKEN_REFRESH_MARGIN', 300))
+    HUBSPOT_TOKEN_LOCK_TIMEOUT = int(os.getenv('HUBSPOT_TOKEN_LOCK_TIMEOUT', 30))
+    HUBSPOT_TOKEN_WAIT_TIMEOUT = int(os.getenv('HUBSPOT_TOKEN_WAIT_TIMEOUT', 10))
+
+    # Shared HTTP connection pool for HubSpot calls (pool size is per host)
+    HUBSPOT_HTTP_NUM_POOLS = int(os.getenv('HUBSPOT_HTTP_NUM_POOLS', 4))
+    HUBSPOT_HTTP_POOL_MAXSIZE = int(os.getenv('HUBSPOT_HTTP_POOL_MAXSIZE', 10))
+    HUBSPOT_HTTP_POOL_BLOCK = os.getenv('HUBSPOT_HTTP_POOL_BLOCK', 'false').lower() == 'true'
+    HUBSPOT_HTTP_KEEPALIVE = os.getenv('HUBSPOT_HTTP_KEEPALIVE', 'true').lower() == 'true'
+    HUBSPOT_HTTP_CONNECT_TIMEOUT = float(os.getenv('HUBSPOT_HTTP_CONNECT_TIMEOUT', 5))
+    HUBSPOT_HTTP_READ_TIMEOUT = float(os.getenv('HUBSPOT_HTTP_READ_TIMEOUT', 30))
+
+    # Concurrent fetches behind /new_crm_objects: worker threads per process,
+    # the overall wait in seconds before a section is reported as timed out and
+    # the fetches queued or running per process before sections are reported busy
+    CRM_FETCH_WORKERS = int(os.getenv('CRM_FETCH_WORKERS', 12))
+    CRM_FETCH_TIMEOUT = float(os.getenv('CRM_FETCH_TIMEOUT', 10))
+    CRM_FETCH_MAX_PENDING = int(os.getenv('CRM_FETCH_MAX_PENDING', 36))
+
+    # Password hashing: werkzeug method and work factor (older hashes are
+    # upgraded on login), worker processes per web worker (0 hashes on the
+    # request thread) and the longest wait for a hash in seconds
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', min(os.cpu_count() or 1, 4)))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+
+    # Largest number of items accepted by the batch endpoints
+    BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', 10000))
+
+    # Log records waiting for the writer thread, and how long in seconds a
+    # warning or error waits for room before it is dropped (others never wait)
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    LOG_QUEUE_BLOCK_TIMEOUT = float(os.getenv('LOG_QUEUE_BLOCK_TIMEOUT', 0.1))
+
+    # Request log sampling: 2xx requests per second per worker that are all
+    # logged, the share of the ones beyond that which is logged, and the
+    # duration in ms from which a request always is (4xx and 5xx always are)
+    LOG_SAMPLE_THRESHOLD = int(os.getenv('LOG_SAMPLE_THRESHOLD', 20))
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 0.1))
+    LOG_SLOW_REQUEST_MS = float(os.getenv('LOG_SLOW_REQUEST_MS', 1000))
+    # Token bucket per logger and message for info and debug records:
+    # records per second and burst size (0 per second disables the limit)
+    LOG_RATE_LIMIT_PER_SECOND = float(os.getenv('LOG_RATE_LIMIT_PER_SECOND', 10))
+    LOG_RATE_LIMIT_BURST = int(os.getenv('LOG_RATE_LIMIT_BURST', 50))
+
+    # Directory where every worker writes its metrics for /metrics to add
+    # up (unset: /metrics reports only the worker serving it), emptied by the
+    # on_starting hook in gunicorn.conf.py, and seconds between writes
+    METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1))
+
     # Remove any proxy settings that might be causing issues
     HTTP_PROXY = None
     HTTPS_PROXY = None
@@ -1,7 +1,92 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 from functools import wraps
 from flask import jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import JWTManager, verify_jwt_in_request, get_jwt_identity
 import logging
+from ..config import Config
+from ..redis.revocation import revoked_tokens
+
+
+class ClaimCache:
+    """Verified JWT claims of this process, by token hash, until the token expires.
+
+    Only tokens that passed the full decode and signature check are stored,
+    so a hit skips both. At most max_entries tokens are kept, the least
+    recently used are dropped first.
+    """
+
+    def __init__(self, max_entries=Config.JWT_CLAIM_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        """Return the claims of a verified, unexpired token, or None"""
+        key = self._key(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is not None and claims.get("exp", 0) > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return claims
+            if claims is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, token, claims):
+        if self.max_entries <= 0 or "exp" not in claims:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+                "entries": len(self._entries),
+                "revoked": len(revoked_tokens),
+            }
+
+
+# Shared by every request of this process
+claim_cache = ClaimCache()
+
+
+class CachingJWTManager(JWTManager):
+    """JWTManager that decodes and checks the signature of each token once per process.
+
+    Only the decode step is cached: verify_jwt_in_request() still runs the
+    token type, freshness, blocklist and user loader checks on every request.
+    Overrides the decode method of Flask-JWT-Extended 4.5, which is pinned;
+    test_auth_tokens fails if that method changes.
+    """
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        # Cookie tokens carry a CSRF value checked on every decode
+        if csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        claims = claim_cache.get(encoded_token)
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+            claim_cache.set(encoded_token, claims)
+        return claims
 
 
 def auth_middleware():
@@ -11,8 +96,8 @@ def auth_middleware():
 
     def wrapper(fn):
         @wraps(fn)
-        @jwt_required()
         def decorator(*args, **kwargs):
+            verify_jwt_in_request()
             current_user_id = get_jwt_identity()
 
             # Convert the string ID back to an integer
@@ -22,7 +107,7 @@ def auth_middleware():
                 # Set user_id on request for logging middleware
                 request.user_id = user_id
 
-                logger.debug(f"Authenticated request for user ID: {user_id}")
+                logger.debug("Authenticated request for user ID: %s", user_id)
                 return fn(user_id, *args, **kwargs)
 
             except (ValueError, TypeError) as e:
@@ -1,6 +1,7 @@
 import time
 import logging
 from flask import request, g
+from ..utils.log_sampling import request_log_sampler
 
 
 class LoggingMiddleware:
@@ -12,14 +13,19 @@ class LoggingMiddleware:
 
     def __call__(self, environ, start_response):
         # Start timer
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # Process the request
         def custom_start_response(status, headers, exc_info=None):
             # Log after request is processed
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
             status_code = int(status.split(" ")[0])
 
+            # Failed and slow requests are always logged, others may be sampled
+            weight = request_log_sampler.weight(status_code, duration * 1000)
+            if weight is None:
+                return start_response(status, headers, exc_info)
+
             # Get the path and method
             path = environ.get("PATH_INFO", "")
             method = environ.get("REQUEST_METHOD", "")
@@ -39,13 +45,16 @@ class LoggingMiddleware:
             if user_id:
                 log_data["user_id"] = user_id
 
+            # Requests this line stands for, for counts from sampled logs
+            extra = {"sample_weight": weight}
+
             # Determine log level based on status code
             if status_code >= 500:
-                self.logger.error(f"Request processed: {log_data}")
+                self.logger.error("Request processed: %s", log_data, extra=extra)
             elif status_code >= 400:
-                self.logger.warning(f"Request processed: {log_data}")
+                self.logger.warning("Request processed: %s", log_data, extra=extra)
             else:
-                self.logger.info(f"Request processed: {log_data}")
+                self.logger.info("Request processed: %s", log_data, extra=extra)
 
             return start_response(status, headers, exc_info)
 
@@ -0,0 +1,87 @@
+import time
+from flask import request
+from ..utils.metrics import metrics, DURATION_BUCKETS, SIZE_BUCKETS
+
+# Route label of requests that matched no route, so unknown paths add no series
+UNMATCHED_ROUTE = "unmatched"
+ROUTE_KEY = "metrics.route"
+
+request_duration = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving the request until its response body was sent.",
+    ("method", "route", "status"), DURATION_BUCKETS)
+request_size = metrics.histogram(
+    "http_request_size_bytes", "Size of the request body.", ("method", "route"), SIZE_BUCKETS)
+response_size = metrics.histogram(
+    "http_response_size_bytes", "Size of the response body.", ("method", "route"), SIZE_BUCKETS)
+requests_in_flight = metrics.gauge(
+    "http_requests_in_flight", "Requests being served, including their response body.")
+
+
+def label_route():
+    # Registered as a before_request hook: the URL rule, not the path, labels the metrics
+    rule = request.url_rule
+    request.environ[ROUTE_KEY] = rule.rule if rule is not None else UNMATCHED_ROUTE
+
+
+class _TimedBody:
+    """Response body that records the request once the server closes it"""
+
+    def __init__(self, body, finish):
+        self.body = body
+        self.finish = finish
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self.body, "close"):
+                self.body.close()
+        finally:
+            self.finish(self.size)
+
+
+class MetricsMiddleware:
+    # Middleware recording latency, payload sizes and in-flight requests per route
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        metrics.start()
+        started = time.perf_counter()
+        requests_in_flight.inc()
+        response = {"status": "500", "length": None}
+
+        def timed_start_response(status, headers, exc_info=None):
+            response["status"] = status.split(" ", 1)[0]
+            for name, value in headers:
+                if name.lower() == "content-length":
+                    response["length"] = value
+            return start_response(status, headers, exc_info)
+
+        def finish(body_size):
+            requests_in_flight.dec()
+            method = environ.get("REQUEST_METHOD", "")
+            route = environ.get(ROUTE_KEY, UNMATCHED_ROUTE)
+            request_duration.observe(time.perf_counter() - started, method, route, response["status"])
+            request_size.observe(_int(environ.get("CONTENT_LENGTH")), method, route)
+            response_size.observe(_int(response["length"], body_size), method, route)
+
+        try:
+            body = self.app(environ, timed_start_response)
+        except Exception:
+            finish(0)
+            raise
+        return _TimedBody(body, finish)
+
+
+def _int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
@@ -1,6 +1,7 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import validates
+from .utils.passwords import password_hasher
 
 db = SQLAlchemy()
 
@@ -9,11 +10,22 @@ class User(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    # Case-insensitive lookups and uniqueness go through this indexed column
+    username_lower = db.Column(db.String(80), unique=True, index=True, nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    @staticmethod
+    def normalize_username(username):
+        return username.lower() if username else None
+
+    @validates('username')
+    def _set_username_lower(self, key, username):
+        self.username_lower = self.normalize_username(username)
+        return username
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
-        
+        self.password_hash = password_hasher.hash(password)
+
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
@@ -0,0 +1,162 @@
+import os
+import time
+import logging
+import threading
+from redis.connection import Connection, SSLConnection
+from redis.exceptions import ConnectionError, TimeoutError
+from .config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCircuit:
+    """Circuit breaker in front of every Redis connection of a process.
+
+    After failure_threshold consecutive connection failures the circuit
+    opens: new connections fail at once instead of waiting for the connect
+    timeout, and RedisClient serves from its in-process fallback. A
+    background thread pings Redis every retry_interval seconds and closes
+    the circuit once it answers.
+    """
+
+    def __init__(self, failure_threshold=Config.REDIS_CIRCUIT_FAILURE_THRESHOLD,
+                 retry_interval=Config.REDIS_CIRCUIT_RETRY_INTERVAL):
+        self.failure_threshold = failure_threshold
+        self.retry_interval = retry_interval
+        # Set once the connection pools exist, pings Redis past the open circuit
+        self.probe = None
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._probing = False
+        self.is_open = False
+        self.failures = 0
+        self.opened = 0
+        self.closed = 0
+        self.rejected = 0
+        self.changed_at = None
+
+    def allow(self):
+        """False while the circuit is open, except for the recovery probe"""
+        if not self.is_open or getattr(self._local, "bypass", False):
+            return True
+        with self._lock:
+            self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            if self.is_open or self.failures < self.failure_threshold:
+                return
+            self.is_open = True
+            self.opened += 1
+            self.changed_at = time.time()
+        logger.error(f"Redis unreachable, serving from the in-process fallback: {str(error)}")
+        self._start_probe()
+
+    def _start_probe(self):
+        with self._lock:
+            # A probe thread is not inherited over a fork
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._probing = False
+            if self._probing or self.probe is None:
+                return
+            self._probing = True
+        threading.Thread(target=self._probe_loop, name='redis-circuit-probe', daemon=True).start()
+
+    def _probe_loop(self):
+        self._local.bypass = True
+        try:
+            while True:
+                time.sleep(self.retry_interval)
+                try:
+                    self.probe()
+                except Exception:
+                    continue
+                self._close()
+                return
+        finally:
+            with self._lock:
+                self._probing = False
+
+    def _close(self):
+        with self._lock:
+            self.is_open = False
+            self.failures = 0
+            self.closed += 1
+            self.changed_at = time.time()
+        logger.info("Redis reachable again, leaving the in-process fallback")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": "degraded" if self.is_open else "redis",
+                "consecutive_failures": self.failures,
+                "opened": self.opened,
+                "closed": self.closed,
+                "rejected_connections": self.rejected,
+                "changed_at": self.changed_at,
+            }
+
+
+class CircuitBreakerConnectionMixin:
+    """Reports connection failures to the circuit and fails fast while it is open"""
+
+    def __init__(self, *args, circuit=None, **kwargs):
+        self.circuit = circuit
+        super().__init__(*args, **kwargs)
+
+    def connect(self):
+        if self.circuit is None:
+            return super().connect()
+        if not self.circuit.allow():
+            raise ConnectionError("Redis circuit is open")
+        try:
+            super().connect()
+        except (ConnectionError, TimeoutError) as e:
+            self.circuit.record_failure(e)
+            raise
+        self.circuit.record_success()
+
+    def send_packed_command(self, *args, **kwargs):
+        try:
+            return super().send_packed_command(*args, **kwargs)
+        except (ConnectionError, TimeoutError) as e:
+            if self.circuit is not None:
+                self.circuit.record_failure(e)
+            raise
+
+    def read_response(self, *args, **kwargs):
+        try:
+            return super().read_response(*args, **kwargs)
+        except (ConnectionError, TimeoutError) as e:
+            if self.circuit is not None:
+                self.circuit.record_failure(e)
+            raise
+
+
+def circuit_of(client):
+    """The circuit guarding a Redis client's connections, or None"""
+    pool = getattr(client, "connection_pool", None)
+    if pool is None:
+        return None
+    return pool.connection_kwargs.get("circuit")
+
+
+class CircuitBreakerConnection(CircuitBreakerConnectionMixin, Connection):
+    pass
+
+
+class CircuitBreakerSSLConnection(CircuitBreakerConnectionMixin, SSLConnection):
+    pass
+
+
+# Shared by every Redis connection pool in this process
+circuit = RedisCircuit()
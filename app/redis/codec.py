@@ -0,0 +1,66 @@
+import zlib
+from datetime import date
+import orjson
+from .config import Config
+
+
+# First byte of every encoded value
+RAW = b"\x00"
+COMPRESSED = b"\x01"
+
+
+def to_plain(value):
+    """Convert HubSpot SDK models into JSON-ready dicts, lists and strings.
+
+    Pages are converted once when they are fetched, so fresh and cached
+    responses are identical and nothing downstream calls to_dict() again.
+    """
+    if hasattr(value, "to_dict"):
+        value = value.to_dict()
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item) for item in value]
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class CacheCodec:
+    """Compact binary encoding of cached values.
+
+    Values are JSON encoded with orjson behind a one-byte header, and
+    are zlib-compressed once they exceed compress_threshold bytes.
+    """
+
+    def __init__(self, compress_threshold=Config.CACHE_COMPRESS_THRESHOLD,
+                 compress_level=Config.CACHE_COMPRESS_LEVEL):
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    def encode(self, value):
+        """Encode a plain value (see to_plain) into bytes"""
+        data = orjson.dumps(value)
+        if len(data) > self.compress_threshold:
+            return COMPRESSED + zlib.compress(data, self.compress_level)
+        return RAW + data
+
+    def decode(self, data):
+        """Decode bytes written by encode(); raises ValueError for anything else"""
+        if not data:
+            raise ValueError("Empty cache value")
+
+        header, data = data[:1], data[1:]
+        if header == COMPRESSED:
+            try:
+                data = zlib.decompress(data)
+            except zlib.error as e:
+                raise ValueError(f"Corrupt cache value: {str(e)}")
+        elif header != RAW:
+            raise ValueError("Unknown cache value format")
+
+        return orjson.loads(data)
+
+
+# Shared by every cache written through RedisClient
+codec = CacheCodec()
@@ -10,4 +10,55 @@ class Config:
     REDIS_PORT = os.environ.get('REDIS_PORT')
     REDIS_PASSWORD = os.environ.get('REDIS_PASSWORD')
     REDIS_USERNAME = os.environ.get('REDIS_USERNAME')
+
+    # Connection pool shared by every RedisClient in a process
+    REDIS_SSL = os.environ.get('REDIS_SSL', 'true').lower() == 'true'
+    REDIS_SSL_CERT_REQS = os.environ.get('REDIS_SSL_CERT_REQS', 'required')
+    REDIS_SSL_CA_CERTS = os.environ.get('REDIS_SSL_CA_CERTS')
+    REDIS_SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT', 5))
+    REDIS_SOCKET_CONNECT_TIMEOUT = float(os.environ.get('REDIS_SOCKET_CONNECT_TIMEOUT', 2))
+    REDIS_HEALTH_CHECK_INTERVAL = int(os.environ.get('REDIS_HEALTH_CHECK_INTERVAL', 30))
+    REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', 50))
     CACHE_TIMEOUT = 3600
+
+    # After this many consecutive connection failures Redis is skipped and
+    # probed in the background every REDIS_CIRCUIT_RETRY_INTERVAL seconds,
+    # while a bounded in-process store stands in for it
+    REDIS_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('REDIS_CIRCUIT_FAILURE_THRESHOLD', 3))
+    REDIS_CIRCUIT_RETRY_INTERVAL = float(os.environ.get('REDIS_CIRCUIT_RETRY_INTERVAL', 5))
+    REDIS_FALLBACK_MAX_BYTES = int(os.environ.get('REDIS_FALLBACK_MAX_BYTES', 64 * 1024 * 1024))
+
+    # In-process L1 cache in front of Redis, kept in sync over pub/sub
+    L1_CACHE_MAX_BYTES = int(os.environ.get('L1_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    L1_CACHE_TTL = int(os.environ.get('L1_CACHE_TTL', 30))
+    CACHE_INVALIDATION_CHANNEL = os.environ.get('CACHE_INVALIDATION_CHANNEL', 'cache_invalidation')
+
+    # Revoked JWT ids (a sorted set scored by token expiry), mirrored into
+    # every process over pub/sub
+    TOKEN_REVOCATION_KEY = os.environ.get('TOKEN_REVOCATION_KEY', 'revoked_tokens')
+    TOKEN_REVOCATION_CHANNEL = os.environ.get('TOKEN_REVOCATION_CHANNEL', 'token_revocations')
+
+    # Cached values larger than this many bytes are zlib-compressed
+    CACHE_COMPRESS_THRESHOLD = int(os.environ.get('CACHE_COMPRESS_THRESHOLD', 2048))
+    CACHE_COMPRESS_LEVEL = int(os.environ.get('CACHE_COMPRESS_LEVEL', 1))
+
+    # CRM pages are fresh for the soft TTL and served stale, while one worker
+    # refreshes them, until the hard TTL
+    PAGE_CACHE_SOFT_TTL = int(os.environ.get('PAGE_CACHE_SOFT_TTL', 300))
+    PAGE_CACHE_HARD_TTL = int(os.environ.get('PAGE_CACHE_HARD_TTL', CACHE_TIMEOUT))
+    PAGE_CACHE_REFRESH_LOCK_TIMEOUT = int(os.environ.get('PAGE_CACHE_REFRESH_LOCK_TIMEOUT', 30))
+    PAGE_CACHE_REFRESH_WORKERS = int(os.environ.get('PAGE_CACHE_REFRESH_WORKERS', 4))
+
+    # On a miss one worker holds a lease and fills the page, the others wait
+    # up to PAGE_CACHE_LEASE_WAIT seconds for it before fetching themselves,
+    # or less if the lease is released without a page (kept well below CRM_FETCH_TIMEOUT)
+    PAGE_CACHE_LEASE_TIMEOUT = int(os.environ.get('PAGE_CACHE_LEASE_TIMEOUT', 15))
+    PAGE_CACHE_LEASE_WAIT = float(os.environ.get('PAGE_CACHE_LEASE_WAIT', 3))
+    PAGE_CACHE_LEASE_POLL_INTERVAL = float(os.environ.get('PAGE_CACHE_LEASE_POLL_INTERVAL', 0.05))
+
+    # Page number -> HubSpot paging cursor maps
+    CURSOR_CACHE_TIMEOUT = int(os.environ.get('CURSOR_CACHE_TIMEOUT', 86400))
+
+    # Natural key -> HubSpot id indexes, negative entries expire sooner
+    LOOKUP_INDEX_TTL = int(os.environ.get('LOOKUP_INDEX_TTL', 86400))
+    LOOKUP_INDEX_NEGATIVE_TTL = int(os.environ.get('LOOKUP_INDEX_NEGATIVE_TTL', 300))
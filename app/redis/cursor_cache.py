@@ -0,0 +1,54 @@
+import logging
+from redis.exceptions import RedisError
+from .config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class CursorCache:
+    """Redis map of page number -> HubSpot paging cursor per listing and page size.
+
+    HubSpot's 'after' is an opaque cursor, so reaching page N means following
+    the cursors of the pages before it. Remembering them lets a jump to page
+    N start from the nearest known page instead of from the first one.
+    """
+
+    def __init__(self, redis_client, timeout=Config.CURSOR_CACHE_TIMEOUT):
+        self.redis_client = redis_client
+        self.timeout = timeout
+
+    @staticmethod
+    def _key(listing, page_size):
+        # A listing is an object type, or an object type and the search run over it
+        return f"{listing}_cursors_size_{page_size}"
+
+    def nearest(self, listing, page_size, page):
+        """Return (known_page, after) for the closest known page at or before page"""
+        try:
+            cursors = self.redis_client.client.hgetall(self._key(listing, page_size))
+        except RedisError as e:
+            logger.warning(f"Cursor cache unavailable: {str(e)}")
+            cursors = {}
+
+        # Page 1 needs no cursor
+        known_page, after = 1, None
+        for cached_page, cursor in cursors.items():
+            cached_page = int(cached_page)
+            if known_page < cached_page <= page:
+                known_page, after = cached_page, cursor
+
+        return known_page, after
+
+    def store(self, listing, page_size, page, after):
+        """Remember the cursor that starts page"""
+        if page <= 1 or not after:
+            return
+        try:
+            key = self._key(listing, page_size)
+            pipeline = self.redis_client.client.pipeline(transaction=False)
+            pipeline.hset(key, page, after)
+            pipeline.expire(key, self.timeout)
+            pipeline.execute()
+        except RedisError as e:
+            logger.warning(f"Cursor cache unavailable: {str(e)}")
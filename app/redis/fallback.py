@@ -0,0 +1,117 @@
+import threading
+import weakref
+from redis.exceptions import ConnectionError, TimeoutError, LockError
+from .config import Config
+from .local_cache import LocalCache
+
+
+# Entries never outlive the longest Redis TTL in use
+FALLBACK_MAX_TTL = 86400
+
+
+class FallbackStore:
+    """Bounded in-process stand-in for Redis while it is unreachable.
+
+    Holds what RedisClient writes during an outage, cache entries and the
+    HubSpot token alike, with the TTLs they were written with, and hands
+    out locks that only coordinate the threads of this process.
+    """
+
+    def __init__(self, max_bytes=Config.REDIS_FALLBACK_MAX_BYTES):
+        self.cache = LocalCache(max_bytes=max_bytes, ttl=FALLBACK_MAX_TTL, channel=None)
+        # Locks live as long as somebody holds them
+        self._locks = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self.cache.get(key)[1]
+
+    def set(self, key, value, size, ttl):
+        self.cache.set(key, value, size, ttl)
+
+    def delete(self, *keys):
+        self.cache.delete(*keys)
+
+    def lock(self, name, blocking_timeout=None):
+        with self._lock:
+            lock = self._locks.get(name)
+            if lock is None:
+                lock = self._locks[name] = LocalLock()
+        return _LocalLockHandle(lock, blocking_timeout)
+
+    def stats(self):
+        stats = self.cache.stats()
+        return {
+            "hits": stats["l1_hits"],
+            "misses": stats["l1_misses"],
+            "entries": stats["entries"],
+            "bytes": stats["bytes"],
+            "max_bytes": stats["max_bytes"],
+            "evictions": stats["evictions"],
+        }
+
+
+class LocalLock:
+    def __init__(self):
+        self.lock = threading.Lock()
+
+
+class _LocalLockHandle:
+    """Subset of the redis-py Lock API backed by a lock of this process"""
+
+    def __init__(self, local_lock, blocking_timeout):
+        self.local_lock = local_lock
+        self.blocking_timeout = blocking_timeout
+
+    def acquire(self, blocking=None):
+        if blocking is False:
+            return self.local_lock.lock.acquire(blocking=False)
+        timeout = -1 if self.blocking_timeout is None else self.blocking_timeout
+        return self.local_lock.lock.acquire(timeout=timeout)
+
+    def locked(self):
+        return self.local_lock.lock.locked()
+
+    def release(self):
+        try:
+            self.local_lock.lock.release()
+        except RuntimeError:
+            raise LockError("Cannot release an unlocked lock")
+
+
+class FailoverLock:
+    """Redis lock that falls back to a process-local lock when Redis is unreachable"""
+
+    def __init__(self, redis_lock, fallback, name):
+        self.redis_lock = redis_lock
+        self.fallback = fallback
+        self.name = name
+        self._held = None
+
+    def acquire(self, blocking=None):
+        try:
+            acquired = self.redis_lock.acquire(blocking=blocking)
+            self._held = self.redis_lock
+        except (ConnectionError, TimeoutError):
+            # Every process coordinates only its own threads until Redis is back
+            local_lock = self.fallback.lock(self.name, self.redis_lock.blocking_timeout)
+            acquired = local_lock.acquire(blocking=blocking)
+            self._held = local_lock
+        return acquired
+
+    def locked(self):
+        """True while anyone holds the lock"""
+        try:
+            return self.redis_lock.locked()
+        except (ConnectionError, TimeoutError):
+            return self.fallback.lock(self.name, self.redis_lock.blocking_timeout).locked()
+
+    def release(self):
+        if self._held is None:
+            raise LockError("Cannot release an unlocked lock")
+        held, self._held = self._held, None
+        try:
+            held.release()
+        except (ConnectionError, TimeoutError):
+            # Redis went away while the lock was held, it expires on its own
+            pass
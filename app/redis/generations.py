@@ -0,0 +1,124 @@
+import time
+import logging
+import threading
+from redis.exceptions import RedisError
+from .circuit import circuit_of
+from .fallback import FALLBACK_MAX_TTL
+
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationCounter:
+    """Per object type generation number that namespaces cached listings.
+
+    Every write to an object type bumps its generation, which moves readers
+    to new page and cursor cache keys at once; entries of old generations are
+    never read again and simply expire. Counters start at the current time in
+    milliseconds, so a counter lost from Redis never reuses an old generation.
+    While Redis is unreachable each process counts in its fallback store, so
+    writes made meanwhile still invalidate the listings served from there.
+    """
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(object_type):
+        return f"{object_type}_generation"
+
+    def current(self, object_type):
+        """Return the current generation of object_type"""
+        key = self._key(object_type)
+        if self._degraded():
+            return self._local_current(key)
+
+        local_cache = self.redis_client.local_cache
+        if local_cache is not None:
+            # Hot listings are served without a Redis round trip, bumps are published
+            found, generation = local_cache.get(key)
+            if found:
+                return generation
+
+        try:
+            generation = self.redis_client.client.get(key)
+            if generation is None:
+                self.redis_client.client.set(key, self._start(), nx=True)
+                generation = self.redis_client.client.get(key)
+            generation = int(generation)
+        except (RedisError, TypeError, ValueError) as e:
+            logger.warning(f"Cache generation unavailable for {object_type}: {str(e)}")
+            return self._local_current(key)
+
+        if local_cache is not None:
+            local_cache.set(key, generation, len(str(generation)))
+        return generation
+
+    def current_many(self, object_types):
+        """Load the generations of several object types into the L1 cache in one round trip"""
+        local_cache = self.redis_client.local_cache
+        if local_cache is None or self._degraded():
+            return
+        missing = [object_type for object_type in object_types
+                   if not local_cache.get(self._key(object_type))[0]]
+        if not missing:
+            return
+
+        try:
+            stored = self.redis_client.mget_cache([self._key(object_type) for object_type in missing])
+        except RedisError as e:
+            logger.warning(f"Cache generations unavailable: {str(e)}")
+            return
+        for object_type, generation in zip(missing, stored):
+            if generation is None:
+                # Started by the first current() call
+                continue
+            local_cache.set(self._key(object_type), int(generation), len(generation))
+
+    def bump(self, object_type):
+        """Start a new generation of object_type, invalidating its cached listings"""
+        key = self._key(object_type)
+        if self._degraded():
+            self._local_bump(key)
+            return
+
+        try:
+            pipeline = self.redis_client.client.pipeline(transaction=True)
+            pipeline.set(key, self._start(), nx=True)
+            pipeline.incr(key)
+            pipeline.execute()
+        except RedisError as e:
+            # Listings cached in Redis stay until they expire after CACHE_TIMEOUT
+            logger.error(f"Could not invalidate cached {object_type}: {str(e)}")
+            self._local_bump(key)
+        self.redis_client.invalidate_local(key)
+
+    def _degraded(self):
+        # Redis is not asked while its circuit is open, so an outage logs no warning per request
+        circuit = circuit_of(self.redis_client.client)
+        return circuit is not None and circuit.is_open
+
+    def _local_current(self, key):
+        fallback = self.redis_client.fallback
+        if fallback is None:
+            # Without Redis there is no cache to read from either
+            return 0
+        with self._lock:
+            generation = fallback.get(key)
+            if generation is None:
+                generation = self._start()
+                fallback.set(key, generation, len(str(generation)), FALLBACK_MAX_TTL)
+            return generation
+
+    def _local_bump(self, key):
+        fallback = self.redis_client.fallback
+        if fallback is None:
+            return
+        with self._lock:
+            generation = (fallback.get(key) or self._start()) + 1
+            fallback.set(key, generation, len(str(generation)), FALLBACK_MAX_TTL)
+
+    @staticmethod
+    def _start():
+        return int(time.time() * 1000)
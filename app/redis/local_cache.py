@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from redis.exceptions import RedisError
+from .config import Config
+from .circuit import circuit_of
+
+
+logger = logging.getLogger(__name__)
+
+# Pause before resubscribing after the invalidation channel dropped, doubled
+# after every failed attempt up to RESUBSCRIBE_MAX_DELAY
+RESUBSCRIBE_DELAY = 1
+RESUBSCRIBE_MAX_DELAY = 30
+
+
+class LocalCache:
+    """In-process L1 cache in front of Redis.
+
+    Entries are bounded by their encoded size (LRU eviction above max_bytes)
+    and by a per-entry TTL. Writes made through any RedisClient are
+    published on a Redis channel, and every process drops the keys written
+    elsewhere from its own L1. Values are shared between requests and must
+    be treated as read-only.
+    """
+
+    def __init__(self, max_bytes=Config.L1_CACHE_MAX_BYTES, ttl=Config.L1_CACHE_TTL,
+                 channel=Config.CACHE_INVALIDATION_CHANNEL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.channel = channel
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._origin = None
+
+        self.l1_hits = 0
+        self.l1_misses = 0
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return (found, value) from this process's memory"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.l1_hits += 1
+                return True, entry[0]
+            if entry is not None:
+                self._remove(key)
+            self.l1_misses += 1
+            return False, None
+
+    def set(self, key, value, size, ttl=None):
+        """Keep value, whose encoded form is size bytes, for at most ttl seconds"""
+        if self.max_bytes <= 0 or size > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def record_l2(self, hit):
+        with self._lock:
+            if hit:
+                self.l2_hits += 1
+            else:
+                self.l2_misses += 1
+
+    def publish(self, client, *keys):
+        """Tell the other processes to drop keys from their L1"""
+        self.listen(client)
+        circuit = circuit_of(client)
+        if circuit is not None and circuit.is_open:
+            # Nobody is listening, every listener empties its L1 when it resubscribes
+            return
+        message = json.dumps({"origin": self._origin, "keys": list(keys)})
+        try:
+            client.publish(self.channel, message)
+        except RedisError as e:
+            # The other processes serve their copy until its L1 TTL runs out
+            logger.warning(f"Could not publish cache invalidation: {str(e)}")
+
+    def listen(self, client):
+        """Start this process's invalidation listener, once per process"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Entries and listener threads are not inherited over a fork
+            self._entries.clear()
+            self._bytes = 0
+            self._pid = os.getpid()
+            self._origin = uuid.uuid4().hex
+
+        thread = threading.Thread(
+            target=self._listen, args=(client,), name='l1-cache-invalidation', daemon=True)
+        thread.start()
+
+    def _listen(self, client):
+        circuit = circuit_of(client)
+        delay = RESUBSCRIBE_DELAY
+        unavailable = False
+        while True:
+            if circuit is not None and circuit.is_open:
+                # Redis is known to be down, the circuit's probe tells when it is back
+                time.sleep(RESUBSCRIBE_DELAY)
+                continue
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Invalidations may have been missed while not subscribed
+                self.clear()
+                if unavailable:
+                    logger.info("Cache invalidation channel available again")
+                    unavailable = False
+                delay = RESUBSCRIBE_DELAY
+                while True:
+                    # Polled, so idle periods do not run into the socket timeout
+                    message = pubsub.get_message(timeout=1.0)
+                    if message:
+                        self.apply(message.get("data"))
+            except Exception as e:
+                # Logged once per outage, not on every attempt
+                if not unavailable:
+                    logger.warning(f"Cache invalidation channel unavailable: {str(e)}")
+                    unavailable = True
+                self.clear()
+                time.sleep(delay)
+                delay = min(delay * 2, RESUBSCRIBE_MAX_DELAY)
+
+    def apply(self, data):
+        """Apply an invalidation message published by another process"""
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if message.get("origin") == self._origin:
+            return
+        keys = message.get("keys") or []
+        self.delete(*keys)
+        with self._lock:
+            self.invalidations += len(keys)
+
+    def stats(self):
+        """L1 and L2 hit rates and L1 memory use of this process"""
+        with self._lock:
+            l1_total = self.l1_hits + self.l1_misses
+            l2_total = self.l2_hits + self.l2_misses
+            return {
+                "l1_hits": self.l1_hits,
+                "l1_misses": self.l1_misses,
+                "l1_hit_rate": round(self.l1_hits / l1_total, 4) if l1_total else None,
+                "l2_hits": self.l2_hits,
+                "l2_misses": self.l2_misses,
+                "l2_hit_rate": round(self.l2_hits / l2_total, 4) if l2_total else None,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared by every RedisClient in this process
+local_cache = LocalCache()
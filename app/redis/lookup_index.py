@@ -0,0 +1,114 @@
+import logging
+import threading
+from redis.exceptions import RedisError
+from .config import Config
+
+
+logger = logging.getLogger(__name__)
+
+# Stored for values HubSpot confirmed do not exist
+MISSING = "__missing__"
+
+# Every index created in this process, by namespace
+indexes = {}
+
+
+class LookupIndex:
+    """Redis-backed index from a normalized natural key to a HubSpot object id.
+
+    lookup() returns (known, object_id): known is False when HubSpot has to
+    be asked, and object_id is None for a cached negative entry. Redis
+    errors are treated as misses so the index never fails a request.
+    """
+
+    def __init__(self, redis_client, namespace, ttl=Config.LOOKUP_INDEX_TTL,
+                 negative_ttl=Config.LOOKUP_INDEX_NEGATIVE_TTL):
+        self.redis_client = redis_client
+        self.namespace = namespace
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+        indexes[namespace] = self
+
+    @staticmethod
+    def normalize(value):
+        return value.strip().lower() if value else value
+
+    def _key(self, value):
+        return f"index:{self.namespace}:{self.normalize(value)}"
+
+    def lookup(self, value):
+        """Return (known, object_id) for a single value"""
+        return self.lookup_many([value])[self.normalize(value)]
+
+    def lookup_many(self, values):
+        """Return {normalized value: (known, object_id)} with a single MGET"""
+        normalized = list(dict.fromkeys(self.normalize(value) for value in values))
+        try:
+            stored = self.redis_client.client.mget([self._key(value) for value in normalized])
+        except RedisError as e:
+            logger.warning(f"Lookup index '{self.namespace}' unavailable: {str(e)}")
+            stored = [None] * len(normalized)
+
+        results = {}
+        hits = negative_hits = misses = 0
+        for value, object_id in zip(normalized, stored):
+            if object_id is None:
+                misses += 1
+                results[value] = (False, None)
+            elif object_id == MISSING:
+                negative_hits += 1
+                results[value] = (True, None)
+            else:
+                hits += 1
+                results[value] = (True, object_id)
+
+        with self._stats_lock:
+            self.hits += hits
+            self.negative_hits += negative_hits
+            self.misses += misses
+
+        return results
+
+    def set(self, value, object_id):
+        self.set_many({value: object_id})
+
+    def set_missing(self, value):
+        """Remember that HubSpot has no object for this value"""
+        self._write({self._key(value): MISSING}, self.negative_ttl)
+
+    def set_many(self, mapping):
+        """Store {value: object_id} pairs in one pipeline"""
+        self._write({self._key(value): str(object_id)
+                     for value, object_id in mapping.items() if object_id}, self.ttl)
+
+    def delete(self, value):
+        try:
+            self.redis_client.client.delete(self._key(value))
+        except RedisError as e:
+            logger.warning(f"Lookup index '{self.namespace}' unavailable: {str(e)}")
+
+    def _write(self, entries, ttl):
+        if not entries:
+            return
+        try:
+            pipeline = self.redis_client.client.pipeline(transaction=False)
+            for key, object_id in entries.items():
+                pipeline.setex(key, ttl, object_id)
+            pipeline.execute()
+        except RedisError as e:
+            logger.warning(f"Lookup index '{self.namespace}' unavailable: {str(e)}")
+
+    def stats(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else None,
+        }
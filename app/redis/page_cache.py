@@ -0,0 +1,265 @@
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from redis.exceptions import RedisError, LockError
+from .config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class PageCache:
+    """Redis cache with a soft and a hard TTL (stale-while-revalidate).
+
+    Entries are fresh until soft_ttl. Between soft_ttl and hard_ttl, when
+    Redis expires them, the stale value is served at once and a single
+    background refresh is started; a Redis lock makes sure only one worker
+    in the cluster refreshes a given key. Only a miss waits for the loader,
+    and concurrent misses of a key share a single loader call: threads of a
+    process through a shared future, workers through a Redis lease.
+    """
+
+    def __init__(self, redis_client, soft_ttl=Config.PAGE_CACHE_SOFT_TTL,
+                 hard_ttl=Config.PAGE_CACHE_HARD_TTL,
+                 lock_timeout=Config.PAGE_CACHE_REFRESH_LOCK_TIMEOUT, executor=None,
+                 lease_timeout=Config.PAGE_CACHE_LEASE_TIMEOUT,
+                 lease_wait=Config.PAGE_CACHE_LEASE_WAIT,
+                 poll_interval=Config.PAGE_CACHE_LEASE_POLL_INTERVAL):
+        self.redis_client = redis_client
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = max(hard_ttl, soft_ttl)
+        self.lock_timeout = lock_timeout
+        self.lease_timeout = lease_timeout
+        self.lease_wait = lease_wait
+        self.poll_interval = poll_interval
+        self._executor = executor
+
+        # Keys this process is refreshing, so it starts one refresh per key
+        self._refreshing = set()
+        # Futures of the misses this process is loading, by key
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.refresh_skipped = 0
+        self.refresh_seconds_total = 0.0
+        self.refresh_seconds_max = 0.0
+        self.stale_age_total = 0.0
+        self.stale_age_max = 0.0
+        self.coalesced = 0
+        self.lease_waits = 0
+        self.lease_timeouts = 0
+        self.lease_abandoned = 0
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=Config.PAGE_CACHE_REFRESH_WORKERS,
+                        thread_name_prefix='page-cache-refresh')
+        return self._executor
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss"""
+        entry = self._read(key)
+        now = time.time()
+
+        if entry is None:
+            self._count(misses=1)
+            return self._load_once(key, loader)
+
+        stale_age = now - entry["fresh_until"]
+        if stale_age <= 0:
+            self._count(fresh_hits=1)
+        else:
+            self._count(stale_hits=1, stale_age=stale_age)
+            self._schedule_refresh(key, loader)
+        return entry["value"]
+
+    def _load_once(self, key, loader):
+        """Load a missing key with one loader call per key across threads and workers"""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            # Another thread is loading this key, share its result or error
+            self._count(coalesced=1)
+            return future.result()
+
+        try:
+            value = self._load_with_lease(key, loader)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _load_with_lease(self, key, loader):
+        lease = self.redis_client.lock(
+            f"lease:{key}", timeout=self.lease_timeout, blocking_timeout=0)
+        try:
+            acquired = lease.acquire(blocking=False)
+        except RedisError as e:
+            # Without Redis every worker loads for itself
+            logger.warning(f"Page cache lease unavailable: {str(e)}")
+            return self._load(key, loader)
+
+        if not acquired:
+            # Another worker is loading this key, wait for it to land in Redis
+            deadline = time.monotonic() + self.lease_wait
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                entry = self._read(key)
+                if entry is not None:
+                    self._count(lease_waits=1)
+                    return entry["value"]
+                if not self._lease_held(lease):
+                    # Released without a value: the holder's load failed, stop waiting
+                    entry = self._read(key)
+                    if entry is not None:
+                        self._count(lease_waits=1)
+                        return entry["value"]
+                    self._count(lease_abandoned=1)
+                    return self._load(key, loader)
+
+            # The lease holder died or is too slow
+            self._count(lease_timeouts=1)
+            return self._load(key, loader)
+
+        try:
+            return self._load(key, loader)
+        finally:
+            try:
+                lease.release()
+            except (LockError, RedisError):
+                # The lease expired while loading
+                pass
+
+    def _lease_held(self, lease):
+        try:
+            return lease.locked()
+        except RedisError:
+            # Keep waiting, the deadline still bounds it
+            return True
+
+    def _load(self, key, loader):
+        value = loader()
+        self._write(key, value)
+        return value
+
+    def _read(self, key):
+        try:
+            entry = self.redis_client.get_cache_value(key)
+        except RedisError as e:
+            logger.warning(f"Page cache unavailable: {str(e)}")
+            return None
+        # Anything without a soft expiry was written before this format
+        if not isinstance(entry, dict) or "fresh_until" not in entry:
+            return None
+        return entry
+
+    def _write(self, key, value):
+        # Cache the value, one that cannot be cached is still served
+        entry = {"value": value, "fresh_until": time.time() + self.soft_ttl}
+        try:
+            self.redis_client.set_cache_value(key, entry, timeout=self.hard_ttl)
+        except RedisError as e:
+            logger.warning(f"Could not cache {key}: {str(e)}")
+
+    def _schedule_refresh(self, key, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        try:
+            self.executor.submit(self._refresh, key, loader)
+        except RuntimeError:
+            # The executor is shut down, the next request retries
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh(self, key, loader):
+        try:
+            lock = self.redis_client.lock(
+                f"lock:{key}", timeout=self.lock_timeout, blocking_timeout=0)
+            if not lock.acquire(blocking=False):
+                # Another worker is refreshing this key
+                self._count(refresh_skipped=1)
+                return
+
+            try:
+                started = time.monotonic()
+                self._write(key, loader())
+                self._count(refreshes=1, refresh_seconds=time.monotonic() - started)
+            finally:
+                try:
+                    lock.release()
+                except LockError:
+                    # The lock expired during a slow refresh
+                    pass
+        except Exception as e:
+            self._count(refresh_errors=1)
+            logger.error(f"Background refresh of {key} failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _count(self, fresh_hits=0, stale_hits=0, misses=0, refreshes=0,
+               refresh_errors=0, refresh_skipped=0, refresh_seconds=None, stale_age=None,
+               coalesced=0, lease_waits=0, lease_timeouts=0, lease_abandoned=0):
+        with self._lock:
+            self.coalesced += coalesced
+            self.lease_waits += lease_waits
+            self.lease_timeouts += lease_timeouts
+            self.lease_abandoned += lease_abandoned
+            self.fresh_hits += fresh_hits
+            self.stale_hits += stale_hits
+            self.misses += misses
+            self.refreshes += refreshes
+            self.refresh_errors += refresh_errors
+            self.refresh_skipped += refresh_skipped
+            if refresh_seconds is not None:
+                self.refresh_seconds_total += refresh_seconds
+                self.refresh_seconds_max = max(self.refresh_seconds_max, refresh_seconds)
+            if stale_age is not None:
+                self.stale_age_total += stale_age
+                self.stale_age_max = max(self.stale_age_max, stale_age)
+
+    def stats(self):
+        """Hit ratio, refresh latency and staleness of served values in this process"""
+        with self._lock:
+            hits = self.fresh_hits + self.stale_hits
+            total = hits + self.misses
+            return {
+                "fresh_hits": self.fresh_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": round(hits / total, 4) if total else None,
+                "coalesced": self.coalesced,
+                "lease_waits": self.lease_waits,
+                "lease_timeouts": self.lease_timeouts,
+                "lease_abandoned": self.lease_abandoned,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "refresh_skipped": self.refresh_skipped,
+                "refresh_seconds_avg": (round(self.refresh_seconds_total / self.refreshes, 4)
+                                        if self.refreshes else None),
+                "refresh_seconds_max": round(self.refresh_seconds_max, 4),
+                "stale_age_seconds_avg": (round(self.stale_age_total / self.stale_hits, 2)
+                                          if self.stale_hits else None),
+                "stale_age_seconds_max": round(self.stale_age_max, 2),
+                "soft_ttl": self.soft_ttl,
+                "hard_ttl": self.hard_ttl,
+            }
@@ -1,30 +1,244 @@
 import time
+import json
+import threading
 import redis
+from redis.exceptions import ConnectionError, TimeoutError
 from .config import Config
+from .codec import codec
+from .circuit import circuit, CircuitBreakerConnection, CircuitBreakerSSLConnection
+from .fallback import FallbackStore, FailoverLock
+from .local_cache import local_cache as shared_local_cache
+
+
+# Errors that mean Redis is unreachable, rather than a bad command
+UNAVAILABLE = (ConnectionError, TimeoutError)
+
+
+# One pool per response decoding mode, shared by every RedisClient in the process
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def connection_pool(decode_responses):
+    """Return the process-wide connection pool.
+
+    redis-py drops connections inherited over a fork the first time a pool
+    is used in the child, so pools created before gunicorn forks its
+    workers are safe to share. Every connection goes through the process
+    circuit breaker.
+    """
+    pool = _pools.get(decode_responses)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(decode_responses)
+            if pool is None:
+                kwargs = {"connection_class": CircuitBreakerConnection}
+                if Config.REDIS_SSL:
+                    kwargs = {
+                        "connection_class": CircuitBreakerSSLConnection,
+                        "ssl_cert_reqs": Config.REDIS_SSL_CERT_REQS,
+                        "ssl_ca_certs": Config.REDIS_SSL_CA_CERTS,
+                    }
+                pool = _pools[decode_responses] = redis.ConnectionPool(
+                    host=Config.REDIS_HOST or 'localhost',
+                    port=int(Config.REDIS_PORT or 6379),
+                    password=Config.REDIS_PASSWORD,
+                    username=Config.REDIS_USERNAME,
+                    decode_responses=decode_responses,
+                    socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=Config.REDIS_SOCKET_CONNECT_TIMEOUT,
+                    health_check_interval=Config.REDIS_HEALTH_CHECK_INTERVAL,
+                    max_connections=Config.REDIS_MAX_CONNECTIONS,
+                    circuit=circuit,
+                    **kwargs
+                )
+                if circuit.probe is None:
+                    circuit.probe = redis.Redis(connection_pool=pool).ping
+    return pool
+
+
+# Stands in for Redis in this process while the circuit is open
+fallback_store = FallbackStore()
 
 
 class RedisClient:
-    def __init__(self):
-        self.client = redis.Redis(
-            host=Config.REDIS_HOST,
-            port=Config.REDIS_PORT,
-            password=Config.REDIS_PASSWORD,
-            username=Config.REDIS_USERNAME,
-            ssl=True,
-            decode_responses=True
-        )
+    """Cache, token and lock access to Redis.
+
+    While Redis is unreachable reads and writes go to the in-process
+    fallback store, so an outage costs cache hits instead of requests.
+    """
+
+    def __init__(self, local_cache=shared_local_cache, fallback=fallback_store):
+        self.client = redis.Redis(connection_pool=connection_pool(True))
+        # Encoded cache values are binary and must not be decoded as text
+        self.binary_client = redis.Redis(connection_pool=connection_pool(False))
+        # In-process L1 in front of the *_cache_value methods, None to disable
+        self.local_cache = local_cache
+        # In-process stand-in while Redis is unreachable, None to raise instead
+        self.fallback = fallback
 
     def set_cache(self, key, value, timeout=Config.CACHE_TIMEOUT):
         """Store data in Redis"""
-        self.client.setex(key, timeout, value)
+        try:
+            self.client.setex(key, timeout, value)
+        except UNAVAILABLE:
+            self._fallback_set(key, value, len(value), timeout)
 
     def get_cache(self, key):
         """Retrieve data from Redis"""
-        return self.client.get(key)
+        try:
+            return self.client.get(key)
+        except UNAVAILABLE:
+            return self._fallback_get(key)
+
+    def mset_cache(self, values, timeout=Config.CACHE_TIMEOUT):
+        """Store many strings with one pipelined round trip"""
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for key, value in values.items():
+                pipeline.setex(key, timeout, value)
+            pipeline.execute()
+        except UNAVAILABLE:
+            for key, value in values.items():
+                self._fallback_set(key, value, len(value), timeout)
+
+    def mget_cache(self, keys):
+        """Retrieve many strings with one round trip, None for each miss"""
+        if not keys:
+            return []
+        try:
+            return self.client.mget(keys)
+        except UNAVAILABLE:
+            return [self._fallback_get(key) for key in keys]
 
-    def delete_cache(self, key):
+    def set_cache_value(self, key, value, timeout=Config.CACHE_TIMEOUT):
+        """Store a plain value in Redis through the cache codec and the L1 cache"""
+        data = codec.encode(value)
+        try:
+            self.binary_client.setex(key, timeout, data)
+        except UNAVAILABLE:
+            self._fallback_set(key, value, len(data), timeout)
+        if self.local_cache is not None:
+            self.local_cache.set(key, value, len(data), timeout)
+            self.local_cache.publish(self.client, key)
+
+    def get_cache_value(self, key):
+        """Retrieve a value stored with set_cache_value, or None"""
+        if self.local_cache is not None:
+            self.local_cache.listen(self.client)
+            found, value = self.local_cache.get(key)
+            if found:
+                return value
+
+        try:
+            data = self.binary_client.get(key)
+        except UNAVAILABLE:
+            return self._fallback_get(key)
+        if self.local_cache is not None:
+            self.local_cache.record_l2(data is not None)
+        if data is None:
+            return None
+        try:
+            value = codec.decode(data)
+        except ValueError:
+            # Entries written in an older format are simply fetched again
+            return None
+
+        if self.local_cache is not None:
+            self.local_cache.set(key, value, len(data))
+        return value
+
+    def mset_cache_values(self, values, timeout=Config.CACHE_TIMEOUT):
+        """Store many plain values with one pipelined round trip"""
+        encoded = {key: codec.encode(value) for key, value in values.items()}
+        try:
+            pipeline = self.binary_client.pipeline(transaction=False)
+            for key, data in encoded.items():
+                pipeline.setex(key, timeout, data)
+            pipeline.execute()
+        except UNAVAILABLE:
+            for key, data in encoded.items():
+                self._fallback_set(key, values[key], len(data), timeout)
+
+        if self.local_cache is not None:
+            for key, data in encoded.items():
+                self.local_cache.set(key, values[key], len(data), timeout)
+            self.local_cache.publish(self.client, *encoded)
+
+    def mget_cache_values(self, keys):
+        """Retrieve many values stored with set_cache_value, None for each miss"""
+        values = [None] * len(keys)
+        pending = list(range(len(keys)))
+        if self.local_cache is not None:
+            self.local_cache.listen(self.client)
+            pending = []
+            for position, key in enumerate(keys):
+                found, value = self.local_cache.get(key)
+                if found:
+                    values[position] = value
+                else:
+                    pending.append(position)
+
+        if not pending:
+            return values
+
+        # Everything not held in memory comes back in a single MGET
+        try:
+            stored = self.binary_client.mget([keys[position] for position in pending])
+        except UNAVAILABLE:
+            for position in pending:
+                values[position] = self._fallback_get(keys[position])
+            return values
+        for position, data in zip(pending, stored):
+            if self.local_cache is not None:
+                self.local_cache.record_l2(data is not None)
+            if data is None:
+                continue
+            try:
+                values[position] = codec.decode(data)
+            except ValueError:
+                continue
+            if self.local_cache is not None:
+                self.local_cache.set(keys[position], values[position], len(data))
+        return values
+
+    def delete_cache(self, *keys):
         """Delete data from Redis"""
-        self.client.delete(key)
+        if not keys:
+            return
+        try:
+            self.client.delete(*keys)
+        except UNAVAILABLE:
+            if self.fallback is None:
+                raise
+        if self.fallback is not None:
+            self.fallback.delete(*keys)
+        self.invalidate_local(*keys)
+
+    def invalidate_local(self, *keys):
+        """Drop keys from the L1 cache of every process"""
+        if self.local_cache is not None:
+            self.local_cache.delete(*keys)
+            self.local_cache.publish(self.client, *keys)
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        """Create a distributed lock shared by every worker using this Redis"""
+        lock = self.client.lock(
+            name, timeout=timeout, blocking_timeout=blocking_timeout)
+        if self.fallback is None:
+            return lock
+        return FailoverLock(lock, self.fallback, name)
+
+    # Called while handling an UNAVAILABLE error, re-raised without a fallback store
+    def _fallback_set(self, key, value, size, timeout):
+        if self.fallback is None:
+            raise
+        self.fallback.set(key, value, size, timeout)
+
+    def _fallback_get(self, key):
+        if self.fallback is None:
+            raise
+        return self.fallback.get(key)
 
     def set_token(self, token, expires_in):
         """Store token with expiration time"""
@@ -33,15 +247,18 @@ class RedisClient:
             "token": token,
             "expiration_time": expiration_time
         }
-        self.set_cache('hubspot_token', token_data)
+        self.set_cache('hubspot_token', json.dumps(token_data),
+                       timeout=max(int(expires_in), 1))
 
     def get_token(self):
-        """Get token from Redis."""
+        """Get token and its expiration time from Redis."""
         token_data = self.get_cache('hubspot_token')
         if token_data:
-            token_data = eval(token_data)
+            try:
+                token_data = json.loads(token_data)
+            except ValueError:
+                # Entries written in the old format are simply refreshed
+                return None
             if time.time() < token_data["expiration_time"]:
-                return token_data["token"]
-            else:
-                self.delete_cache('hubspot_token')
+                return token_data["token"], token_data["expiration_time"]
         return None
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import logging
+import threading
+from redis.exceptions import RedisError
+from .config import Config
+from .redis_client import RedisClient
+from .circuit import circuit_of
+
+
+logger = logging.getLogger(__name__)
+
+# Pause before resubscribing after the revocation channel dropped, doubled
+# after every failed attempt up to RESUBSCRIBE_MAX_DELAY
+RESUBSCRIBE_DELAY = 1
+RESUBSCRIBE_MAX_DELAY = 30
+# Seconds between sweeps of expired revocations from memory
+PRUNE_INTERVAL = 60
+
+
+class RevocationSet:
+    """Revoked JWT ids, checked in memory.
+
+    Revocations are kept in a Redis sorted set scored by the expiry of the
+    token, so entries are pruned once the token could not be used anyway.
+    Every process mirrors the set into a dict: it loads it when its listener
+    subscribes and then applies the revocations published on a channel.
+    """
+
+    def __init__(self, redis_client, key=Config.TOKEN_REVOCATION_KEY,
+                 channel=Config.TOKEN_REVOCATION_CHANNEL):
+        self.redis_client = redis_client
+        self.key = key
+        self.channel = channel
+
+        # jti -> expiry of the revoked token
+        self._revoked = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._pruned_at = time.monotonic()
+
+    def is_revoked(self, jti):
+        """True if the token with this jti was revoked"""
+        self.listen()
+        return jti in self._revoked
+
+    def revoke(self, jti, expires_at):
+        """Revoke a token in every process until expires_at (unix time)"""
+        self.listen()
+        self._add(jti, expires_at)
+
+        now = time.time()
+        try:
+            pipeline = self.redis_client.client.pipeline(transaction=True)
+            pipeline.zadd(self.key, {jti: expires_at})
+            pipeline.zremrangebyscore(self.key, "-inf", now)
+            pipeline.execute()
+            self.redis_client.client.publish(
+                self.channel, json.dumps({"jti": jti, "exp": expires_at}))
+        except RedisError as e:
+            # Only this process rejects the token until it expires
+            logger.error(f"Could not share revocation of token {jti}: {str(e)}")
+
+    def listen(self):
+        """Start this process's revocation listener, once per process"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+
+        thread = threading.Thread(target=self._listen, name='token-revocations', daemon=True)
+        thread.start()
+
+    def _listen(self):
+        client = self.redis_client.client
+        circuit = circuit_of(client)
+        delay = RESUBSCRIBE_DELAY
+        unavailable = False
+        while True:
+            if circuit is not None and circuit.is_open:
+                # Redis is known to be down, the circuit's probe tells when it is back
+                time.sleep(RESUBSCRIBE_DELAY)
+                self._prune()
+                continue
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Revocations may have been missed while not subscribed
+                self._load()
+                if unavailable:
+                    logger.info("Token revocation channel available again")
+                    unavailable = False
+                delay = RESUBSCRIBE_DELAY
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message:
+                        self.apply(message.get("data"))
+                    self._prune()
+            except Exception as e:
+                # Logged once per outage, not on every attempt
+                if not unavailable:
+                    logger.warning(f"Token revocation channel unavailable: {str(e)}")
+                    unavailable = True
+                time.sleep(delay)
+                delay = min(delay * 2, RESUBSCRIBE_MAX_DELAY)
+
+    def _load(self):
+        stored = self.redis_client.client.zrangebyscore(
+            self.key, time.time(), "+inf", withscores=True)
+        with self._lock:
+            # Revocations made here while Redis was unreachable are kept
+            for jti, expires_at in stored:
+                self._revoked[jti] = expires_at
+
+    def apply(self, data):
+        """Apply a revocation published by another process"""
+        try:
+            message = json.loads(data)
+            self._add(message["jti"], float(message["exp"]))
+        except (TypeError, ValueError, KeyError):
+            return
+
+    def _add(self, jti, expires_at):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def _prune(self):
+        if time.monotonic() - self._pruned_at < PRUNE_INTERVAL:
+            return
+        self._pruned_at = time.monotonic()
+        now = time.time()
+        with self._lock:
+            expired = [jti for jti, expires_at in self._revoked.items() if expires_at <= now]
+            for jti in expired:
+                del self._revoked[jti]
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+# Shared by every request of this process
+revoked_tokens = RevocationSet(RedisClient())
@@ -1,5 +1,7 @@
-from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from ..models import db, User
+from ..utils.passwords import password_hasher
 import logging
 
 
@@ -9,40 +11,59 @@ class UserRepository:
 
     # Convert username to lowercase for proper checks
     def convert_username(self, username):
-        return username.lower() if username else None
+        return User.normalize_username(username)
 
     # Get a user
     def get_user(self, username):
         try:
             username = self.convert_username(username)
-            return User.query.filter(func.lower(User.username) == username).first()
+            return User.query.filter(User.username_lower == username).first()
         except Exception as e:
             self.logger.error(
                 f"Error retrieving user '{username}': {str(e)}")
             return None
 
-    # Create a new user
-    def create(self, username, password):
-        try:
-            # Convert the username before checking for duplicates
-            converted_username = self.convert_username(username)
+    # Get a user by credentials, upgrading a hash made with an older method
+    def authenticate(self, username, password):
+        user = self.get_user(username)
+        if not user or not user.check_password(password):
+            return None
 
-            # Check if user already exists
-            existing_user = self.get_user(converted_username)
-            if existing_user:
-                self.logger.warning(
-                    f"Not allowed to create duplicate user: {username}")
-                return None
+        if password_hasher.needs_rehash(user.password_hash):
+            try:
+                user.set_password(password)
+                db.session.commit()
+                self.logger.info(f"Password hash upgraded for user: {username}")
+            except Exception as e:
+                # The old hash still works, the next login tries again
+                db.session.rollback()
+                self.logger.error(f"Error upgrading password hash of '{username}': {str(e)}")
+        return user
 
-            # Create a new user
+    # Create a new user, None if the username is taken
+    def create(self, username, password):
+        try:
             new_user = User(username=username)
             new_user.set_password(password)
 
-            db.session.add(new_user)
+            # The duplicate check and the insert are a single statement on the unique index
+            insert = postgresql_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+            statement = insert(User).values(
+                username=new_user.username,
+                username_lower=new_user.username_lower,
+                password_hash=new_user.password_hash,
+            ).on_conflict_do_nothing(index_elements=[User.username_lower]).returning(User)
+
+            created_user = db.session.scalars(statement).first()
             db.session.commit()
 
+            if created_user is None:
+                self.logger.warning(
+                    f"Not allowed to create duplicate user: {username}")
+                return None
+
             self.logger.info(f"New user created: {username}")
-            return new_user
+            return created_user
 
         except Exception as e:
             db.session.rollback()
@@ -1,32 +1,35 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token
+from flask import Blueprint, jsonify
+from flask_jwt_extended import create_access_token, get_jwt
 import logging
+from ..middleware.auth import auth_middleware
+from ..redis.revocation import revoked_tokens
 from ..repository.user_repository import UserRepository
 from ..validations.user_validator import UserValidator
 from ..validations.base import validate_request, ValidationError
+from ..utils.passwords import PasswordHashTimeout
 
 # Initialize blueprint for Auth routes
 auth_bp = Blueprint('auth', __name__)
 logger = logging.getLogger(__name__)
 
 @auth_bp.route('/register', methods=['POST'])
-@validate_request(UserValidator.validate_user_registration)
-def register():
-    data = request.get_json()
+@validate_request(UserValidator.registration_schema)
+def register(payload):
     user_repo = UserRepository()
     
     try: 
-        # Check if user already exists
-        existing_user = user_repo.get_user(data['username'])
-        if existing_user:
-            logger.warning(f"Trying to register new user with existing username: {data['username']}")
+        # Create new user, unless the username already exists
+        new_user = user_repo.create(payload['username'], payload['password'])
+        if new_user is None:
+            logger.warning(f"Trying to register new user with existing username: {payload['username']}")
             return jsonify({'error': 'This username already exists'}), 409
         
-        # Create new user
-        new_user = user_repo.create(data['username'], data['password'])
-        
-        logger.info(f"User registered successfully: {data['username']}")
+        logger.info(f"User registered successfully: {payload['username']}")
         return jsonify({'message': 'User registered successfully'}), 201
+
+    except PasswordHashTimeout as e:
+        logger.error(f"Error during user registration: {str(e)}")
+        return jsonify({'error': 'Registration is busy, please try again shortly'}), 503
         
     except Exception as e:
         logger.error(f"Error during user registration: {str(e)}")
@@ -34,24 +37,38 @@ def register():
 
 
 @auth_bp.route('/login', methods=['POST'])
-@validate_request(UserValidator.validate_login)
-def login():
-    data = request.get_json()
+@validate_request(UserValidator.login_schema)
+def login(payload):
     user_repo = UserRepository()
     
     try:
-        # Check if user exists
-        user = user_repo.get_user(data['username'])
-        if not user or not user.check_password(data['password']):
-            logger.warning(f"Failed login attempt for username: {data['username']}")
+        # Check the credentials, hashing runs off the request thread
+        user = user_repo.authenticate(payload['username'], payload['password'])
+        if not user:
+            logger.warning(f"Failed login attempt for username: {payload['username']}")
             return jsonify({'error': 'Invalid username or password'}), 401
         
         # Create access token and convert user id to string
         access_token = create_access_token(identity=str(user.id))
         
-        logger.info(f"User logged in successfully: {data['username']}")
+        logger.info(f"User logged in successfully: {payload['username']}")
         return jsonify({'access_token': access_token}), 200
+
+    except PasswordHashTimeout as e:
+        logger.error(f"Error occured during user login: {str(e)}")
+        return jsonify({'error': 'Login is busy, please try again shortly'}), 503
         
     except Exception as e:
         logger.error(f"Error occured during user login: {str(e)}")
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+@auth_bp.route('/logout', methods=['POST'])
+@auth_middleware()
+def logout(user_id):
+    # Revoke the current token on every worker until it expires
+    claims = get_jwt()
+    revoked_tokens.revoke(claims['jti'], claims['exp'])
+
+    logger.info(f"User logged out: {user_id}")
+    return jsonify({'message': 'Logged out successfully'}), 200
@@ -1,8 +1,16 @@
 from flask import Blueprint, request, jsonify
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FetchTimeoutError
+import time
+import json
+import threading
+import base64
 import logging
+from app.config import Config
 from app.services.contact_service import ContactService
 from app.services.deal_service import DealService
 from app.services.support_ticket_service import SupportTicketService
+from app.services import prefetch_pages
+from app.services.crm_search import SearchQuery
 from ..middleware.auth import auth_middleware
 from ..validations.contact_validator import ContactValidator
 from ..validations.deal_validator import DealValidator
@@ -18,43 +26,99 @@ contact_service = ContactService()
 deal_service = DealService()
 ticket_service = SupportTicketService()
 
+# Bounded pool shared by all requests for the concurrent section fetches
+fetch_executor = ThreadPoolExecutor(
+    max_workers=Config.CRM_FETCH_WORKERS, thread_name_prefix='crm-fetch')
+# Fetches queued or running on fetch_executor. Past the limit a section is
+# reported busy at once instead of queueing behind fetches that hang
+fetch_slots = threading.BoundedSemaphore(Config.CRM_FETCH_MAX_PENDING)
+
+
+def _batch_response(results):
+    # Per-item results plus a count for each status
+    summary = {"created": 0, "updated": 0, "error": 0}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+
+    return {"results": results, "summary": summary}
+
+
+def _upsert_valid_items(validator, upsert, inputs):
+    # Invalid items are reported by index, the valid ones are still written
+    valid, invalid = validator.validate_batch_items(inputs)
+    results = [{"index": index, "status": "error", "error": "Validation error", "details": errors}
+               for index, errors in invalid.items()]
+
+    if valid:
+        indexes = [index for index, _ in valid]
+        for result in upsert([item for _, item in valid]):
+            result["index"] = indexes[result["index"]]
+            results.append(result)
+
+    results.sort(key=lambda result: result["index"])
+    return results
+
 
 @integration_bp.route('/create_contact', methods=['POST'])
 @auth_middleware()
-@validate_request(ContactValidator.validate_registration)
-def create_or_update_contact():
-    data = request.get_json()
-
+@validate_request(ContactValidator.create_schema)
+def create_or_update_contact(user_id, payload):
     try:
-        contact = contact_service.create_or_update_contact(data)
+        contact = contact_service.create_or_update_contact(payload)
         return jsonify(contact), 200
     except ValueError as e:
         logger.error(f"Error processing contact: {e}")
         return jsonify({"Error": str(e)}), 400
 
 
-@integration_bp.route('/create_deal', methods=['POST'])
+@integration_bp.route('/contacts/batch', methods=['POST'])
 @auth_middleware()
-@validate_request(DealValidator.validate_create_deal)
-def create_or_update_deal():
+@validate_request(ContactValidator.validate_batch)
+def batch_create_or_update_contacts(user_id):
     data = request.get_json()
 
     try:
-        deal = deal_service.create_or_update_deal(data)
+        results = _upsert_valid_items(
+            ContactValidator, contact_service.batch_create_or_update_contacts, data['inputs'])
+        return jsonify(_batch_response(results)), 200
+    except ValueError as e:
+        logger.error(f"Error processing contact batch: {e}")
+        return jsonify({"Error": str(e)}), 400
+
+
+@integration_bp.route('/create_deal', methods=['POST'])
+@auth_middleware()
+@validate_request(DealValidator.create_schema)
+def create_or_update_deal(user_id, payload):
+    try:
+        deal = deal_service.create_or_update_deal(payload)
         return jsonify(deal), 200
     except ValueError as e:
         logger.error(f"Error processing deal: {e}")
         return jsonify({"Error": str(e)}), 400
 
 
-@integration_bp.route('/create_ticket', methods=['POST'])
+@integration_bp.route('/deals/batch', methods=['POST'])
 @auth_middleware()
-@validate_request(SupportTicketValidator.validate_create_support_ticket)
-def create_ticket():
+@validate_request(DealValidator.validate_batch)
+def batch_create_or_update_deals(user_id):
     data = request.get_json()
 
     try:
-        ticket = ticket_service.create_ticket(data)
+        results = _upsert_valid_items(
+            DealValidator, deal_service.batch_create_or_update_deals, data['inputs'])
+        return jsonify(_batch_response(results)), 200
+    except ValueError as e:
+        logger.error(f"Error processing deal batch: {e}")
+        return jsonify({"Error": str(e)}), 400
+
+
+@integration_bp.route('/create_ticket', methods=['POST'])
+@auth_middleware()
+@validate_request(SupportTicketValidator.create_schema)
+def create_ticket(user_id, payload):
+    try:
+        ticket = ticket_service.create_ticket(payload)
         return jsonify(ticket), 200
     except ValueError as e:
         logger.error(f"Error processing ticket: {e}")
@@ -63,39 +127,124 @@ def create_ticket():
 
 @integration_bp.route('/new_crm_objects', methods=['GET'])
 @auth_middleware()
-def get_new_crm_objects():
+def get_new_crm_objects(user_id):
     page = int(request.args.get('page', 1))
     page_size = int(request.args.get('page_size', 10))
-    sort_by = request.args.get('sort_by', 'id')  # Default sort by 'id'
-    filter_by = request.args.get('filter_by', '')  # No default filter
+    cursor = request.args.get('cursor')  # Opaque cursor from a previous response
+    sort_by = request.args.get('sort_by', 'id')  # Default sort by 'id', '-' for descending
+    filter_by = request.args.getlist('filter_by')  # 'property:OPERATOR:value' or free text
 
     try:
-        contacts = contact_service.get_recent_contacts(page, page_size)
-        deals = deal_service.get_recent_deals(page, page_size)
-        tickets = ticket_service.get_recent_tickets(page, page_size)
-
-        # Sort dynamically based on query parameter
-        if sort_by:
-            contacts.sort(key=lambda x: x.get(sort_by))
-            deals.sort(key=lambda x: x.get(sort_by))
-            tickets.sort(key=lambda x: x.get(sort_by))
-
-        # Apply filtering if requested
-        if filter_by:
-            contacts = [c for c in contacts if filter_by.lower()
-                        in str(c).lower()]
-            deals = [d for d in deals if filter_by.lower() in str(d).lower()]
-            tickets = [t for t in tickets if filter_by.lower()
-                       in str(t).lower()]
-
-        # Return the results in an object
-        crm_objects = {
-            "contacts": [contact.to_dict() for contact in contacts],
-            "deals": [deal.to_dict() for deal in deals],
-            "tickets": [ticket.to_dict() for ticket in tickets],
-        }
-
+        # Filters and sorts run in HubSpot's search API, not on the fetched page
+        query = SearchQuery.from_args(filter_by, sort_by)
+
+        # A cursor carries its own page number and the HubSpot cursor of each section
+        cursors = None
+        if cursor:
+            page, cursors = _decode_cursor(cursor)
+
+        fetchers = {}
+        prefetch = []
+        for name, service, get_recent in (
+                ("contacts", contact_service, contact_service.get_recent_contacts),
+                ("deals", deal_service, deal_service.get_recent_deals),
+                ("tickets", ticket_service, ticket_service.get_recent_tickets)):
+            if cursors is not None and name not in cursors:
+                # This section ran out of pages on an earlier page
+                fetchers[name] = lambda: ([], None)
+            else:
+                after = cursors.get(name) if cursors is not None else None
+                prefetch.append((service, page, page_size, after, query))
+                fetchers[name] = (lambda get_recent=get_recent, after=after:
+                                  get_recent(page, page_size, after, query))
+
+        # Read the cached pages of all sections in one Redis round trip
+        prefetch_pages(prefetch)
+
+        # Fetch the three object types concurrently, cache lookups included
+        sections, status = _fetch_sections(fetchers)
+
+        crm_objects = {}
+        next_cursors = {}
+        for name, section in sections.items():
+            objects, next_after = section if section else ([], None)
+            if next_after:
+                next_cursors[name] = next_after
+            elif status[name] != "ok":
+                # No cursor to follow, the next request resolves this section by page number
+                next_cursors[name] = None
+
+            # Only fields HubSpot cannot search on are filtered and sorted here
+            crm_objects[name] = query.apply_local(objects)
+
+        # Report per section so one failing object type does not hide the others
+        crm_objects["status"] = status
+        crm_objects["page"] = page
+        crm_objects["next_cursor"] = (
+            _encode_cursor(page + 1, next_cursors) if next_cursors else None)
+
+        if all(value == "busy" for value in status.values()):
+            return jsonify(crm_objects), 503
+        if "ok" not in status.values():
+            return jsonify(crm_objects), 502
         return jsonify(crm_objects), 200
     except ValueError as e:
         logger.error(f"Error retrieving new CRM objects: {e}")
         return jsonify({"Error": str(e)}), 400
+
+
+def _fetch_sections(fetchers):
+    # Run the fetches on the shared executor and wait at most CRM_FETCH_TIMEOUT overall
+    futures = {name: _submit_fetch(fetch) for name, fetch in fetchers.items()}
+    deadline = time.monotonic() + Config.CRM_FETCH_TIMEOUT
+
+    sections, status = {}, {}
+    for name, future in futures.items():
+        if future is None:
+            logger.error(f"Too many pending fetches, not retrieving {name}")
+            sections[name], status[name] = [], "busy"
+            continue
+        try:
+            sections[name] = future.result(timeout=max(deadline - time.monotonic(), 0))
+            status[name] = "ok"
+        except FetchTimeoutError:
+            # Drops the fetch if it has not started; a running one ends with its HubSpot timeouts
+            future.cancel()
+            logger.error(f"Timed out retrieving {name}")
+            sections[name], status[name] = [], "timeout"
+        except Exception as e:
+            logger.error(f"Error retrieving {name}: {e}")
+            sections[name], status[name] = [], "error"
+
+    return sections, status
+
+
+def _submit_fetch(fetch):
+    # None when CRM_FETCH_MAX_PENDING fetches are already queued or running
+    slots = fetch_slots
+    if not slots.acquire(blocking=False):
+        return None
+    try:
+        future = fetch_executor.submit(fetch)
+    except Exception:
+        slots.release()
+        raise
+    # Also called when the future is cancelled
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def _encode_cursor(page, cursors):
+    # Opaque to clients: the page number and the HubSpot 'after' cursor of each section
+    payload = json.dumps({"page": page, "after": cursors}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(payload["page"]), dict(payload["after"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+
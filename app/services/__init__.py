@@ -1,70 +1,441 @@
-import requests
-import time
+import abc
+import json
+import hashlib
 import logging
+from redis.exceptions import RedisError
 from app.config import Config
 from hubspot import HubSpot
 from app.redis.redis_client import RedisClient
+from app.redis.cursor_cache import CursorCache
+from app.redis.generations import GenerationCounter
+from app.redis.page_cache import PageCache
+from app.redis.codec import to_plain
+from app.services.token_manager import token_manager
+from app.services.transport import transport
 
 
 logger = logging.getLogger(__name__)
 
+# HubSpot accepts at most 100 inputs per batch call
+BATCH_SIZE = 100
+
+# Page cache, cursor cache and cache generations shared by the list endpoints of every service
+redis_client = RedisClient()
+page_cache = PageCache(redis_client)
+cursor_cache = CursorCache(redis_client)
+generations = GenerationCounter(redis_client)
+
 
 class HubSpotClient:
+    # Set by each service: the CRM object type and the SDK exception
+    object_type = None
+    api_exception = Exception
+    # Properties of listed objects, requested alike from the list, search and batch read APIs
+    list_properties = ()
+    # Top-level object fields and the properties the search API knows them by
+    search_fields = {
+        "id": "hs_object_id",
+        "created_at": "createdate",
+        "updated_at": "hs_lastmodifieddate",
+    }
+
     def __init__(self, access_token=None):
         self.base_url = "https://api.hubapi.com"
         self.client_id = Config.HUBSPOT_CLIENT_ID
         self.client_secret = Config.HUBSPOT_CLIENT_SECRET
         self.refresh_token = Config.HUBSPOT_REFRESH_TOKEN
         self.access_token = access_token
-        self.redis_client = RedisClient()
+        self.token_manager = token_manager
+        # All SDK API clients send through the process-wide connection pool
+        self._client = HubSpot(access_token=access_token,
+                               api_factory=transport.api_factory)
+
+    @property
+    def client(self):
+        """HubSpot SDK client carrying the current access token."""
+        self._client.access_token = self.get_access_token()
+        return self._client
 
     def get_access_token(self):
-        """Retrieve the access token from Redis or refresh if expired."""
-        # Check for the token in Redis
-        access_token_data = self.redis_client.get_token()
-
-        if access_token_data:
-            access_token, expires_in = access_token_data
-
-            logger.warning(f"Token retrieved successfully.")
-            if time.time() < expires_in:
-                return access_token
-            else:
-                # If expired, refresh the token
-                logger.warning(f"Token expired. Refreshing token.")
-                self.refresh_access_token()
-                return self.access_token
-        else:
-            # If token not found in Redis refresh it
-            logger.warning(f"Token not found. Refreshing token.")
-            self.refresh_access_token()
-            return self.access_token
+        """Retrieve the access token held in memory by the token manager."""
+        self.access_token = self.token_manager.get_token()
+        return self.access_token
 
     def refresh_access_token(self):
         """Refresh the access token"""
-        url = "https://api.hubapi.com/oauth/v1/token"
-        data = {
-            "grant_type": "refresh_token",
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "refresh_token": self.refresh_token
-        }
+        self.access_token = self.token_manager.refresh()
+        return self.access_token
+
+    def get_recent_objects(self, page=1, page_size=10, after=None, query=None):
+        """Return (objects, next_after) for a page, addressed by number or by HubSpot cursor.
+
+        A query with filters or a sort is run through the search API, the
+        plain listing through the list API.
+        """
+        search = None
+        if query is not None and not query.is_listing:
+            search = self._search_request(query)
+        listing = self._listing_name(search)
+
+        if after is None and page > 1:
+            found, after = self._find_page_cursor(listing, page, page_size, search)
+            if not found:
+                # The listing ends before this page
+                return [], None
+
+        return self._get_page(listing, page_size, after, page, search)
+
+    def invalidate_listings(self):
+        """Drop every cached page of this object type after objects were created"""
+        generations.bump(self.object_type)
+
+    def invalidate_objects(self, object_ids):
+        """Drop updated objects from the object cache.
+
+        Plain listings only hold ids, so they stay valid; searches may now
+        match differently and are dropped.
+        """
+        try:
+            redis_client.delete_cache(*[self._object_key(object_id) for object_id in object_ids])
+        except RedisError as e:
+            logger.error(f"Could not invalidate cached {self.object_type}: {str(e)}")
+        generations.bump(f"{self.object_type}_search")
+
+    def _search_request(self, query):
+        """Translate a SearchQuery into a HubSpot search request body"""
+        search = {}
+        filters = []
+        for name, operator, value in query.remote_filters:
+            search_filter = {
+                "propertyName": self.search_fields.get(name, name),
+                "operator": operator
+            }
+            if value is not None:
+                search_filter["value"] = value
+            filters.append(search_filter)
+
+        if filters:
+            search["filterGroups"] = [{"filters": filters}]
+        if query.text:
+            search["query"] = query.text
+        if query.remote_sort:
+            search["sorts"] = [{
+                "propertyName": self.search_fields.get(query.sort_by, query.sort_by),
+                "direction": "DESCENDING" if query.descending else "ASCENDING"
+            }]
+        return search
+
+    def _listing_name(self, search):
+        """Cache namespace of a listing: the object type and its generation, plus the search it runs"""
+        listing = f"{self.object_type}_g{generations.current(self.object_type)}"
+        if search is None:
+            return listing
+        search_generation = generations.current(f"{self.object_type}_search")
+        digest = hashlib.sha1(
+            json.dumps(search, sort_keys=True).encode()).hexdigest()[:16]
+        return f"{listing}_s{search_generation}_search_{digest}"
+
+    def _find_page_cursor(self, listing, page, page_size, search=None):
+        """Return (found, after) for page, walking forward from the nearest known cursor"""
+        known_page, after = cursor_cache.nearest(listing, page_size, page)
+
+        # Each page on the way stores the cursor of the next one, so this walk happens once
+        while known_page < page:
+            _, after, _ = self._get_page_ids(listing, page_size, after, known_page, search)
+            if not after:
+                return False, None
+            known_page += 1
+
+        return True, after
+
+    def _get_page(self, listing, page_size, after, page=None, search=None):
+        """Return (objects, next_after) for one page, from the page and object caches"""
+        ids, next_after, loaded = self._get_page_ids(listing, page_size, after, page, search)
+        if loaded is not None:
+            # This call fetched the page, its objects are at hand already
+            return loaded, next_after
+        return self._get_objects(ids), next_after
+
+    def _get_page_ids(self, listing, page_size, after, page=None, search=None):
+        """Return (ids, next_after, objects) for one page through the Redis page cache.
+
+        Pages are cached as lists of ids keyed by their cursor. objects is
+        set only when this call fetched the page from HubSpot.
+        """
+        cache_key = self._page_cache_key(listing, page_size, after)
+        loaded = {}
+
+        def fetch():
+            api = getattr(self.client.crm, self.object_type)
+            properties = list(self.list_properties)
+            try:
+                if search is None:
+                    response = api.basic_api.get_page(
+                        limit=page_size, after=after, properties=properties)
+                else:
+                    search_request = dict(search, limit=page_size, properties=properties)
+                    if after:
+                        search_request["after"] = after
+                    response = api.search_api.do_search(search_request)
+            except self.api_exception as e:
+                logger.error(
+                    f"Error fetching recent {self.object_type}. Status code: {e.status}, Response: {e.body}")
+                raise
+
+            # Converted once here, so cached and fresh pages are served the same way
+            objects = to_plain(response.results)
+            self._cache_objects(objects)
+            loaded["objects"] = objects
+            paging = response.paging
+            next_after = paging.next.after if paging and paging.next else None
+
+            if page is not None:
+                cursor_cache.store(listing, page_size, page + 1, next_after)
+            return {"ids": [obj["id"] for obj in objects], "next_after": next_after}
+
+        # Expired pages are served stale while one worker refreshes them
+        cached_page = page_cache.get(cache_key, fetch)
+        return cached_page["ids"], cached_page["next_after"], loaded.get("objects")
+
+    @staticmethod
+    def _page_cache_key(listing, page_size, after):
+        return f"{listing}_ids_{after or 'first'}_size_{page_size}"
+
+    def _object_key(self, object_id):
+        return f"{self.object_type}_object_{object_id}"
 
-        response = requests.post(url, data=data)
+    def _cache_objects(self, objects):
+        """Cache each object under its own key, shared by every page that lists it"""
+        if not objects:
+            return
+        try:
+            redis_client.mset_cache_values(
+                {self._object_key(obj["id"]): obj for obj in objects}, timeout=page_cache.hard_ttl)
+        except RedisError as e:
+            logger.warning(f"Could not cache {self.object_type}: {str(e)}")
 
-        if response.status_code == 200:
-            data = response.json()
-            new_access_token = data["access_token"]
-            expires_in = data["expires_in"]
+    def _get_objects(self, object_ids):
+        """Load objects by id: L1 cache, one Redis MGET, then HubSpot batch reads for the rest"""
+        try:
+            cached = redis_client.mget_cache_values(
+                [self._object_key(object_id) for object_id in object_ids])
+        except RedisError as e:
+            logger.warning(f"Object cache unavailable: {str(e)}")
+            cached = [None] * len(object_ids)
 
-            # Store the new token and expiration time in Redis
-            self.redis_client.set_token(new_access_token, expires_in)
+        objects = {object_id: obj for object_id, obj in zip(object_ids, cached) if obj is not None}
+        missing = [object_id for object_id in object_ids if object_id not in objects]
+        if missing:
+            fetched = self._batch_read(missing)
+            self._cache_objects(fetched)
+            objects.update((obj["id"], obj) for obj in fetched)
 
-            self.access_token = new_access_token
+        # Objects deleted in HubSpot since the page was cached are left out
+        return [objects[object_id] for object_id in object_ids if object_id in objects]
 
-            logger.info(
-                f"New request token generated. Status code: {response.status_code}, Response: {response.text}")
-        else:
+    def _batch_read(self, object_ids):
+        """Read objects by id, BATCH_SIZE per call"""
+        batch_api = getattr(self.client.crm, self.object_type).batch_api
+        objects = []
+        for start in range(0, len(object_ids), BATCH_SIZE):
+            try:
+                response = batch_api.read({
+                    "inputs": [{"id": object_id} for object_id in object_ids[start:start + BATCH_SIZE]],
+                    "properties": list(self.list_properties),
+                    "propertiesWithHistory": []
+                })
+            except self.api_exception as e:
+                logger.error(
+                    f"Error reading {self.object_type} batch. Status code: {e.status}, Response: {e.body}")
+                raise
+            objects.extend(to_plain(response.results))
+        return objects
+
+
+class BatchUpsertMixin(abc.ABC):
+    """Batch create or update for HubSpotClient services whose objects have a unique key"""
+    # Set by each service: the property batch upserts match on, the
+    # properties they write and the id index
+    key_property = None
+    batch_properties = ()
+    lookup_index = None
+
+    def batch_create_or_update(self, inputs):
+        """Create or update objects matched on key_property through HubSpot's batch APIs."""
+        results = [None] * len(inputs)
+
+        for start in range(0, len(inputs), BATCH_SIZE):
+            self._upsert_chunk(
+                range(start, min(start + BATCH_SIZE, len(inputs))), inputs, results)
+
+        if any(result and result["status"] == "created" for result in results):
+            self.invalidate_listings()
+        updated = [result["id"] for result in results if result and result["status"] == "updated"]
+        if updated:
+            self.invalidate_objects(updated)
+        return results
+
+    @abc.abstractmethod
+    def _resolve_ids(self, keys):
+        """Map the normalized keys of existing objects to their ids in a single call"""
+
+    def _upsert_chunk(self, indexes, inputs, results):
+        """Resolve and write one chunk with one lookup and at most two batch writes"""
+        object_name = self.object_type[:-1]
+        batch_api = getattr(self.client.crm, self.object_type).batch_api
+
+        # Group the chunk by normalized key, the last occurrence of a key wins
+        by_key = {}
+        for index in indexes:
+            item = inputs[index] if isinstance(inputs[index], dict) else {}
+            properties = item.get('properties')
+            if not isinstance(properties, dict):
+                properties = {}
+
+            key = properties.get(self.key_property)
+            if not key or not isinstance(key, str):
+                results[index] = {"index": index, "status": "error",
+                                  "error": f"{self.key_property} is required"}
+                continue
+
+            key = self.lookup_index.normalize(key)
+            entry = by_key.setdefault(key, {"key": key, "indexes": []})
+            entry["indexes"].append(index)
+            entry["properties"] = {
+                name: properties.get(name) for name in self.batch_properties
+                if properties.get(name) is not None
+            }
+
+        if not by_key:
+            return
+
+        # Only keys the index does not know yet need a HubSpot lookup
+        existing = {key: object_id for key, (known, object_id)
+                    in self.lookup_index.lookup_many(by_key).items() if object_id}
+        unresolved = [key for key in by_key if key not in existing]
+
+        try:
+            if unresolved:
+                existing.update(self._resolve_ids(unresolved))
+        except self.api_exception as e:
             logger.error(
-                f"Token refresh failed for. Retrying token refresh.")
-            raise Exception(f"Failed to refresh token: {response.text}")
+                f"Failed to look up {object_name} batch. Status code: {e.status}, Response: {e.body}")
+            self._set_chunk_error(by_key.values(), results, e)
+            return
+
+        to_create = {key: entry for key, entry in by_key.items() if key not in existing}
+        to_update = {key: entry for key, entry in by_key.items() if key in existing}
+
+        if to_create:
+            try:
+                response = batch_api.create({
+                    "inputs": [{"properties": entry["properties"]}
+                               for entry in to_create.values()]
+                })
+                created = {}
+                for obj in response.results:
+                    key = self.lookup_index.normalize(obj.properties.get(self.key_property) or '')
+                    if key in to_create:
+                        created[key] = obj.id
+                        self._set_chunk_result(to_create.pop(key), results, "created", obj.id)
+                self.lookup_index.set_many(created)
+                logger.info(
+                    "Successfully created %d %s in batch", len(response.results), self.object_type)
+            except self.api_exception as e:
+                logger.error(
+                    f"Failed to create {object_name} batch. Status code: {e.status}, Response: {e.body}")
+                self._set_chunk_error(to_create.values(), results, e)
+                to_create = {}
+
+            # Anything HubSpot did not echo back was not created
+            for entry in to_create.values():
+                self._set_chunk_result(entry, results, "error", None,
+                                       error=f"{object_name.capitalize()} was not created")
+
+        if to_update:
+            # Keys resolving to one object (two emails of a contact, a stale index
+            # entry) would write it twice; the last of them is written, the others fail
+            ids = {}
+            for key in list(to_update):
+                duplicate = ids.get(existing[key])
+                if duplicate is not None:
+                    self._set_chunk_result(
+                        to_update.pop(duplicate), results, "error", existing[key],
+                        error=f"{object_name.capitalize()} is also matched by {key}")
+                ids[existing[key]] = key
+            try:
+                response = batch_api.update({
+                    "inputs": [{"id": existing[key], "properties": entry["properties"]}
+                               for key, entry in to_update.items()]
+                })
+                for obj in response.results:
+                    key = ids.pop(obj.id, None)
+                    if key is not None:
+                        self._set_chunk_result(to_update[key], results, "updated", obj.id)
+                logger.info(
+                    "Successfully updated %d %s in batch", len(response.results), self.object_type)
+            except self.api_exception as e:
+                logger.error(
+                    f"Failed to update {object_name} batch. Status code: {e.status}, Response: {e.body}")
+                self._set_chunk_error(to_update.values(), results, e)
+                # Ids may have come from a stale index, resolve them again next time
+                for key in to_update:
+                    self.lookup_index.delete(key)
+                ids = {}
+
+            for object_id, key in ids.items():
+                self._set_chunk_result(to_update[key], results, "error", object_id,
+                                       error=f"{object_name.capitalize()} was not updated")
+
+    def _set_chunk_result(self, entry, results, status, object_id, error=None):
+        for index in entry["indexes"]:
+            result = {"index": index, "status": status,
+                      "id": object_id, self.key_property: entry["key"]}
+            if error:
+                result["error"] = error
+            results[index] = result
+
+    def _set_chunk_error(self, entries, results, e):
+        for entry in entries:
+            for index in entry["indexes"]:
+                results[index] = {"index": index, "status": "error",
+                                  self.key_property: entry["key"],
+                                  "error": e.body or str(e), "status_code": e.status}
+
+
+def prefetch_pages(requests):
+    """Load the cache entries of several list requests into the L1 cache.
+
+    requests holds (service, page, page_size, after, query) tuples. The
+    generations, the pages and their objects are each read with a single
+    round trip, so the requests themselves are then served from memory.
+    Pages whose cursor is not known yet are left to the requests.
+    """
+    if redis_client.local_cache is None or not requests:
+        return
+
+    object_types = {service.object_type for service, *_ in requests}
+    generations.current_many(
+        list(object_types) + [f"{object_type}_search" for object_type in object_types])
+
+    page_keys = {}
+    for service, page, page_size, after, query in requests:
+        if after is None and page > 1:
+            continue
+        search = None
+        if query is not None and not query.is_listing:
+            search = service._search_request(query)
+        page_keys[service._page_cache_key(service._listing_name(search), page_size, after)] = service
+
+    try:
+        # All pages in one round trip, then all of their objects in another
+        entries = redis_client.mget_cache_values(list(page_keys))
+        object_keys = []
+        for service, entry in zip(page_keys.values(), entries):
+            if isinstance(entry, dict) and isinstance(entry.get("value"), dict):
+                object_keys.extend(
+                    service._object_key(object_id) for object_id in entry["value"].get("ids", []))
+        if object_keys:
+            redis_client.mget_cache_values(object_keys)
+    except RedisError as e:
+        logger.warning(f"Could not prefetch cached pages: {str(e)}")
@@ -1,64 +1,98 @@
-from hubspot import HubSpot
 from hubspot.crm.contacts import ApiException
-from app.services import HubSpotClient
-from app.redis.redis_client import RedisClient
+from app.services import HubSpotClient, BatchUpsertMixin, redis_client
+from app.redis.lookup_index import LookupIndex
 from app.config import Config
 import time
-import json
 import logging
 
 logger = logging.getLogger(__name__)
-redis_client = RedisClient()
+contact_index = LookupIndex(redis_client, "contact_email")
+
+CONTACT_PROPERTIES = ("email", "firstname", "lastname", "phone")
+
+class ContactService(BatchUpsertMixin, HubSpotClient):
+    object_type = "contacts"
+    key_property = "email"
+    batch_properties = CONTACT_PROPERTIES
+    lookup_index = contact_index
+    api_exception = ApiException
+    # Contacts keep their modification time in lastmodifieddate
+    search_fields = dict(HubSpotClient.search_fields, updated_at="lastmodifieddate")
+    list_properties = CONTACT_PROPERTIES + ("createdate", "lastmodifieddate")
 
-class ContactService(HubSpotClient):
     def __init__(self):
-        # Initialize with OAuth access token
+        # The OAuth access token is attached by HubSpotClient on each use
         super().__init__()
-        access_token = self.get_access_token()
-        self.client = HubSpot(access_token=access_token)
 
     def create_or_update_contact(self, data):
         """Create or update a contact."""
         email = data['properties']['email']
 
-        contact_exists = self._get_contact_by_email(email)
-
-        if contact_exists:
+        try:
+            return self._create_or_update_contact(
+                email, data, self._get_contact_by_email(email))
+        except ApiException as e:
+            # The index was out of date: the contact was deleted, merged or created elsewhere
+            if e.status not in (404, 409):
+                raise
+            logger.warning(
+                f"Contact index out of date for email {email}. Retrying with search.")
+            contact_index.delete(email)
+            contact = self._search_contact_by_email(email)
+            return self._create_or_update_contact(
+                email, data, contact.id if contact else None)
+
+    def _create_or_update_contact(self, email, data, contact_id):
+        if contact_id:
             # If contact exists, update
             logger.info(
-                f"Contact with email {email} exists. Updating contact.")
+                "Contact with email %s exists. Updating contact.", email)
 
-            return self._update_contact(contact_exists.id, data)
+            return self._update_contact(contact_id, data)
         else:
             # If contact does not exist, create a new one
             logger.info(
-                f"Contact with email {email} does not exist. Creating a new contact.")
+                "Contact with email %s does not exist. Creating a new contact.", email)
             return self._create_contact(data)
 
     def _get_contact_by_email(self, email):
-        """Check if the contact exists by email and return the contact if found."""
+        """Return the id of the contact with this email, or None if there is none."""
+        # The index answers most lookups without touching the rate-limited search API
+        known, contact_id = contact_index.lookup(email)
+        if known:
+            return contact_id
+
         try:
-            # Search API to find a contact by email
-            filter = {
-                "filters": [
-                    {
-                        "propertyName": "email",
-                        "operator": "EQ",
-                        "value": email
-                    }
-                ]
-            }
-            response = self.client.crm.contacts.search_api.do_search(filter)
-            if response.results:
-                # Return the first result
-                contact = response.results[0]
-                return contact
-            return None
+            contact = self._search_contact_by_email(email)
         except ApiException as e:
             logger.error(
                 f"Error fetching contact by email {email}. Status code: {e.status}, Response: {e.body}")
             return None
 
+        if contact:
+            contact_index.set(email, contact.id)
+            return contact.id
+
+        contact_index.set_missing(email)
+        return None
+
+    def _search_contact_by_email(self, email):
+        """Find a contact by email through the search API."""
+        filter = {
+            "filters": [
+                {
+                    "propertyName": "email",
+                    "operator": "EQ",
+                    "value": email
+                }
+            ]
+        }
+        response = self.client.crm.contacts.search_api.do_search(filter)
+        if response.results:
+            # Return the first result
+            return response.results[0]
+        return None
+
     def _create_contact(self, data):
         """Create a new contact."""
         contact_data = {
@@ -72,9 +106,11 @@ class ContactService(HubSpotClient):
         try:
             # Create a contact
             response = self.client.crm.contacts.basic_api.create(contact_data)
+            contact_index.set(data['properties']['email'], response.id)
+            self.invalidate_listings()
             logger.info(
-                f"Successfully created contact with email {data['properties']['email']}")
-            return response
+                "Successfully created contact with email %s", data['properties']['email'])
+            return response.to_dict()
         except ApiException as e:
             logger.error(
                 f"Failed to create contact. Status code: {e.status}, Response: {e.body}")
@@ -94,36 +130,37 @@ class ContactService(HubSpotClient):
             # Update the contact
             response = self.client.crm.contacts.basic_api.update(
                 contact_id, contact_data)
+            contact_index.set(data['properties']['email'], response.id)
+            self.invalidate_objects([response.id])
             logger.info(
-                f"Successfully updated contact with email {data['properties']['email']}")
+                "Successfully updated contact with email %s", data['properties']['email'])
             return response.to_dict()
         except ApiException as e:
             logger.error(
                 f"Failed to update contact. Status code: {e.status}, Response: {e.body}")
             raise
 
-    def get_recent_contacts(self, page, page_size):
-        """Retrieve recently created contacts with Redis caching."""
-        cache_key = f"contacts_page_{page}_size_{page_size}"
-        cached_data = redis_client.get_cache(cache_key)
-
-        if cached_data:
-            return json.loads(cached_data)
-
-        # If not cached fetch from HubSpot and cache the result
-        try:
-            response = self.client.crm.contacts.basic_api.get_page(
-                limit=page_size, after=page * page_size)
-            contacts = response.results
-
-            # Cache the response
-            redis_client.set_cache(cache_key, json.dumps(contacts))
+    def batch_create_or_update_contacts(self, inputs):
+        """Create or update many contacts, matched on email, through HubSpot's batch APIs."""
+        return self.batch_create_or_update(inputs)
+
+    def _resolve_ids(self, emails):
+        """Map each existing email to its contact id in a single batch read"""
+        response = self.client.crm.contacts.batch_api.read({
+            "idProperty": "email",
+            "inputs": [{"id": email} for email in emails],
+            "properties": ["email"]
+        })
+        existing = {
+            contact_index.normalize(contact.properties.get('email') or ''): contact.id
+            for contact in response.results
+        }
+        contact_index.set_many(existing)
+        return existing
 
-            return contacts
-        except ApiException as e:
-            logger.error(
-                f"Error fetching recent contacts. Status code: {e.status}, Response: {e.body}")
-            return []
+    def get_recent_contacts(self, page, page_size, after=None, query=None):
+        """Retrieve recently created contacts and the cursor of the next page, with Redis caching."""
+        return self.get_recent_objects(page, page_size, after, query)
 
     def handle_rate_limit(self, response):
         """Handle rate limits using exponential backoff."""
@@ -0,0 +1,127 @@
+import re
+
+
+# Filter operators of the HubSpot search API
+OPERATORS = {
+    "EQ", "NEQ", "LT", "LTE", "GT", "GTE",
+    "CONTAINS_TOKEN", "NOT_CONTAINS_TOKEN", "HAS_PROPERTY", "NOT_HAS_PROPERTY",
+}
+VALUELESS_OPERATORS = {"HAS_PROPERTY", "NOT_HAS_PROPERTY"}
+
+# Fields of the object itself rather than CRM properties; HubSpot cannot search on them
+LOCAL_FIELDS = {"archived", "archived_at"}
+
+# The order the list API already returns objects in
+DEFAULT_SORT = "id"
+
+PROPERTY_NAME = re.compile(r"^[A-Za-z0-9_]+$")
+
+
+class SearchQuery:
+    """filter_by / sort_by of a list request.
+
+    Filters and sorts on CRM properties are sent to the HubSpot search API;
+    only the object's own fields in LOCAL_FIELDS are applied to the fetched
+    page in Python.
+    """
+
+    def __init__(self, filters=(), text="", sort_by=DEFAULT_SORT, descending=False):
+        self.filters = list(filters)
+        self.text = text
+        self.sort_by = sort_by
+        self.descending = descending
+
+    @classmethod
+    def from_args(cls, filter_terms, sort_by=None):
+        """Parse 'property:OPERATOR[:value]' filter terms and a '-'-prefixed sort_by.
+
+        Terms without a known operator are joined into a free text query.
+        """
+        filters, text = [], []
+        for term in filter_terms:
+            parts = term.split(":", 2)
+            if len(parts) < 2 or parts[1].upper() not in OPERATORS:
+                if term.strip():
+                    text.append(term.strip())
+                continue
+
+            name, operator = parts[0].strip(), parts[1].upper()
+            if not PROPERTY_NAME.match(name):
+                raise ValueError(f"Invalid filter property: {name}")
+            if operator in VALUELESS_OPERATORS:
+                value = None
+            elif len(parts) < 3 or parts[2] == "":
+                raise ValueError(f"Filter {name}:{operator} needs a value")
+            else:
+                value = parts[2]
+            filters.append((name, operator, value))
+
+        sort_by = (sort_by or DEFAULT_SORT).strip()
+        descending = sort_by.startswith("-")
+        sort_by = sort_by.lstrip("-")
+        if not PROPERTY_NAME.match(sort_by):
+            raise ValueError(f"Invalid sort property: {sort_by}")
+
+        return cls(filters, " ".join(text), sort_by, descending)
+
+    @property
+    def remote_filters(self):
+        return [f for f in self.filters if f[0] not in LOCAL_FIELDS]
+
+    @property
+    def local_filters(self):
+        return [f for f in self.filters if f[0] in LOCAL_FIELDS]
+
+    @property
+    def remote_sort(self):
+        return self.sort_by not in LOCAL_FIELDS
+
+    @property
+    def is_listing(self):
+        """True when the plain list API returns exactly this page"""
+        return (not self.remote_filters and not self.text
+                and (self.sort_by == DEFAULT_SORT or not self.remote_sort)
+                and not self.descending)
+
+    def apply_local(self, objects):
+        """Apply the filters and sort HubSpot could not, to a page of object dicts"""
+        for name, operator, value in self.local_filters:
+            objects = [o for o in objects if _matches(o.get(name), operator, value)]
+
+        if not self.remote_sort:
+            # None sorts last either way
+            present = [o for o in objects if o.get(self.sort_by) is not None]
+            missing = [o for o in objects if o.get(self.sort_by) is None]
+            present.sort(key=lambda o: o[self.sort_by], reverse=self.descending)
+            objects = present + missing
+
+        return objects
+
+
+def _matches(actual, operator, value):
+    if operator == "HAS_PROPERTY":
+        return actual is not None
+    if operator == "NOT_HAS_PROPERTY":
+        return actual is None
+    if actual is None:
+        return operator in ("NEQ", "NOT_CONTAINS_TOKEN")
+
+    actual, value = str(actual).lower(), value.lower()
+    if operator == "EQ":
+        return actual == value
+    if operator == "NEQ":
+        return actual != value
+    if operator == "CONTAINS_TOKEN":
+        return value in actual
+    if operator == "NOT_CONTAINS_TOKEN":
+        return value not in actual
+
+    # Range operators compare numerically when both sides are numbers
+    try:
+        actual, value = float(actual), float(value)
+    except ValueError:
+        pass
+    return {
+        "LT": actual < value, "LTE": actual <= value,
+        "GT": actual > value, "GTE": actual >= value,
+    }[operator]
@@ -1,37 +1,116 @@
-from hubspot import HubSpot
 from hubspot.crm.deals import ApiException
-from app.services import HubSpotClient
-from app.redis.redis_client import RedisClient
+from app.services import HubSpotClient, BatchUpsertMixin, BATCH_SIZE, redis_client
+from app.redis.lookup_index import LookupIndex
 from app.config import Config
 import logging
-import json
 
 logger = logging.getLogger(__name__)
-redis_client = RedisClient()
+deal_index = LookupIndex(redis_client, "deal_name")
 
+DEAL_PROPERTIES = ("dealname", "amount", "dealstage", "contact_id")
+
+
+class DealService(BatchUpsertMixin, HubSpotClient):
+    object_type = "deals"
+    key_property = "dealname"
+    batch_properties = DEAL_PROPERTIES
+    lookup_index = deal_index
+    api_exception = ApiException
+    list_properties = DEAL_PROPERTIES + (
+        "pipeline", "closedate", "createdate", "hs_lastmodifieddate")
 
-class DealService(HubSpotClient):
     def __init__(self):
-        # Initialize HubSpot client with OAuth access token
+        # The OAuth access token is attached by HubSpotClient on each use
         super().__init__()
-        self.client = HubSpot(access_token=self.access_token)
 
     def create_or_update_deal(self, data):
         """Create or update a deal in HubSpot."""
         deal_name = data['properties']['dealname']
-        existing_deals = self.search_deals(deal_name)
 
-        if existing_deals:
+        try:
+            return self._create_or_update_deal(
+                deal_name, data, self._get_deal_id_by_name(deal_name))
+        except ApiException as e:
+            # The indexed deal was deleted or merged in HubSpot
+            if e.status != 404:
+                raise
+            logger.warning(
+                f"Deal index out of date for name {deal_name}. Retrying with search.")
+            deal_index.delete(deal_name)
+            existing_deal = self.search_deals(deal_name)
+            return self._create_or_update_deal(
+                deal_name, data, existing_deal.id if existing_deal else None)
+
+    def _create_or_update_deal(self, deal_name, data, deal_id):
+        if deal_id:
             # If deal exists, update
-            logger.info(f"Deal with name {deal_name} exists. Updating deal.")
-            deal_id = existing_deals.id
+            logger.info("Deal with name %s exists. Updating deal.", deal_name)
             return self._update_deal(deal_id, data)
         else:
             # If no deal exists, create new one
             logger.info(
-                f"Deal with name {deal_name} does not exist. Creating a new deal.")
+                "Deal with name %s does not exist. Creating a new deal.", deal_name)
             return self._create_deal(data)
 
+    def _get_deal_id_by_name(self, deal_name):
+        """Return the id of the deal with this name, or None if there is none."""
+        known, deal_id = deal_index.lookup(deal_name)
+        if known:
+            return deal_id
+
+        try:
+            existing_deal = self._search_deal_by_name(deal_name)
+        except ApiException as e:
+            logger.error(
+                f"Error fetching deal with name {deal_name}. Status code: {e.status}, Response: {e.body}")
+            return None
+
+        if existing_deal:
+            deal_index.set(deal_name, existing_deal.id)
+            return existing_deal.id
+
+        deal_index.set_missing(deal_name)
+        return None
+
+    def batch_create_or_update_deals(self, inputs):
+        """Create or update many deals, matched on dealname, through HubSpot's batch APIs."""
+        return self.batch_create_or_update(inputs)
+
+    def _resolve_ids(self, deal_names):
+        """Find the existing deals for a chunk of names with one IN search"""
+        # deal_names are already lowercased, which HubSpot expects for IN on strings
+        existing = {}
+        search_request = {
+            "filterGroups": [
+                {
+                    "filters": [
+                        {
+                            "propertyName": "dealname",
+                            "operator": "IN",
+                            "values": deal_names
+                        }
+                    ]
+                }
+            ],
+            "properties": ["dealname"],
+            "limit": BATCH_SIZE
+        }
+
+        while True:
+            response = self.client.crm.deals.search_api.do_search(search_request)
+            for deal in response.results:
+                existing.setdefault(
+                    deal_index.normalize(deal.properties.get('dealname') or ''), deal.id)
+
+            # Duplicate names can spill the matches over more than one page
+            paging = response.paging
+            if not (paging and paging.next and paging.next.after):
+                break
+            search_request["after"] = paging.next.after
+
+        deal_index.set_many(existing)
+        return existing
+
     def _create_deal(self, data):
         """Create a new deal in HubSpot."""
         deal_data = {
@@ -45,8 +124,10 @@ class DealService(HubSpotClient):
 
         try:
             response = self.client.crm.deals.basic_api.create(deal_data)
+            deal_index.set(data['properties']['dealname'], response.id)
+            self.invalidate_listings()
             logger.info(
-                f"Successfully created deal with name {data['properties']['dealname']}")
+                "Successfully created deal with name %s", data['properties']['dealname'])
             return response.to_dict()
         except ApiException as e:
             logger.error(
@@ -54,11 +135,6 @@ class DealService(HubSpotClient):
             raise
 
     def _update_deal(self, deal_id, data):
-        print(
-            "\nAbout to update deal\n",
-            data
-        )
-
         """Update an existing deal in HubSpot."""
         deal_data = {
             "properties": {
@@ -71,8 +147,10 @@ class DealService(HubSpotClient):
         try:
             response = self.client.crm.deals.basic_api.update(
                 deal_id, deal_data)
+            deal_index.set(data['properties']['dealname'], response.id)
+            self.invalidate_objects([response.id])
             logger.info(
-                f"Successfully updated deal with name {data['properties']['dealname']}")
+                "Successfully updated deal with name %s", data['properties']['dealname'])
             return response.to_dict()
         except ApiException as e:
             logger.error(
@@ -82,45 +160,28 @@ class DealService(HubSpotClient):
     def search_deals(self, deal_name):
         """Search API to find an existing deal by name."""
         try:
-            filter = {
-                "filters": [
-                    {
-                        "propertyName": "dealname",
-                        "operator": "EQ",
-                        "value": deal_name
-                    }
-                ]
-            }
-            response = self.client.crm.deals.search_api.do_search(filter)
-            if response.results:
-                # Return the first result
-                deal = response.results[0]
-                return deal
-            return None
+            return self._search_deal_by_name(deal_name)
         except ApiException as e:
             logger.error(
                 f"Error fetching deal with name {deal_name}. Status code: {e.status}, Response: {e.body}")
             return None
 
-    def get_recent_deals(self, page, page_size):
-        """Retrieve recently created deals with Redis caching."""
-        cache_key = f"deals_page_{page}_size_{page_size}"
-        cached_data = redis_client.get_cache(cache_key)
-
-        if cached_data:
-            return json.loads(cached_data)
-
-        # If not cached fetch from HubSpot and cache the result
-        try:
-            response = self.client.crm.deals.basic_api.get_page(
-                limit=page_size, after=page * page_size)
-            deals = response.results
-
-            # Cache the response
-            redis_client.set_cache(cache_key, json.dumps(deals))
+    def _search_deal_by_name(self, deal_name):
+        filter = {
+            "filters": [
+                {
+                    "propertyName": "dealname",
+                    "operator": "EQ",
+                    "value": deal_name
+                }
+            ]
+        }
+        response = self.client.crm.deals.search_api.do_search(filter)
+        if response.results:
+            # Return the first result
+            return response.results[0]
+        return None
 
-            return deals
-        except ApiException as e:
-            logger.error(
-                f"Error fetching recent deals. Status code: {e.status}, Response: {e.body}")
-            return []
+    def get_recent_deals(self, page, page_size, after=None, query=None):
+        """Retrieve recently created deals and the cursor of the next page, with Redis caching."""
+        return self.get_recent_objects(page, page_size, after, query)
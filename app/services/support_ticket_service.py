@@ -1,20 +1,21 @@
-from hubspot import HubSpot
 from hubspot.crm.tickets import ApiException
 from app.services import HubSpotClient
-from app.redis.redis_client import RedisClient
 from app.config import Config
 import logging
-import json
 
 logger = logging.getLogger(__name__)
-redis_client = RedisClient()
 
 
 class SupportTicketService(HubSpotClient):
+    object_type = "tickets"
+    api_exception = ApiException
+    list_properties = (
+        "subject", "content", "hs_pipeline", "hs_pipeline_stage", "hs_ticket_priority",
+        "hs_ticket_category", "createdate", "hs_lastmodifieddate")
+
     def __init__(self):
-        # Initialize HubSpot client with OAuth access token
+        # The OAuth access token is attached by HubSpotClient on each use
         super().__init__()
-        self.client = HubSpot(access_token=self.access_token)
 
     def create_ticket(self, data):
         """Create a new support ticket in HubSpot."""
@@ -67,7 +68,8 @@ class SupportTicketService(HubSpotClient):
 
         try:
             response = self.client.crm.tickets.basic_api.create(ticket_data)
-            logger.info(f"Ticket created successfully: {response}")
+            self.invalidate_listings()
+            logger.info("Ticket created successfully: %s", response)
             return response.to_dict()
         except ApiException as e:
             logger.error(
@@ -75,25 +77,6 @@ class SupportTicketService(HubSpotClient):
             return {"error": "Ticket creation failed", "status_code": e.status, "response": e.body}
 
 
-    def get_recent_tickets(self, page, page_size):
-        """Retrieve recently created tickets with Redis caching."""
-        cache_key = f"tickets_page_{page}_size_{page_size}"
-        cached_data = redis_client.get_cache(cache_key)
-
-        if cached_data:
-            return json.loads(cached_data)
-
-        # If not cached, fetch from HubSpot and cache the result
-        try:
-            response = self.client.crm.tickets.basic_api.get_page(
-                limit=page_size, after=page * page_size)
-            tickets = response.results
-
-            # Cache the response
-            redis_client.set_cache(cache_key, json.dumps(tickets))
-
-            return tickets
-        except ApiException as e:
-            logger.error(
-                f"Error fetching recent tickets. Status code: {e.status}, Response: {e.body}")
-            return []
+    def get_recent_tickets(self, page, page_size, after=None, query=None):
+        """Retrieve recently created tickets and the cursor of the next page, with Redis caching."""
+        return self.get_recent_objects(page, page_size, after, query)
@@ -0,0 +1,176 @@
+import os
+import time
+import logging
+import threading
+from redis.exceptions import LockError
+from app.config import Config
+from app.redis.redis_client import RedisClient
+from app.services.transport import transport
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_URL = "https://api.hubapi.com/oauth/v1/token"
+TOKEN_LOCK_KEY = "hubspot_token_lock"
+
+# Pause between background attempts after a failed refresh
+RETRY_DELAY = 5
+
+
+class TokenRefreshError(Exception):
+    """Raised when no valid HubSpot access token could be obtained"""
+
+
+class TokenManager:
+    """Process-wide holder of the HubSpot OAuth access token.
+
+    The token is served from memory. Shortly before it expires a background
+    thread refreshes it, and a Redis lock makes sure only one worker in the
+    whole cluster calls the HubSpot token endpoint while the others reuse
+    the token it stores in Redis.
+    """
+
+    def __init__(self, redis_client,
+                 refresh_margin=Config.HUBSPOT_TOKEN_REFRESH_MARGIN,
+                 lock_timeout=Config.HUBSPOT_TOKEN_LOCK_TIMEOUT,
+                 wait_timeout=Config.HUBSPOT_TOKEN_WAIT_TIMEOUT):
+        self.redis_client = redis_client
+        self.refresh_margin = refresh_margin
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+
+        self._token = None
+        self._expiration_time = 0
+        self._next_attempt = 0
+        self._reset_process_state()
+
+    def _reset_process_state(self):
+        """Locks and timers do not survive a fork, so each process builds its own"""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._timer_lock = threading.Lock()
+        self._timer = None
+
+    def get_token(self):
+        """Return a valid access token, loading or refreshing it if needed."""
+        if self._pid != os.getpid():
+            self._reset_process_state()
+
+        now = time.time()
+        if self._token and now < self._expiration_time:
+            # Close to expiry: keep serving the token and refresh it off the request path
+            if now >= self._expiration_time - self.refresh_margin and now >= self._next_attempt:
+                self._schedule_refresh(0)
+            return self._token
+
+        with self._lock:
+            # Another thread may have loaded the token while we waited
+            if self._token and time.time() < self._expiration_time:
+                return self._token
+            self._load()
+            return self._token
+
+    def refresh(self):
+        """Force a new token, e.g. after HubSpot rejected the current one."""
+        with self._lock:
+            self._load(rejected_token=self._token)
+            return self._token
+
+    def _load(self, rejected_token=None):
+        """Adopt the shared token from Redis or refresh it under the cluster lock"""
+        if rejected_token is None and self._adopt_shared_token():
+            return
+
+        lock = self.redis_client.lock(
+            TOKEN_LOCK_KEY, timeout=self.lock_timeout, blocking_timeout=self.wait_timeout)
+        acquired = lock.acquire()
+        try:
+            # The previous lock holder has most likely stored a fresh token already
+            if self._adopt_shared_token(rejected_token=rejected_token):
+                return
+
+            if not acquired:
+                # Fall back to any token that is still valid, even if close to expiry
+                if rejected_token is None and self._adopt_shared_token(margin=0):
+                    return
+                raise TokenRefreshError(
+                    "Timed out waiting for another worker to refresh the HubSpot token")
+
+            access_token, expires_in = self._request_token()
+            self.redis_client.set_token(access_token, expires_in)
+            self._set_token(access_token, time.time() + expires_in)
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except LockError:
+                    # The lock expired while refreshing, nothing left to release
+                    pass
+
+    def _adopt_shared_token(self, rejected_token=None, margin=None):
+        """Use the token stored in Redis if it is fresh enough"""
+        margin = self.refresh_margin if margin is None else margin
+        token_data = self.redis_client.get_token()
+        if not token_data:
+            return False
+
+        access_token, expiration_time = token_data
+        if access_token == rejected_token or time.time() >= expiration_time - margin:
+            return False
+
+        self._set_token(access_token, expiration_time)
+        return True
+
+    def _set_token(self, access_token, expiration_time):
+        self._token = access_token
+        self._expiration_time = expiration_time
+        self._next_attempt = 0
+        delay = expiration_time - self.refresh_margin - time.time()
+        self._schedule_refresh(max(delay, RETRY_DELAY), replace=True)
+
+    def _schedule_refresh(self, delay, replace=False):
+        """Start the background refresh timer unless one is already pending"""
+        with self._timer_lock:
+            if self._timer is not None and self._timer.is_alive():
+                if not replace:
+                    return
+                self._timer.cancel()
+
+            self._timer = threading.Timer(max(delay, 0), self._background_refresh)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _background_refresh(self):
+        try:
+            with self._lock:
+                if time.time() < self._expiration_time - self.refresh_margin:
+                    return
+                self._load()
+        except Exception as e:
+            self._next_attempt = time.time() + RETRY_DELAY
+            logger.error(f"Background HubSpot token refresh failed: {str(e)}")
+
+    def _request_token(self):
+        """Exchange the refresh token for a new access token"""
+        data = {
+            "grant_type": "refresh_token",
+            "client_id": Config.HUBSPOT_CLIENT_ID,
+            "client_secret": Config.HUBSPOT_CLIENT_SECRET,
+            "refresh_token": Config.HUBSPOT_REFRESH_TOKEN
+        }
+
+        response = transport.session.post(
+            TOKEN_URL, data=data, timeout=transport.timeout)
+
+        if response.status_code != 200:
+            logger.error(
+                f"Token refresh failed. Status code: {response.status_code}")
+            raise TokenRefreshError(f"Failed to refresh token: {response.text}")
+
+        data = response.json()
+        logger.info("New HubSpot access token generated.")
+        return data["access_token"], data["expires_in"]
+
+
+# Shared by every service in this process
+token_manager = TokenManager(RedisClient())
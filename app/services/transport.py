@@ -0,0 +1,173 @@
+import os
+import socket
+import functools
+import threading
+import certifi
+import urllib3
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from hubspot.discovery.discovery_base import DiscoveryBase
+from app.config import Config
+
+
+class _SharedPoolAdapter(HTTPAdapter):
+    """requests adapter that sends through the transport's pool manager"""
+
+    def __init__(self, transport):
+        self.transport = transport
+        super().__init__()
+
+    def init_poolmanager(self, *args, **kwargs):
+        # Called while the transport is building its pools, so no property access here
+        self.poolmanager = self.transport._pool_manager
+
+    def send(self, request, **kwargs):
+        # Pick up the pool manager rebuilt after a fork
+        self.poolmanager = self.transport.pool_manager
+        return super().send(request, **kwargs)
+
+
+class HubSpotTransport:
+    """Process-wide pooled, keep-alive HTTP transport for HubSpot calls.
+
+    The token refresh (through requests) and every SDK API client (through
+    urllib3) share one PoolManager, so TLS connections to api.hubapi.com
+    are reused instead of being opened per API object.
+    """
+
+    def __init__(self, num_pools=Config.HUBSPOT_HTTP_NUM_POOLS,
+                 maxsize=Config.HUBSPOT_HTTP_POOL_MAXSIZE,
+                 block=Config.HUBSPOT_HTTP_POOL_BLOCK,
+                 keepalive=Config.HUBSPOT_HTTP_KEEPALIVE,
+                 connect_timeout=Config.HUBSPOT_HTTP_CONNECT_TIMEOUT,
+                 read_timeout=Config.HUBSPOT_HTTP_READ_TIMEOUT):
+        self.num_pools = num_pools
+        self.maxsize = maxsize
+        self.block = block
+        self.keepalive = keepalive
+        self.timeout = (connect_timeout, read_timeout)
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._pool_manager = None
+        self._proxy_managers = {}
+        self._session = None
+
+    @property
+    def pool_manager(self):
+        """Pool manager owned by the current process"""
+        self._ensure_built()
+        return self._pool_manager
+
+    def proxy_manager(self, proxy_url, proxy_headers=None):
+        """Pool manager of the current process sending through proxy_url"""
+        self._ensure_built()
+        with self._lock:
+            manager = self._proxy_managers.get(proxy_url)
+            if manager is None:
+                manager = urllib3.ProxyManager(
+                    proxy_url, proxy_headers=proxy_headers, **self._pool_kwargs())
+                self._proxy_managers[proxy_url] = manager
+            return manager
+
+    def _ensure_built(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._build()
+
+    def _pool_kwargs(self):
+        socket_options = list(HTTPConnection.default_socket_options)
+        if self.keepalive:
+            socket_options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+
+        return {
+            "num_pools": self.num_pools,
+            "maxsize": self.maxsize,
+            "block": self.block,
+            "timeout": urllib3.Timeout(connect=self.timeout[0], read=self.timeout[1]),
+            "socket_options": socket_options,
+            # The SDK's own pool managers verify certificates, so the shared ones do too
+            "cert_reqs": "CERT_REQUIRED",
+            "ca_certs": certifi.where(),
+        }
+
+    @property
+    def session(self):
+        """requests session sending through the shared pool"""
+        self._ensure_built()
+        return self._session
+
+    def _build(self):
+        # Sockets inherited over a fork must not be shared, so every process gets new pools
+        self._pool_manager = urllib3.PoolManager(**self._pool_kwargs())
+        self._proxy_managers = {}
+
+        session = requests.Session()
+        adapter = _SharedPoolAdapter(self)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        self._session = session
+        self._pid = os.getpid()
+
+    def api_factory(self, api_client_package, api_name, config):
+        """HubSpot SDK api_factory that points the API client at the shared pool"""
+        api = DiscoveryBase._default_api_factory(api_client_package, api_name, config)
+        configuration = api.api_client.configuration
+        if configuration.proxy:
+            pool_manager = self.proxy_manager(configuration.proxy, configuration.proxy_headers)
+        else:
+            pool_manager = self.pool_manager
+        rest_client = api.api_client.rest_client
+        rest_client.pool_manager = pool_manager
+        rest_client.request = self._with_timeout(rest_client.request)
+        return api
+
+    def _with_timeout(self, request):
+        # The SDK sends timeout=None unless a call passes _request_timeout, and
+        # urllib3 then waits forever instead of using the pool's timeout
+        @functools.wraps(request)
+        def send(*args, **kwargs):
+            if len(args) < 8 and kwargs.get("_request_timeout") is None:
+                kwargs["_request_timeout"] = self.timeout
+            return request(*args, **kwargs)
+        return send
+
+    def stats(self):
+        """Connection counts per host and in total"""
+        hosts = {}
+        totals = {"in_use": 0, "idle": 0, "created": 0, "reused": 0}
+        pools = self.pool_manager.pools
+
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+
+            # The pool queue is pre-filled with placeholders; checked out slots are in use
+            queued = list(pool.pool.queue) if pool.pool is not None else []
+            idle = sum(1 for conn in queued if conn is not None)
+            host_stats = {
+                "in_use": pool.pool.maxsize - len(queued) if pool.pool is not None else 0,
+                "idle": idle,
+                "created": pool.num_connections,
+                "reused": max(pool.num_requests - pool.num_connections, 0),
+                "maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+            }
+            hosts[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = host_stats
+
+            for name in totals:
+                totals[name] += host_stats[name]
+
+        return {
+            "pid": os.getpid(),
+            "num_pools": self.num_pools,
+            "maxsize": self.maxsize,
+            "totals": totals,
+            "hosts": hosts,
+        }
+
+
+# Shared by the token manager and every service in this process
+transport = HubSpotTransport()
@@ -0,0 +1,127 @@
+import time
+import random
+import logging
+import threading
+from ..config import Config
+
+# Rate-limited messages tracked at most, the table starts over beyond that
+MAX_TRACKED_MESSAGES = 10000
+
+
+class RequestLogSampler:
+    """Decides which request log lines of this process are written.
+
+    Failed (4xx, 5xx) and slow requests are always logged. Successful ones
+    are all logged up to threshold per second and sampled at rate beyond
+    that, so sampling only starts under load. Every logged line carries its
+    weight, the number of requests it stands for, so summing the weights
+    still counts every request.
+    """
+
+    def __init__(self, rate=Config.LOG_SAMPLE_RATE, threshold=Config.LOG_SAMPLE_THRESHOLD,
+                 slow_ms=Config.LOG_SLOW_REQUEST_MS):
+        self.rate = rate
+        self.threshold = threshold
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._second = None
+        self._count = 0
+        self.logged = 0
+        self.sampled_out = 0
+
+    def weight(self, status_code, duration_ms):
+        """Sampling weight of the log line of a request, None to skip it"""
+        if status_code >= 400 or duration_ms >= self.slow_ms:
+            return self._logged(1)
+
+        second = int(time.monotonic())
+        with self._lock:
+            if second != self._second:
+                self._second, self._count = second, 0
+            self._count += 1
+            count = self._count
+
+        if count <= self.threshold or self.rate >= 1:
+            return self._logged(1)
+        if self.rate > 0 and random.random() < self.rate:
+            return self._logged(round(1 / self.rate, 4))
+        with self._lock:
+            self.sampled_out += 1
+        return None
+
+    def _logged(self, weight):
+        with self._lock:
+            self.logged += 1
+        return weight
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "threshold": self.threshold,
+                "slow_ms": self.slow_ms,
+                "logged": self.logged,
+                "sampled_out": self.sampled_out,
+            }
+
+
+class RepeatedMessageFilter(logging.Filter):
+    """Token bucket per logger and message for records up to level.
+
+    A message (the template before its arguments are merged) may be logged
+    burst times in a row and rate times per second after that; the records
+    over the limit are dropped. The next record let through carries the
+    dropped ones in its sample_weight. Records already sampled elsewhere
+    and records above level always pass.
+    """
+
+    def __init__(self, rate=Config.LOG_RATE_LIMIT_PER_SECOND, burst=Config.LOG_RATE_LIMIT_BURST,
+                 level=logging.INFO):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.level = level
+        self._lock = threading.Lock()
+        # (logger, message) -> [tokens, last update, records dropped since the last one let through]
+        self._buckets = {}
+        self.suppressed = 0
+
+    def filter(self, record):
+        if self.rate <= 0 or record.levelno > self.level or hasattr(record, 'sample_weight'):
+            return True
+
+        message = record.msg if isinstance(record.msg, str) else type(record.msg).__name__
+        key = (record.name, message)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= MAX_TRACKED_MESSAGES:
+                    self._buckets.clear()
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                bucket[2] += 1
+                self.suppressed += 1
+                return False
+            bucket[0] = tokens - 1
+            dropped, bucket[2] = bucket[2], 0
+
+        if dropped:
+            record.sample_weight = dropped + 1
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "messages": len(self._buckets),
+                "suppressed": self.suppressed,
+            }
+
+
+# Shared by every request of this process
+request_log_sampler = RequestLogSampler()
@@ -1,36 +1,90 @@
 import os
+import copy
+import time
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import threading
+from collections import Counter
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import sys
 from flask import has_request_context, request
-import json
+import orjson
+from ..config import Config
+from .log_sampling import RepeatedMessageFilter, request_log_sampler
 
-class RequestFormatter(logging.Formatter):
+
+# Default asctime layout of logging.Formatter, without the milliseconds
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def capture_request_context(record):
+    """Copy the request information onto a record, on the thread serving the request"""
+    if hasattr(record, 'url'):
+        # Already captured before the record was queued
+        return
+    if has_request_context():
+        # URL, method and address are read once per request, not per record
+        context = getattr(request, '_log_context', None)
+        if context is None:
+            context = request._log_context = (request.url, request.method, request.remote_addr)
+        record.url, record.method, record.remote_addr = context
+        # Add user ID if available and authenticated, it is set partway through the request
+        record.user_id = getattr(request, 'user_id', None)
+    else:
+        record.url = None
+        record.method = None
+        record.remote_addr = None
+        record.user_id = None
+
+
+class lazy:
+    """Log argument computed only when the record is actually formatted.
+
+        logger.debug("Payload: %s", lazy(json.dumps, payload))
+    """
+
+    __slots__ = ('function', 'args')
+
+    def __init__(self, function, *args):
+        self.function = function
+        self.args = args
+
+    def __str__(self):
+        return str(self.function(*self.args))
+
+    __repr__ = __str__
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """Formatter that renders the date and time of a second only once"""
+
+    _cached_time = (None, None)
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt is not None:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        cached_second, text = self._cached_time
+        if cached_second != second:
+            text = time.strftime(TIME_FORMAT, self.converter(second))
+            self._cached_time = (second, text)
+        return f"{text},{int(record.msecs):03d}"
+
+
+class RequestFormatter(CachedTimeFormatter):
     """Custom formatter that adds request information to log records"""
     
     def format(self, record):
-        if has_request_context():
-            record.url = request.url
-            record.method = request.method
-            record.remote_addr = request.remote_addr
-            # Add user ID if available and authenticated
-            if hasattr(request, 'user_id'):
-                record.user_id = request.user_id
-            else:
-                record.user_id = None
-        else:
-            record.url = None
-            record.method = None
-            record.remote_addr = None
-            record.user_id = None
-            
+        capture_request_context(record)
         return super().format(record)
 
 
-class JSONFormatter(logging.Formatter):
+class JSONFormatter(CachedTimeFormatter):
     """JSON formatter for structured logging"""
     
     def format(self, record):
+        capture_request_context(record)
         log_record = {
             'timestamp': self.formatTime(record),
             'level': record.levelname,
@@ -38,26 +92,161 @@ class JSONFormatter(logging.Formatter):
             'message': record.getMessage(),
         }
         
-        # Add exception info if present
+        # Add exception info if present, queued records carry it as text
         if record.exc_info:
             log_record['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_record['exception'] = record.exc_text
             
         # Add request context if available
-        if hasattr(record, 'url') and record.url:
+        url = getattr(record, 'url', None)
+        if url:
             log_record['request'] = {
-                'url': record.url,
+                'url': url,
                 'method': record.method,
                 'remote_addr': record.remote_addr
             }
             
-            if hasattr(record, 'user_id') and record.user_id:
+            if getattr(record, 'user_id', None):
                 log_record['request']['user_id'] = record.user_id
-                
-        return json.dumps(log_record)
+
+        # Number of records this one stands for, when sampled or rate limited
+        weight = getattr(record, 'sample_weight', None)
+        if weight is not None:
+            log_record['sample_weight'] = weight
+
+        # Objects orjson does not know are written as their str()
+        return orjson.dumps(log_record, default=str).decode()
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room rather than fail when stopping with a full queue
+        self.queue.put(self._sentinel)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Hands records to a writer thread over a bounded queue.
+
+    The calling thread only captures the request context and merges the
+    message, formatting, file I/O and rotation happen on the writer thread.
+    When the queue is full, records below WARNING are dropped right away and
+    warnings and errors wait up to block_timeout for room before they are
+    dropped; drops are counted by level. Every process starts its own writer
+    thread on its first record, so forked workers get one as well.
+    """
+
+    def __init__(self, handlers, max_size=Config.LOG_QUEUE_SIZE,
+                 block_timeout=Config.LOG_QUEUE_BLOCK_TIMEOUT):
+        super().__init__(queue.Queue(max_size))
+        self.handlers = handlers
+        self.max_size = max_size
+        self.block_timeout = block_timeout
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = Counter()
+
+    def start(self):
+        """Start this process's writer thread, once per process"""
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # A forked worker inherits neither the thread nor a usable queue lock
+            self.queue = queue.Queue(self.max_size)
+            self.listener = _Listener(self.queue, *self.handlers, respect_handler_level=True)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        """Write out the queued records and stop the writer thread"""
+        with self._start_lock:
+            if self.listener is not None and self._pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+            self._pid = None
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self.start()
+        super().emit(record)
+
+    def prepare(self, record):
+        # Everything the writer thread needs, taken while on the request thread
+        capture_request_context(record)
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno < logging.WARNING or self.block_timeout <= 0:
+                self._drop(record)
+                return
+            try:
+                self.queue.put(record, timeout=self.block_timeout)
+            except queue.Full:
+                self._drop(record)
+                return
+        with self._stats_lock:
+            self.enqueued += 1
+
+    def _drop(self, record):
+        with self._stats_lock:
+            self.dropped[record.levelname] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queued": self.queue.qsize(),
+                "max_size": self.max_size,
+                "enqueued": self.enqueued,
+                "dropped": sum(self.dropped.values()),
+                "dropped_by_level": dict(self.dropped),
+            }
+
+    def close(self):
+        self.stop()
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+
+# The handler and rate limit installed by the last configure_logging() call
+queue_handler = None
+repeated_messages = None
+
+
+def log_stats():
+    """Queue usage, drop counters and sampling of this process's log pipeline"""
+    if queue_handler is None:
+        return {}
+    return {
+        **queue_handler.stats(),
+        "request_sampling": request_log_sampler.stats(),
+        "rate_limited": repeated_messages.stats(),
+    }
+
+
+@atexit.register
+def _flush_logs():
+    if queue_handler is not None:
+        queue_handler.stop()
 
 
 def configure_logging(app):
     """Configure logging for the application"""
+    global queue_handler, repeated_messages
+
     # Create logs directory if it doesn't exist
     logs_dir = os.path.join(app.root_path, '..', 'logs')
     os.makedirs(logs_dir, exist_ok=True)
@@ -76,6 +265,12 @@ def configure_logging(app):
     # Clear any existing handlers
     for handler in root_logger.handlers:
         root_logger.removeHandler(handler)
+
+    # Write out and stop the pipeline of an earlier configuration
+    if queue_handler is not None:
+        root_logger.removeHandler(queue_handler)
+        queue_handler.close()
+        queue_handler = None
     
     # Configure console handler for development
     console_handler = logging.StreamHandler(sys.stdout)
@@ -93,9 +288,20 @@ def configure_logging(app):
     file_formatter = JSONFormatter()
     file_handler.setFormatter(file_formatter)
     
-    # Add handlers to root logger
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    # Both handlers run on the writer thread, request threads only enqueue
+    queue_handler = BoundedQueueHandler(
+        [console_handler, file_handler],
+        max_size=app.config.get('LOG_QUEUE_SIZE', Config.LOG_QUEUE_SIZE),
+        block_timeout=app.config.get('LOG_QUEUE_BLOCK_TIMEOUT', Config.LOG_QUEUE_BLOCK_TIMEOUT)
+    )
+    queue_handler.setLevel(log_level)
+    # Repeated info and debug messages are limited before they are queued
+    repeated_messages = RepeatedMessageFilter(
+        rate=app.config.get('LOG_RATE_LIMIT_PER_SECOND', Config.LOG_RATE_LIMIT_PER_SECOND),
+        burst=app.config.get('LOG_RATE_LIMIT_BURST', Config.LOG_RATE_LIMIT_BURST)
+    )
+    queue_handler.addFilter(repeated_messages)
+    root_logger.addHandler(queue_handler)
     
     # Configure SQLAlchemy logging separately if needed
     if app.config.get('SQLALCHEMY_ECHO', False):
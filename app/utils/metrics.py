@@ -0,0 +1,337 @@
+import os
+import json
+import time
+import fcntl
+import atexit
+import logging
+import threading
+from bisect import bisect_left
+from ..config import Config
+
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, and size buckets in bytes
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Histograms of exited workers, and the lock taken while moving them there
+ARCHIVE_FILE = "archive.json"
+LOCK_FILE = ".lock"
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Histogram:
+    """Observations counted into buckets, per combination of label values"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [count per bucket and +Inf, sum, count]
+        self._series = {}
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def values(self):
+        with self._lock:
+            return [[list(labels), [list(counts), total, count]]
+                    for labels, (counts, total, count) in self._series.items()]
+
+    @staticmethod
+    def merge(current, other):
+        counts, total, count = current
+        return [[a + b for a, b in zip(counts, other[0])], total + other[1], count + other[2]]
+
+    def render(self, series):
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for labels, (counts, total, count) in series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Gauge:
+    """Current value, per combination of label values"""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def dec(self, amount=1, *labels):
+        self.inc(-amount, *labels)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._series[labels] = value
+
+    def values(self):
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._series.items()]
+
+    @staticmethod
+    def merge(current, other):
+        return current + other
+
+    def render(self, series):
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                for labels, value in series.items()]
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """Metrics of this process, rendered in the Prometheus text format.
+
+    Without a directory /metrics reports the serving process only. With one,
+    every process writes its values to <directory>/<pid>-<start>.json every
+    flush_interval seconds from a background thread, and render() adds up
+    the files of all processes. The histograms of exited workers are merged
+    into archive.json so the totals never go backwards, gauges only count
+    for running workers.
+    """
+
+    def __init__(self, directory=Config.METRICS_MULTIPROC_DIR,
+                 flush_interval=Config.METRICS_FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._started = None
+        self._writer_pid = None
+
+    def histogram(self, name, help, labelnames=(), buckets=DURATION_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._register(Gauge(name, help, labelnames))
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def _claim(self):
+        # The values belong to this process from now on
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # A forked worker starts from zero, the parent reports its own values
+                for metric in self._metrics.values():
+                    metric.reset()
+            self._pid = os.getpid()
+            # Tells this process's file apart from one of an exited worker with the same pid
+            self._started = time.time_ns()
+
+    def start(self):
+        """Start this process's writer thread, once per process"""
+        self._claim()
+        if not self.directory or self._writer_pid == self._pid:
+            return
+        with self._lock:
+            if self._writer_pid == self._pid:
+                return
+            self._writer_pid = self._pid
+
+        thread = threading.Thread(target=self._flush_periodically, name='metrics-writer', daemon=True)
+        thread.start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _values(self):
+        return {name: metric.values() for name, metric in self._metrics.items()}
+
+    def flush(self):
+        """Write this process's values to the metrics directory"""
+        if not self.directory:
+            return
+        self._claim()
+        snapshot = {"pid": self._pid, "started": self._started, "values": self._values()}
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            _write_json(self.path(f"{self._pid}-{self._started}.json"), snapshot)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {self.directory}: {str(e)}")
+
+    def clear(self):
+        """Remove the files of an earlier run, before any worker starts"""
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(self.path(name))
+            except OSError as e:
+                logger.warning(f"Could not remove metrics file {name}: {str(e)}")
+
+    def _snapshots(self):
+        if not self.directory:
+            yield self._values()
+            return
+
+        self.flush()
+        try:
+            with open(self.path(LOCK_FILE), "a") as lock:
+                # One process at a time moves exited workers into the archive
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield from self._archive_exited()
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        except OSError as e:
+            logger.warning(f"Could not read metrics from {self.directory}: {str(e)}")
+
+    def _archive_exited(self):
+        snapshots = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json") or name == ARCHIVE_FILE:
+                continue
+            try:
+                with open(self.path(name)) as f:
+                    snapshot = json.load(f)
+                snapshots[name] = (int(snapshot["pid"]), int(snapshot["started"]), snapshot["values"])
+            except (OSError, ValueError, KeyError):
+                # Being replaced or from another version, the next scrape reads it
+                continue
+
+        # A pid only belongs to the worker that started last with it
+        latest = {}
+        for pid, started, _ in snapshots.values():
+            latest[pid] = max(started, latest.get(pid, started))
+        exited = [name for name, (pid, started, _) in snapshots.items()
+                  if started != latest[pid] or not _is_running(pid)]
+
+        archive = self._read_archive()
+        if exited:
+            totals = self._merge([archive] + [snapshots[name][2] for name in exited], histograms_only=True)
+            archive = {name: [[list(labels), value] for labels, value in series.items()]
+                       for name, series in totals.items()}
+            _write_json(self.path(ARCHIVE_FILE), archive)
+            for name in exited:
+                os.remove(self.path(name))
+
+        yield archive
+        for name, (_, _, values) in snapshots.items():
+            if name not in exited:
+                yield values
+
+    def _read_archive(self):
+        try:
+            with open(self.path(ARCHIVE_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _merge(self, snapshots, histograms_only=False):
+        totals = {name: {} for name in self._metrics}
+        for values in snapshots:
+            for name, entries in values.items():
+                metric = self._metrics.get(name)
+                if metric is None or (histograms_only and metric.kind != "histogram"):
+                    continue
+                series = totals[name]
+                for labels, value in entries:
+                    labels = tuple(labels)
+                    series[labels] = metric.merge(series[labels], value) if labels in series else value
+        return totals
+
+    def collect(self):
+        """Values of every metric, added up across processes"""
+        return self._merge(self._snapshots())
+
+    def render(self):
+        lines = []
+        for name, series in self.collect().items():
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render(series))
+        return "\n".join(lines) + "\n"
+
+
+def _write_json(path, value):
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(value, f)
+    os.replace(temporary, path)
+
+
+def _is_running(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Shared by every request of this process
+metrics = MetricsRegistry()
+
+
+@atexit.register
+def _flush_metrics():
+    if metrics._pid == os.getpid():
+        metrics.flush()
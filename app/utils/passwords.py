@@ -0,0 +1,99 @@
+import os
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash)
+from app.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_method(method):
+    """Spell a werkzeug hash method the way it is stored in front of the hash"""
+    if method.startswith("pbkdf2:") and len(method.split(":")) == 2:
+        return f"{method}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+class PasswordHashTimeout(Exception):
+    """The hashing pool did not answer within PASSWORD_HASH_TIMEOUT"""
+
+
+class PasswordHasher:
+    """Password hashing and verification off the request thread.
+
+    Hashing is deliberately slow CPU work, so it runs on a bounded pool of
+    worker processes where it neither holds the GIL of the web worker nor
+    stalls its other requests. The scheme and work factor come from
+    Config.PASSWORD_HASH_METHOD; hashes made with anything else are
+    reported by needs_rehash() so logins can upgrade them.
+    """
+
+    def __init__(self, method=Config.PASSWORD_HASH_METHOD, workers=Config.PASSWORD_HASH_WORKERS,
+                 timeout=Config.PASSWORD_HASH_TIMEOUT):
+        self.method = normalize_method(method)
+        # 0 hashes on the calling thread
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        # Pools are not inherited over a fork, each process starts its own
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    self._pid = os.getpid()
+        return self._executor
+
+    def hash(self, password):
+        """Return a salted hash of password using the configured method"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Check password against a hash made by any supported method"""
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if password_hash was not made with the configured method"""
+        method = password_hash.split("$", 1)[0]
+        return method != self.method
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        future = None
+        try:
+            future = self.executor.submit(fn, *args)
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # The pool is saturated, drop the job unless it already started
+            future.cancel()
+            logger.warning(f"Password hashing timed out after {self.timeout}s")
+            raise PasswordHashTimeout(f"Password hashing took longer than {self.timeout}s")
+        except BrokenProcessPool as e:
+            # A pool process died, stop what is left of the pool and start a new one next call
+            logger.error(f"Password hashing pool broken, restarting it: {str(e)}")
+            with self._lock:
+                if self._executor is not None and self._pid == os.getpid():
+                    self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self._pid = None
+            return fn(*args)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._pid = None
+
+
+# Shared by every request of this process
+password_hasher = PasswordHasher()
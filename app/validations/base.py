@@ -4,6 +4,10 @@ import re
 import logging
 
 
+# Compiled once, used by validate_email and by email fields of schemas
+EMAIL_PATTERN = re.compile(r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)")
+
+
 class ValidationError(Exception):
     """Exception raised for validation errors"""
 
@@ -15,6 +19,18 @@ class ValidationError(Exception):
 class Validator:
     """Base validator class"""
 
+    # Schema of one item of a batch payload, set by subclasses
+    batch_item_schema = None
+
+    @classmethod
+    def validate_batch_items(cls, items):
+        """Validate every item of a batch in one pass.
+
+        Returns (valid, errors): (index, normalized item) pairs of the valid
+        items and the errors of each invalid item by its index.
+        """
+        return cls.batch_item_schema.check_many(items)
+
     @staticmethod
     def validate_required(data, fields):
         """Validate that required fields are present and not empty"""
@@ -86,10 +102,24 @@ class Validator:
         """Basic email format check."""
         email = data.get(field_name)
         if email:
-            email_regex = r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)"
-            if not re.match(email_regex, email):
+            if not EMAIL_PATTERN.match(email):
                 raise ValidationError({field_name: "Invalid email format."})
 
+    @staticmethod
+    def validate_batch_inputs(data, max_items):
+        """Ensure 'inputs' is a non-empty list of at most max_items entries."""
+        inputs = data.get('inputs')
+
+        if not isinstance(inputs, list) or not inputs:
+            raise ValidationError(
+                {'inputs': "inputs must be a non-empty list"})
+
+        if len(inputs) > max_items:
+            raise ValidationError(
+                {'inputs': f"inputs must contain no more than {max_items} items"})
+
+        return True
+
     @staticmethod
     def validate_range(data, field_name, min_value=None, max_value=None):
         """Ensure that a numeric field is within a specific range."""
@@ -114,6 +144,10 @@ class Validator:
 
 
 def validate_request(validator_method):
+    # A Schema hands the validated, normalized payload to the view as `payload`
+    from .schema import Schema
+    schema = validator_method if isinstance(validator_method, Schema) else None
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
@@ -128,6 +162,10 @@ def validate_request(validator_method):
                         'details': 'Request must contain valid JSON data'
                     }), 422
 
+                if schema is not None:
+                    payload = schema.validate(data)
+                    return f(*args, payload=payload, **kwargs)
+
                 # Apply the validator
                 validator_method(data)
 
@@ -1,9 +1,34 @@
 from .base import Validator, ValidationError
+from .schema import Schema, Field
+from ..config import Config
 
 
 class ContactValidator(Validator):
     # Validator for contact operations
 
+    # /create_contact payload, compiled once
+    create_schema = Schema({
+        "properties": Field(dict, required=True, fields={
+            "email": Field(required=True, min_length=3, max_length=80, email=True,
+                           strip=True, lower=True),
+            "firstname": Field(required=True, min_length=2, max_length=80, strip=True),
+            "lastname": Field(required=True, min_length=2, max_length=80, strip=True),
+            "phone": Field(required=True, min_length=8, max_length=13, strip=True,
+                           name="Phone"),
+        }),
+    })
+
+    # One item of /contacts/batch, matched by email so only the email is required
+    batch_item_schema = Schema({
+        "properties": Field(dict, required=True, fields={
+            "email": Field(required=True, min_length=3, max_length=80, email=True,
+                           strip=True, lower=True),
+            "firstname": Field(min_length=2, max_length=80, strip=True),
+            "lastname": Field(min_length=2, max_length=80, strip=True),
+            "phone": Field(min_length=8, max_length=13, strip=True, name="Phone"),
+        }),
+    })
+
     @classmethod
     def validate_registration(cls, data):
 
@@ -19,23 +44,29 @@ class ContactValidator(Validator):
 
         # Validate email
         cls.validate_length(
-            data, "email", min_length=3, max_length=80
+            properties, "email", min_length=3, max_length=80
         )
 
         # Validate firstname
         cls.validate_length(
-            data, "firstname", min_length=2, max_length=80
+            properties, "firstname", min_length=2, max_length=80
         )
 
         # Validate lastname
         cls.validate_length(
-            data, "lastname", min_length=2, max_length=80
+            properties, "lastname", min_length=2, max_length=80
         )
 
         # Validate phone
         cls.validate_length(
-            data, "phone", min_length=8, max_length=13
+            properties, "phone", min_length=8, max_length=13
         )
-        cls.validate_type(data, "phone", str, field_name="Phone")
+        cls.validate_type(properties, "phone", str, field_name="Phone")
 
         return True
+
+    @classmethod
+    def validate_batch(cls, data):
+        # Items are checked with validate_batch_items so a bad item fails alone
+        cls.validate_batch_inputs(data, Config.BATCH_MAX_ITEMS)
+        return True
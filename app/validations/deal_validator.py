@@ -1,9 +1,33 @@
 from .base import Validator, ValidationError
+from .schema import Schema, Field, Number
+from ..config import Config
 
 
 class DealValidator(Validator):
     # Validator for deal operations
 
+    # /create_deal payload, compiled once
+    create_schema = Schema({
+        "properties": Field(dict, required=True, fields={
+            "dealname": Field(required=True, min_length=3, max_length=5000, strip=True),
+            "amount": Field(Number, required=True, min_value=0),
+            "dealstage": Field(required=True, min_length=3, max_length=5000, strip=True),
+            "contact_id": Field(required=True, min_length=3, max_length=5000, strip=True),
+            "pipeline": Field(required=True, min_length=3, max_length=5000, strip=True),
+        }),
+    })
+
+    # One item of /deals/batch, matched by dealname so only the dealname is required
+    batch_item_schema = Schema({
+        "properties": Field(dict, required=True, fields={
+            "dealname": Field(required=True, min_length=3, max_length=5000, strip=True),
+            "amount": Field(Number, min_value=0),
+            "dealstage": Field(min_length=3, max_length=5000, strip=True),
+            "contact_id": Field(min_length=3, max_length=5000, strip=True),
+            "pipeline": Field(min_length=3, max_length=5000, strip=True),
+        }),
+    })
+
     @classmethod
     def validate_create_deal(cls, data):
         # Ensure the 'properties' key exists
@@ -17,21 +41,27 @@ class DealValidator(Validator):
             properties, ["dealname", "amount", "dealstage", "contact_id", "pipeline"])
 
         # Validate dealname
-        cls.validate_length(data, "dealname", min_length=3, max_length=5000)
+        cls.validate_length(properties, "dealname", min_length=3, max_length=5000)
 
         # Validate amount (should be a valid number)
-        cls.validate_is_number(data, "amount")
+        cls.validate_is_number(properties, "amount")
 
         # Optional: Ensure amount is not negative
-        cls.validate_range(data, "amount", min_value=0)
+        cls.validate_range(properties, "amount", min_value=0)
 
         # Validate dealstage
-        cls.validate_length(data, "dealstage", min_length=3, max_length=5000)
+        cls.validate_length(properties, "dealstage", min_length=3, max_length=5000)
 
         # Validate contact_id
-        cls.validate_length(data, "contact_id", min_length=3, max_length=5000)
+        cls.validate_length(properties, "contact_id", min_length=3, max_length=5000)
 
         # Validate pipeline
-        cls.validate_length(data, "pipeline", min_length=3, max_length=5000)
+        cls.validate_length(properties, "pipeline", min_length=3, max_length=5000)
 
         return True
+
+    @classmethod
+    def validate_batch(cls, data):
+        # Items are checked with validate_batch_items so a bad item fails alone
+        cls.validate_batch_inputs(data, Config.BATCH_MAX_ITEMS)
+        return True
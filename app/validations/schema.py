@@ -0,0 +1,237 @@
+import re
+import sys
+from .base import ValidationError, EMAIL_PATTERN
+
+
+class Number:
+    """Field type of int and float values, booleans excluded"""
+
+
+class Field:
+    """Declarative rules for one payload field"""
+
+    def __init__(self, type=str, required=False, min_length=None, max_length=None,
+                 min_value=None, max_value=None, email=False, pattern=None,
+                 pattern_message=None, strip=False, lower=False, fields=None, name=None):
+        self.type = type
+        self.required = required
+        self.min_length = min_length
+        self.max_length = max_length
+        self.min_value = min_value
+        self.max_value = max_value
+        self.email = email
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.pattern_message = pattern_message
+        self.strip = strip
+        self.lower = lower
+        # Fields of a nested object, for type=dict
+        self.fields = fields
+        self.name = name
+
+
+def _compile_field(key, field, path):
+    """Build the check of one field, specialised for its type.
+
+    Rule bounds, patterns and messages are resolved once here, so a check
+    only compares values and never formats a message it does not report.
+    """
+    name = field.name or key
+    field_path = path + key
+    required = f"{name} is required" if field.required else None
+
+    if field.type is Number:
+        min_value, max_value = field.min_value, field.max_value
+        type_message = f"{name} must be a number."
+        min_message = f"{name} must be at least {min_value}"
+        max_message = f"{name} must be no more than {max_value}"
+
+        def check(container, normalized, errors):
+            value = container.get(key)
+            if value is None or value == '':
+                if required:
+                    errors[field_path] = required
+            # Booleans are ints, but not numbers here
+            elif value.__class__ is not int and value.__class__ is not float:
+                errors[field_path] = type_message
+            elif min_value is not None and value < min_value:
+                errors[field_path] = min_message
+            elif max_value is not None and value > max_value:
+                errors[field_path] = max_message
+
+    elif field.type is dict:
+        nested = _compile_fields(field.fields, f"{field_path}.") if field.fields else None
+        type_message = f"{name} must be an object"
+
+        def check(container, normalized, errors):
+            value = container.get(key)
+            if value is None or value == '':
+                if required:
+                    errors[field_path] = required
+            elif value.__class__ is not dict:
+                errors[field_path] = type_message
+            elif nested is not None:
+                normalized[key] = nested(value, errors)
+
+    elif field.type is str:
+        strip, lower = field.strip, field.lower
+        # Only whitespace counts as missing once stripped
+        blank = required if strip else None
+        min_length, max_length = field.min_length, field.max_length
+        measure = min_length is not None or max_length is not None
+        email_match = EMAIL_PATTERN.match if field.email else None
+        pattern_search = field.pattern.search if field.pattern is not None else None
+        # Unchanged values are already in the copy of the payload
+        rewrite = strip or lower
+        type_message = f"{name} must be a string"
+        min_message = f"{name} must be at least {min_length} characters"
+        max_message = f"{name} must be no more than {max_length} characters"
+        pattern_message = field.pattern_message or f"{name} has an invalid format"
+
+        def check(container, normalized, errors):
+            value = container.get(key)
+            if value is None or value == '':
+                if required:
+                    errors[field_path] = required
+                return
+            if value.__class__ is not str:
+                errors[field_path] = type_message
+                return
+            if strip:
+                value = value.strip()
+            if lower:
+                value = value.lower()
+            length = len(value) if measure else 0
+            if blank and not value:
+                errors[field_path] = blank
+            elif min_length is not None and length < min_length:
+                errors[field_path] = min_message
+            elif max_length is not None and length > max_length:
+                errors[field_path] = max_message
+            elif email_match is not None and not email_match(value):
+                errors[field_path] = "Invalid email format."
+            elif pattern_search is not None and not pattern_search(value):
+                errors[field_path] = pattern_message
+            elif rewrite:
+                normalized[key] = value
+
+    else:
+        expected = field.type
+        type_message = f"{name} must be {expected.__name__}"
+
+        def check(container, normalized, errors):
+            value = container.get(key)
+            if value is None or value == '':
+                if required:
+                    errors[field_path] = required
+            elif not isinstance(value, expected):
+                errors[field_path] = type_message
+
+    return check
+
+
+def _is_text(field):
+    # Strings checked by length only, the shape of most fields
+    return (field.type is str and not field.lower and not field.email
+            and field.pattern is None)
+
+
+def _text_rule(key, field, path):
+    name = field.name or key
+    min_length = field.min_length if field.min_length is not None else 0
+    max_length = field.max_length if field.max_length is not None else sys.maxsize
+    return (
+        key, path + key, f"{name} is required" if field.required else None, field.strip,
+        min_length, max_length, f"{name} must be a string",
+        f"{name} must be at least {field.min_length} characters",
+        f"{name} must be no more than {field.max_length} characters",
+    )
+
+
+def _compile_fields(fields, path=""):
+    # Text fields are checked in a loop over their rules, the others by their own check
+    texts = tuple(_text_rule(key, field, path) for key, field in fields.items() if _is_text(field))
+    checks = tuple(_compile_field(key, field, path)
+                   for key, field in fields.items() if not _is_text(field))
+
+    def validate(data, errors):
+        # Undeclared keys are passed through untouched
+        normalized = dict(data)
+        get = data.get
+        for (key, field_path, required, strip, min_length, max_length,
+                type_message, min_message, max_message) in texts:
+            value = get(key)
+            if value is None or value == '':
+                if required:
+                    errors[field_path] = required
+                continue
+            if value.__class__ is not str:
+                errors[field_path] = type_message
+                continue
+            if strip:
+                value = value.strip()
+                # Only whitespace counts as missing
+                if required and not value:
+                    errors[field_path] = required
+                    continue
+            length = len(value)
+            if length < min_length:
+                errors[field_path] = min_message
+            elif length > max_length:
+                errors[field_path] = max_message
+            elif strip:
+                normalized[key] = value
+        for check in checks:
+            check(data, normalized, errors)
+        return normalized
+
+    return validate
+
+
+class Schema:
+    """Request payload schema, compiled once into a single-pass check.
+
+    Every declared field is visited once with all of its rules, errors of
+    all fields are collected (nested fields as "parent.child"), and the
+    payload comes back normalized (stripped, lowercased as declared).
+    """
+
+    def __init__(self, fields):
+        self.fields = fields
+        self._validate = _compile_fields(fields)
+
+    def check(self, data):
+        """Return (normalized payload, errors by field path)"""
+        errors = {}
+        if not isinstance(data, dict):
+            return None, {"payload": "payload must be an object"}
+        normalized = self._validate(data, errors)
+        return normalized, errors
+
+    def check_many(self, items):
+        """Validate a list of payloads in one pass.
+
+        Returns (valid, errors): the (index, normalized payload) pairs of the
+        valid items, and the errors by field path of every invalid item by
+        its index, so callers can carry on with the valid subset.
+        """
+        validate = self._validate
+        valid = []
+        invalid = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                invalid[index] = {"payload": "payload must be an object"}
+                continue
+            errors = {}
+            normalized = validate(item, errors)
+            if errors:
+                invalid[index] = errors
+            else:
+                valid.append((index, normalized))
+        return valid, invalid
+
+    def validate(self, data):
+        """Return the normalized payload, or raise ValidationError with every error"""
+        normalized, errors = self.check(data)
+        if errors:
+            raise ValidationError(errors)
+        return normalized
@@ -1,9 +1,25 @@
 from .base import Validator, ValidationError
+from .schema import Schema, Field
 
 
 class SupportTicketValidator(Validator):
     # Validator for support-ticket operations
 
+    # /create_ticket payload, compiled once
+    create_schema = Schema({
+        "properties": Field(dict, required=True, fields={
+            "subject": Field(required=True, min_length=3, max_length=500, strip=True),
+            "description": Field(required=True, min_length=3, max_length=5000, strip=True),
+            "category": Field(required=True, min_length=3, max_length=100, strip=True),
+            "pipeline": Field(required=True, min_length=1, max_length=50, strip=True),
+            "hs_ticket_priority": Field(required=True, min_length=1, max_length=50, strip=True),
+            "hs_pipeline_stage": Field(required=True, min_length=1, max_length=50, strip=True),
+        }),
+    })
+
+    # Tickets are never matched to existing ones, so items need every create field
+    batch_item_schema = create_schema
+
     @classmethod
     def validate_create_support_ticket(cls, data):
         # Ensure the 'properties' key exists
@@ -1,10 +1,30 @@
 import re
 from .base import Validator, ValidationError
+from .schema import Schema, Field
+
+
+# Password complexity rules, compiled once
+UPPERCASE = re.compile(r"[A-Z]")
+LOWERCASE = re.compile(r"[a-z]")
+DIGIT = re.compile(r"[0-9]")
 
 
 class UserValidator(Validator):
     # Validator for user operations
 
+    # /auth/register and /auth/login payloads, compiled once
+    registration_schema = Schema({
+        "username": Field(required=True, min_length=3, max_length=80, name="Username"),
+        "password": Field(
+            required=True, min_length=8, name="Password",
+            pattern=r"(?=.*[A-Z])(?=.*[a-z])(?=.*[0-9])",
+            pattern_message="Password must contain at least one uppercase letter, one lowercase letter, and one digit"),
+    })
+    login_schema = Schema({
+        "username": Field(required=True),
+        "password": Field(required=True),
+    })
+
     @classmethod
     def validate_user_registration(cls, data):
 
@@ -25,9 +45,9 @@ class UserValidator(Validator):
 
             # Check for at least one uppercase, one lowercase, and one digit
             if not (
-                re.search(r"[A-Z]", password)
-                and re.search(r"[a-z]", password)
-                and re.search(r"[0-9]", password)
+                UPPERCASE.search(password)
+                and LOWERCASE.search(password)
+                and DIGIT.search(password)
             ):
                 raise ValidationError(
                     {
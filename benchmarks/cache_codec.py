@@ -0,0 +1,64 @@
+"""Micro-benchmark of the page cache serialization path.
+
+Compares the encode/decode cost and size of a 100-contact page for the
+stdlib json module and the cache codec, with and without compression.
+
+    python -m benchmarks.cache_codec
+"""
+import json
+import timeit
+from datetime import datetime, timezone
+from hubspot.crm.contacts import SimplePublicObject
+from app.redis.codec import CacheCodec, to_plain
+
+PAGE_SIZE = 100
+ROUNDS = 200
+
+
+def build_page():
+    now = datetime.now(timezone.utc)
+    return [
+        SimplePublicObject(
+            id=str(100000 + i),
+            properties={
+                "email": f"user{i}@example.com",
+                "firstname": "Jane",
+                "lastname": f"Doe {i}",
+                "phone": f"+1555000{i:04d}",
+                "createdate": now.isoformat(),
+                "lastmodifieddate": now.isoformat(),
+                "hs_object_id": str(100000 + i),
+            },
+            created_at=now,
+            updated_at=now,
+            archived=False)
+        for i in range(PAGE_SIZE)
+    ]
+
+
+def measure(name, encode, decode):
+    data = encode()
+    encode_us = timeit.timeit(encode, number=ROUNDS) / ROUNDS * 1e6
+    decode_us = timeit.timeit(lambda: decode(data), number=ROUNDS) / ROUNDS * 1e6
+    print(f"{name:<28}{encode_us:>12.1f}{decode_us:>12.1f}{len(data):>10}")
+
+
+def main():
+    models = build_page()
+    page = {"results": to_plain(models), "next_after": "100100"}
+
+    convert_us = timeit.timeit(lambda: to_plain(models), number=ROUNDS) / ROUNDS * 1e6
+    print(f"to_plain of {PAGE_SIZE} SDK objects: {convert_us:.1f} us (once per fetch)\n")
+
+    print(f"{'per ' + str(PAGE_SIZE) + ' objects':<28}{'encode us':>12}{'decode us':>12}{'bytes':>10}")
+    measure("json", lambda: json.dumps(page), json.loads)
+
+    uncompressed = CacheCodec(compress_threshold=float("inf"))
+    measure("codec", lambda: uncompressed.encode(page), uncompressed.decode)
+
+    compressed = CacheCodec(compress_threshold=0)
+    measure("codec + zlib", lambda: compressed.encode(page), compressed.decode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Micro-benchmark of the per-record CPU cost of the log formatters.
+
+Formats a record logged while serving a request, with the formatters as
+they were before (request context read for every record, stdlib json,
+time formatted for every record) and as they are now, and compares the
+cost of a filtered debug call with f-string, %-style and lazy arguments.
+
+    python -m benchmarks.log_formatting
+"""
+import json
+import timeit
+import logging
+from flask import Flask, has_request_context, request
+from app.utils.logging import RequestFormatter, JSONFormatter, lazy
+
+ROUNDS = 20000
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+PAYLOAD = {"properties": {"email": "jane@example.com", "firstname": "Jane", "lastname": "Doe"}}
+
+
+def legacy_context(record):
+    if has_request_context():
+        record.url = request.url
+        record.method = request.method
+        record.remote_addr = request.remote_addr
+        record.user_id = getattr(request, 'user_id', None)
+    else:
+        record.url = record.method = record.remote_addr = record.user_id = None
+
+
+class LegacyRequestFormatter(logging.Formatter):
+    def format(self, record):
+        legacy_context(record)
+        return super().format(record)
+
+
+class LegacyJSONFormatter(logging.Formatter):
+    def format(self, record):
+        legacy_context(record)
+        log_record = {
+            'timestamp': self.formatTime(record),
+            'level': record.levelname,
+            'name': record.name,
+            'message': record.getMessage(),
+        }
+        if record.url:
+            log_record['request'] = {
+                'url': record.url,
+                'method': record.method,
+                'remote_addr': record.remote_addr
+            }
+            if record.user_id:
+                log_record['request']['user_id'] = record.user_id
+        return json.dumps(log_record)
+
+
+def make_record():
+    return logging.LogRecord("app.services.contact_service", logging.INFO, __file__, 1,
+                             "Successfully created contact with email %s", ("jane@example.com",), None)
+
+
+def per_call_us(function):
+    return timeit.timeit(function, number=ROUNDS) / ROUNDS * 1e6
+
+
+def per_record_us(formatter):
+    return per_call_us(lambda: formatter.format(make_record()))
+
+
+def main():
+    app = Flask(__name__)
+    with app.test_request_context("/api/contacts?limit=10", method="POST"):
+        request.user_id = 1
+        rows = [
+            ("console, before", per_record_us(LegacyRequestFormatter(CONSOLE_FORMAT))),
+            ("console, after", per_record_us(RequestFormatter(CONSOLE_FORMAT))),
+            ("json file, before", per_record_us(LegacyJSONFormatter())),
+            ("json file, after", per_record_us(JSONFormatter())),
+        ]
+
+    logger = logging.getLogger("benchmarks.log_formatting")
+    logger.setLevel(logging.INFO)
+    rows += [
+        ("filtered debug, f-string",
+         per_call_us(lambda: logger.debug(f"Payload: {json.dumps(PAYLOAD)}"))),
+        ("filtered debug, %-args",
+         per_call_us(lambda: logger.debug("Payload: %s", PAYLOAD))),
+        ("filtered debug, lazy",
+         per_call_us(lambda: logger.debug("Payload: %s", lazy(json.dumps, PAYLOAD)))),
+    ]
+
+    print(f"{'per record':<28}{'us':>10}")
+    for name, us in rows:
+        print(f"{name:<28}{us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
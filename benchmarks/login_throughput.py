@@ -0,0 +1,68 @@
+"""Benchmark of the password verification behind /api/auth/login.
+
+Runs logins from several request threads of one web worker, once hashing
+on the request threads and once on the password hashing process pool,
+and reports logins per second together with the latency of a small
+pure-Python request served by the same worker meanwhile.
+
+    python -m benchmarks.login_throughput
+"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.config import Config
+from app.utils.passwords import PasswordHasher
+
+REQUEST_THREADS = 8
+LOGINS = 32
+
+
+def other_request():
+    # Stand-in for a cheap request that needs the GIL
+    started = time.perf_counter()
+    sum(i * i for i in range(20000))
+    return time.perf_counter() - started
+
+
+def measure(name, hasher):
+    password_hash = hasher.hash("correct horse battery staple")
+    # Warm up the pool processes
+    hasher.verify(password_hash, "correct horse battery staple")
+
+    done = threading.Event()
+    latencies = []
+
+    def probe():
+        while not done.is_set():
+            latencies.append(other_request())
+            time.sleep(0.01)
+
+    prober = threading.Thread(target=probe)
+    prober.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=REQUEST_THREADS) as executor:
+        list(executor.map(
+            lambda _: hasher.verify(password_hash, "correct horse battery staple"), range(LOGINS)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    prober.join()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+    print(f"{name:<28}{LOGINS / elapsed:>12.1f}{p99:>18.1f}")
+
+
+def main():
+    print(f"{Config.PASSWORD_HASH_METHOD}, {REQUEST_THREADS} request threads, {LOGINS} logins\n")
+    print(f"{'':<28}{'logins/s':>12}{'other req p99 ms':>18}")
+    measure("request thread", PasswordHasher(workers=0))
+
+    pooled = PasswordHasher(workers=max(Config.PASSWORD_HASH_WORKERS, 1))
+    try:
+        measure(f"process pool ({pooled.workers})", pooled)
+    finally:
+        pooled.shutdown()
+
+
+if __name__ == "__main__":
+    main()
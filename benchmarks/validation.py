@@ -0,0 +1,74 @@
+"""Micro-benchmark of request payload validation.
+
+Compares the imperative Validator methods, plus the second JSON parse the
+view used to do, with the compiled schemas that hand the parsed payload to
+the view, and times the batch validation of BATCH_ITEMS items.
+
+    python -m benchmarks.validation
+"""
+import json
+import timeit
+from app.validations.base import ValidationError
+from app.validations.contact_validator import ContactValidator
+from app.validations.deal_validator import DealValidator
+from app.validations.support_ticket_validator import SupportTicketValidator
+
+ROUNDS = 20000
+BATCH_ITEMS = 10000
+BATCH_ROUNDS = 10
+
+PAYLOADS = {
+    "contact": (ContactValidator.validate_registration, ContactValidator.create_schema, {
+        "properties": {"email": "jane@example.com", "firstname": "Jane",
+                       "lastname": "Doe", "phone": "+1234567890"}}),
+    "deal": (DealValidator.validate_create_deal, DealValidator.create_schema, {
+        "properties": {"dealname": "Acme - Renewal", "amount": 1500, "pipeline": "default",
+                       "dealstage": "appointmentscheduled", "contact_id": "12345"}}),
+    "ticket": (SupportTicketValidator.validate_create_support_ticket,
+               SupportTicketValidator.create_schema, {
+        "properties": {"subject": "Login broken", "description": "Cannot log in",
+                       "category": "Product", "pipeline": "0",
+                       "hs_ticket_priority": "HIGH", "hs_pipeline_stage": "1"}}),
+}
+
+
+def legacy(method, body):
+    data = json.loads(body)
+    try:
+        method(data)
+    except ValidationError:
+        return
+    # The view parsed the body again
+    json.loads(body)
+
+
+def compiled(schema, body):
+    try:
+        schema.validate(json.loads(body))
+    except ValidationError:
+        pass
+
+
+def main():
+    print(f"{'per request':<28}{'methods us':>12}{'schema us':>12}")
+    for name, (method, schema, payload) in PAYLOADS.items():
+        for label, data in ((name, payload), (f"{name} (invalid)", {"properties": {}})):
+            body = json.dumps(data)
+            legacy_us = timeit.timeit(lambda: legacy(method, body), number=ROUNDS) / ROUNDS * 1e6
+            schema_us = timeit.timeit(lambda: compiled(schema, body), number=ROUNDS) / ROUNDS * 1e6
+            print(f"{label:<28}{legacy_us:>12.2f}{schema_us:>12.2f}")
+
+    print(f"\n{'per ' + str(BATCH_ITEMS) + ' items':<28}{'batch ms':>12}")
+    for name, validator, (_, _, payload) in (
+            ("contacts", ContactValidator, PAYLOADS["contact"]),
+            ("deals", DealValidator, PAYLOADS["deal"]),
+            ("tickets", SupportTicketValidator, PAYLOADS["ticket"])):
+        # Every tenth item is invalid
+        items = [payload if i % 10 else {"properties": {}} for i in range(BATCH_ITEMS)]
+        batch_ms = timeit.timeit(
+            lambda: validator.validate_batch_items(items), number=BATCH_ROUNDS) / BATCH_ROUNDS * 1e3
+        print(f"{name:<28}{batch_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
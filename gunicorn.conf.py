@@ -0,0 +1,7 @@
+"""gunicorn settings, read by gunicorn from the working directory."""
+
+
+def on_starting(server):
+    # Metrics of an earlier run must not count towards this one
+    from app.utils.metrics import metrics
+    metrics.clear()
@@ -0,0 +1,31 @@
+"""widen users.password_hash
+
+Revision ID: 3f1c9e6b2d47
+Revises: 88eb5a7c8af8
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9e6b2d47'
+down_revision: Union[str, None] = '88eb5a7c8af8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Room for hashes of every PASSWORD_HASH_METHOD, e.g. pbkdf2:sha512
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column('password_hash', existing_type=sa.String(length=128),
+                              type_=sa.String(length=255), existing_nullable=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column('password_hash', existing_type=sa.String(length=255),
+                              type_=sa.String(length=128), existing_nullable=False)
@@ -0,0 +1,32 @@
+"""add users.username_lower
+
+Revision ID: 88eb5a7c8af8
+Revises: 1c0d5e2a9b71
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '88eb5a7c8af8'
+down_revision: Union[str, None] = '1c0d5e2a9b71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('username_lower', sa.String(length=80), nullable=True))
+    # Registration always rejected case-insensitive duplicates, so the backfill is unique
+    op.execute("UPDATE users SET username_lower = lower(username)")
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column('username_lower', existing_type=sa.String(length=80), nullable=False)
+    op.create_index('ix_users_username_lower', 'users', ['username_lower'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_username_lower', table_name='users')
+    op.drop_column('users', 'username_lower')
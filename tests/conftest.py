@@ -1,4 +1,5 @@
 import os
+import queue
 import pytest
 import uuid
 from app import create_app
@@ -90,3 +91,187 @@ def auth_token(app, client, test_user):
 def auth_headers(auth_token):
     """Get headers with authentication"""
     return {"Authorization": f"Bearer {auth_token}"}
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis commands used by the cache layers"""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.subscribers = []
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value if isinstance(value, bytes) else str(value)
+        self.ttls[key] = ttl
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def hset(self, key, field, value):
+        self.data.setdefault(key, {})[str(field)] = str(value)
+
+    def expire(self, key, ttl):
+        self.ttls[key] = ttl
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def zremrangebyscore(self, key, low, high):
+        members = self.data.get(key, {})
+        for member, score in list(members.items()):
+            if float(low) <= score <= float(high):
+                del members[member]
+
+    def zrangebyscore(self, key, low, high, withscores=False):
+        members = sorted((score, member) for member, score in self.data.get(key, {}).items()
+                         if float(low) <= score <= float(high))
+        if withscores:
+            return [(member, score) for score, member in members]
+        return [member for score, member in members]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        return FakeLock(self, name)
+
+    def publish(self, channel, message):
+        for pubsub in list(self.subscribers):
+            if channel in pubsub.channels:
+                pubsub.messages.put({"type": "message", "channel": channel, "data": message})
+        return len(self.subscribers)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        pubsub = FakePubSub()
+        self.subscribers.append(pubsub)
+        return pubsub
+
+
+class FakePubSub:
+    """Delivers messages published on FakeRedis to a listening thread"""
+
+    def __init__(self):
+        self.channels = set()
+        self.messages = queue.Queue()
+
+    def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class FakeLock:
+    """Non-blocking lock stored as a key of FakeRedis"""
+
+    def __init__(self, redis, name):
+        self.redis = redis
+        self.name = name
+
+    def acquire(self, blocking=None):
+        return bool(self.redis.set(self.name, "1", nx=True))
+
+    def locked(self):
+        return self.redis.get(self.name) is not None
+
+    def release(self):
+        self.redis.delete(self.name)
+
+
+class FakePipeline:
+    """Queues commands and runs them against FakeRedis on execute()"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args, **kwargs)
+                for name, args, kwargs in self.commands]
+
+
+@pytest.fixture
+def fake_redis_client():
+    """A RedisClient whose connection is an in-memory FakeRedis"""
+    from app.redis.redis_client import RedisClient
+
+    # The process-wide L1 cache is left out, tests that need one bring their own
+    redis_client = RedisClient(local_cache=None)
+    redis_client.client = FakeRedis()
+    redis_client.binary_client = redis_client.client
+    return redis_client
+
+
+class InlineExecutor:
+    """Runs submitted work immediately, so background refreshes finish within a test"""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@pytest.fixture
+def inline_executor():
+    return InlineExecutor()
+
+
+@pytest.fixture
+def fake_page_caches(fake_redis_client, inline_executor):
+    """Point the CRM listing caches of app.services at an in-memory FakeRedis"""
+    from unittest.mock import patch
+    from app.redis.cursor_cache import CursorCache
+    from app.redis.generations import GenerationCounter
+    from app.redis.page_cache import PageCache
+
+    page_cache = PageCache(fake_redis_client, executor=inline_executor)
+    with patch("app.services.redis_client", fake_redis_client), \
+            patch("app.services.page_cache", page_cache), \
+            patch("app.services.cursor_cache", CursorCache(fake_redis_client)), \
+            patch("app.services.generations", GenerationCounter(fake_redis_client)):
+        yield page_cache
+
+
+@pytest.fixture
+def l1_redis_client(fake_redis_client):
+    """fake_redis_client with its own subscribed L1 cache"""
+    import time
+    from app.redis.local_cache import LocalCache
+
+    fake_redis_client.local_cache = LocalCache(max_bytes=10000, ttl=60)
+    fake_redis_client.local_cache.listen(fake_redis_client.client)
+    # The listener empties the L1 once it has subscribed, let that happen first
+    deadline = time.monotonic() + 2
+    while (not any(pubsub.channels for pubsub in fake_redis_client.client.subscribers)
+           and time.monotonic() < deadline):
+        time.sleep(0.01)
+    time.sleep(0.05)
+    return fake_redis_client
@@ -0,0 +1,184 @@
+import time
+import inspect
+import logging
+from unittest.mock import MagicMock, patch
+import pytest
+from redis.exceptions import ConnectionError
+from flask_jwt_extended import (JWTManager, create_access_token, create_refresh_token,
+                                decode_token, get_jwt_identity, verify_jwt_in_request)
+from flask_jwt_extended.exceptions import RevokedTokenError, WrongTokenError
+from app.middleware.auth import ClaimCache
+from app.redis.revocation import RevocationSet
+
+
+@pytest.fixture
+def revocations(fake_redis_client):
+    """Revocation set over FakeRedis, used by the middleware and the blocklist loader"""
+    revoked = RevocationSet(fake_redis_client)
+    with patch("app.middleware.auth.revoked_tokens", revoked), \
+            patch("app.routes.auth.revoked_tokens", revoked), \
+            patch("app.revoked_tokens", revoked):
+        yield revoked
+
+
+def wait_for_subscribers(redis, count):
+    deadline = time.monotonic() + 2
+    while (sum(bool(pubsub.channels) for pubsub in redis.subscribers) < count
+           and time.monotonic() < deadline):
+        time.sleep(0.01)
+    time.sleep(0.05)
+
+
+class StopListening(BaseException):
+    """Ends a listener loop from a patched time.sleep"""
+
+
+def run_listener(revoked, circuit_open=False, attempts=5):
+    """Run revoked._listen until it has slept attempts times, return the pauses"""
+    delays = []
+
+    def sleep(seconds):
+        delays.append(seconds)
+        if len(delays) >= attempts:
+            raise StopListening()
+
+    with patch("app.redis.revocation.time.sleep", sleep), \
+            patch("app.redis.revocation.circuit_of", return_value=MagicMock(is_open=circuit_open)):
+        with pytest.raises(StopListening):
+            revoked._listen()
+    return delays
+
+
+class TestRevocationSet:
+    """Test the locally mirrored revocation set"""
+
+    def test_revocations_reach_other_processes(self, fake_redis_client):
+        """Test that a revocation is seen by an already listening process"""
+        here, elsewhere = RevocationSet(fake_redis_client), RevocationSet(fake_redis_client)
+        elsewhere.listen()
+        wait_for_subscribers(fake_redis_client.client, 1)
+
+        here.revoke("jti-1", time.time() + 60)
+
+        deadline = time.monotonic() + 2
+        while not elsewhere.is_revoked("jti-1") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert here.is_revoked("jti-1")
+        assert elsewhere.is_revoked("jti-1")
+        assert not elsewhere.is_revoked("jti-2")
+
+    def test_new_process_loads_unexpired_revocations(self, fake_redis_client):
+        """Test that a listener starts from the revocations stored in Redis"""
+        RevocationSet(fake_redis_client).revoke("expired", time.time() - 1)
+        RevocationSet(fake_redis_client).revoke("active", time.time() + 60)
+
+        late = RevocationSet(fake_redis_client)
+        late.listen()
+        wait_for_subscribers(fake_redis_client.client, 3)
+
+        assert late.is_revoked("active")
+        assert not late.is_revoked("expired")
+        # Expired entries are pruned from Redis on the next revocation
+        assert "expired" not in fake_redis_client.client.data["revoked_tokens"]
+
+    def test_listener_backs_off_and_logs_once(self, caplog):
+        """Test that resubscribing waits longer after each failure and warns once"""
+        redis_client = MagicMock()
+        redis_client.client.pubsub.side_effect = ConnectionError("refused")
+
+        with caplog.at_level(logging.WARNING, logger="app.redis.revocation"):
+            delays = run_listener(RevocationSet(redis_client), attempts=7)
+
+        assert delays == [1, 2, 4, 8, 16, 30, 30]
+        assert len(caplog.records) == 1
+
+    def test_listener_waits_for_open_circuit(self):
+        """Test that no subscription is attempted while the Redis circuit is open"""
+        redis_client = MagicMock()
+
+        run_listener(RevocationSet(redis_client), circuit_open=True)
+
+        redis_client.client.pubsub.assert_not_called()
+
+
+class TestClaimCache:
+    """Test the cache of verified token claims"""
+
+    def test_entries_expire_with_the_token(self):
+        """Test that an expired token is not served from the cache"""
+        cache = ClaimCache(max_entries=10)
+        cache.set("fresh", {"exp": time.time() + 60})
+        cache.set("expired", {"exp": time.time() - 1})
+
+        assert cache.get("fresh")["exp"] > time.time()
+        assert cache.get("expired") is None
+
+    def test_least_recently_used_are_dropped(self):
+        """Test that the cache holds at most max_entries tokens"""
+        cache = ClaimCache(max_entries=2)
+        exp = {"exp": time.time() + 60}
+        cache.set("a", exp)
+        cache.set("b", exp)
+        cache.get("a")
+        cache.set("c", exp)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+
+class TestCachingJWTManager:
+    """Test that only the token decoding of verify_jwt_in_request is cached"""
+
+    def test_decode_method_is_unchanged(self):
+        """Test that the overridden Flask-JWT-Extended method still exists as expected"""
+        parameters = inspect.signature(JWTManager._decode_jwt_from_config).parameters
+
+        assert list(parameters) == ["self", "encoded_token", "csrf_value", "allow_expired"]
+
+    def test_second_request_skips_decoding(self, app, revocations):
+        """Test that a verified token is decoded once and still fully checked"""
+        token = create_access_token(identity="42")
+        headers = {"Authorization": f"Bearer {token}"}
+
+        with app.test_request_context(headers=headers):
+            verify_jwt_in_request()
+            assert get_jwt_identity() == "42"
+
+        with patch("flask_jwt_extended.jwt_manager._decode_jwt") as decode, \
+                app.test_request_context(headers=headers):
+            verify_jwt_in_request()
+            decode.assert_not_called()
+            assert get_jwt_identity() == "42"
+
+    def test_token_type_is_checked_on_cache_hit(self, app, revocations):
+        """Test that a cached refresh token is still refused as an access token"""
+        token = create_refresh_token(identity="42")
+        headers = {"Authorization": f"Bearer {token}"}
+        with app.test_request_context(headers=headers):
+            verify_jwt_in_request(refresh=True)
+
+        with app.test_request_context(headers=headers):
+            with pytest.raises(WrongTokenError):
+                verify_jwt_in_request()
+
+    def test_revoked_token_is_rejected(self, app, revocations):
+        """Test that a cached token is rejected once revoked"""
+        token = create_access_token(identity="42")
+        headers = {"Authorization": f"Bearer {token}"}
+        with app.test_request_context(headers=headers):
+            verify_jwt_in_request()
+
+        claims = decode_token(token)
+        revocations.revoke(claims["jti"], claims["exp"])
+
+        with app.test_request_context(headers=headers):
+            with pytest.raises(RevokedTokenError):
+                verify_jwt_in_request()
+
+    def test_logout_revokes_token(self, app, client, revocations):
+        """Test that a token cannot be used after logging out with it"""
+        headers = {"Authorization": f"Bearer {create_access_token(identity='42')}"}
+
+        assert client.post("/api/auth/logout", headers=headers).status_code == 200
+        assert client.post("/api/auth/logout", headers=headers).status_code == 401
@@ -0,0 +1,77 @@
+from unittest.mock import patch
+from flask_jwt_extended import create_access_token
+from app.validations.contact_validator import ContactValidator
+from app.validations.deal_validator import DealValidator
+from app.validations.support_ticket_validator import SupportTicketValidator
+
+
+def contact(email, **properties):
+    return {"properties": {"email": email, **properties}}
+
+
+class TestBatchValidation:
+    """Test validating whole batch payloads in one pass"""
+
+    def test_errors_by_index_and_valid_subset(self):
+        """Test that invalid items are reported by index and the rest is kept"""
+        items = [contact("A@example.com"), contact("broken"), "not an object",
+                 contact("b@example.com", phone="12")]
+
+        valid, errors = ContactValidator.validate_batch_items(items)
+
+        assert valid == [(0, contact("a@example.com"))]
+        assert errors == {
+            1: {"properties.email": "Invalid email format."},
+            2: {"payload": "payload must be an object"},
+            3: {"properties.phone": "Phone must be at least 8 characters"},
+        }
+
+    def test_deal_items(self):
+        """Test that deal items only require their dealname"""
+        valid, errors = DealValidator.validate_batch_items([
+            {"properties": {"dealname": "Renewal"}},
+            {"properties": {"dealname": "Renewal", "amount": "1500"}},
+            {"properties": {}},
+        ])
+
+        assert [index for index, _ in valid] == [0]
+        assert errors == {1: {"properties.amount": "amount must be a number."},
+                          2: {"properties.dealname": "dealname is required"}}
+
+    def test_ticket_items(self):
+        """Test that ticket items need every create field"""
+        valid, errors = SupportTicketValidator.validate_batch_items([{"properties": {
+            "subject": "Login broken", "description": "Cannot log in", "category": "Product",
+            "pipeline": "0", "hs_ticket_priority": "HIGH"}}])
+
+        assert valid == []
+        assert errors == {0: {"properties.hs_pipeline_stage": "hs_pipeline_stage is required"}}
+
+    def test_blank_required_string(self):
+        """Test that a required text made of whitespace counts as missing"""
+        _, errors = ContactValidator.validate_batch_items([contact("   ")])
+
+        assert errors == {0: {"properties.email": "email is required"}}
+
+
+class TestBatchRoute:
+    """Test that batch endpoints write the valid subset"""
+
+    def test_invalid_items_do_not_stop_the_batch(self, app, client):
+        """Test that only valid contacts reach HubSpot and indexes match the request"""
+        headers = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+        inputs = [contact("bad"), contact("new@example.com"), contact("old@example.com")]
+
+        with patch("app.routes.integration.contact_service") as service:
+            service.batch_create_or_update_contacts.return_value = [
+                {"index": 0, "status": "created", "id": "2"},
+                {"index": 1, "status": "updated", "id": "1"},
+            ]
+            response = client.post("/api/contacts/batch", json={"inputs": inputs}, headers=headers)
+
+        assert service.batch_create_or_update_contacts.call_args[0][0] == inputs[1:]
+        body = response.get_json()
+        assert [(result["index"], result["status"]) for result in body["results"]] == [
+            (0, "error"), (1, "created"), (2, "updated")]
+        assert body["results"][0]["details"] == {"properties.email": "Invalid email format."}
+        assert body["summary"] == {"created": 1, "updated": 1, "error": 1}
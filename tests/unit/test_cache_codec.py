@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+from hubspot.crm.contacts import SimplePublicObject
+from app.redis.codec import CacheCodec, to_plain, RAW, COMPRESSED
+
+
+def contact(contact_id):
+    return SimplePublicObject(
+        id=str(contact_id),
+        properties={"email": f"user{contact_id}@example.com", "firstname": "Jane"},
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        updated_at=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        archived=False)
+
+
+class TestCacheCodec:
+    """Test the cache codec and SDK model conversion"""
+
+    def test_to_plain_converts_sdk_models(self):
+        """Test that SDK models become JSON-ready dicts"""
+        plain = to_plain([contact(1)])
+
+        assert plain[0]["id"] == "1"
+        assert plain[0]["properties"]["email"] == "user1@example.com"
+        assert plain[0]["created_at"] == "2024-01-01T00:00:00+00:00"
+
+    def test_round_trip_small_value_is_not_compressed(self):
+        """Test that values under the threshold are stored raw"""
+        codec = CacheCodec(compress_threshold=1024)
+        value = {"results": to_plain([contact(1)]), "next_after": "2"}
+
+        data = codec.encode(value)
+
+        assert data[:1] == RAW
+        assert codec.decode(data) == value
+
+    def test_round_trip_large_value_is_compressed(self):
+        """Test that values over the threshold are compressed"""
+        codec = CacheCodec(compress_threshold=1024)
+        value = {"results": to_plain([contact(i) for i in range(100)]), "next_after": None}
+
+        data = codec.encode(value)
+
+        assert data[:1] == COMPRESSED
+        assert len(data) < len(CacheCodec(compress_threshold=10 ** 9).encode(value))
+        assert codec.decode(data) == value
+
+    def test_old_entries_are_a_miss(self, fake_redis_client):
+        """Test that values cached in the old JSON text format read as a miss"""
+        fake_redis_client.client.setex("contacts_page_first_size_10", 60, '{"results": []}')
+
+        assert fake_redis_client.get_cache_value("contacts_page_first_size_10") is None
+
+        fake_redis_client.set_cache_value("contacts_page_first_size_10", {"results": []})
+        assert fake_redis_client.get_cache_value("contacts_page_first_size_10") == {"results": []}
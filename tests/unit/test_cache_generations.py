@@ -0,0 +1,59 @@
+import logging
+from types import SimpleNamespace
+from unittest.mock import patch, PropertyMock, MagicMock
+from app.redis.fallback import FallbackStore
+from app.redis.generations import GenerationCounter
+from app.services.deal_service import DealService
+
+
+class TestCacheGenerations:
+    """Test write-aware invalidation of cached listings"""
+
+    def test_counter_starts_from_clock_and_bumps(self, fake_redis_client):
+        """Test that a lost counter restarts above any earlier generation"""
+        counter = GenerationCounter(fake_redis_client)
+
+        first = counter.current("deals")
+        counter.bump("deals")
+        assert counter.current("deals") == first + 1
+
+        # A counter evicted from Redis does not go back to an old number
+        fake_redis_client.client.delete("deals_generation")
+        with patch("app.redis.generations.time.time", return_value=first / 1000 + 60):
+            assert counter.current("deals") > first + 1
+
+    def test_degraded_mode_counts_locally(self, fake_redis_client, caplog):
+        """Test that writes bump a local generation while the Redis circuit is open"""
+        fake_redis_client.fallback = FallbackStore(max_bytes=10000)
+        counter = GenerationCounter(fake_redis_client)
+
+        with patch("app.redis.generations.circuit_of", return_value=MagicMock(is_open=True)), \
+                caplog.at_level(logging.WARNING, logger="app.redis"):
+            first = counter.current("deals")
+            counter.current_many(["deals"])
+            counter.bump("deals")
+            assert counter.current("deals") == first + 1
+
+        # Redis was not asked, so the outage logged nothing
+        assert "deals_generation" not in fake_redis_client.client.data
+        assert caplog.records == []
+
+    def test_write_invalidates_cached_pages(self, fake_page_caches):
+        """Test that a deal write makes the next listing come from HubSpot"""
+        api = MagicMock()
+        api.basic_api.get_page.return_value = SimpleNamespace(
+            results=[{"id": "1"}], paging=None)
+        api.basic_api.create.return_value = SimpleNamespace(id="2", to_dict=lambda: {"id": "2"})
+        client = SimpleNamespace(crm=SimpleNamespace(deals=api))
+
+        with patch.object(DealService, "client", new_callable=PropertyMock, return_value=client), \
+                patch("app.services.deal_service.deal_index"):
+            service = DealService()
+            service.get_recent_deals(1, 10)
+            service.get_recent_deals(1, 10)
+            assert api.basic_api.get_page.call_count == 1
+
+            service._create_deal({"properties": {"dealname": "New deal"}})
+
+            service.get_recent_deals(1, 10)
+            assert api.basic_api.get_page.call_count == 2
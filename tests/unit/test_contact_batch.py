@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, PropertyMock, patch
+import pytest
+from app.services import BatchUpsertMixin, HubSpotClient
+from app.services.contact_service import ContactService
+from app.services.support_ticket_service import SupportTicketService
+
+
+def contact(contact_id, email):
+    return SimpleNamespace(id=contact_id, properties={"email": email})
+
+
+class TestBatchContactUpsert:
+    """Test the batch contact upsert"""
+
+    def test_chunk_uses_one_read_and_batch_writes(self):
+        """Test that a chunk resolves existence once and writes in batches"""
+        client = MagicMock()
+        batch_api = client.crm.contacts.batch_api
+        batch_api.read.return_value = SimpleNamespace(results=[contact("1", "old@example.com")])
+        batch_api.create.return_value = SimpleNamespace(results=[contact("2", "new@example.com")])
+        batch_api.update.return_value = SimpleNamespace(results=[contact("1", "old@example.com")])
+
+        inputs = [
+            {"properties": {"email": "Old@Example.com", "firstname": "Old"}},
+            {"properties": {"email": "new@example.com", "firstname": "New"}},
+            {"properties": {"firstname": "No email"}},
+        ]
+
+        with patch.object(HubSpotClient, "client", new_callable=PropertyMock, return_value=client):
+            results = ContactService().batch_create_or_update_contacts(inputs)
+
+        assert batch_api.read.call_count == 1
+        assert batch_api.create.call_count == 1
+        assert batch_api.update.call_count == 1
+        assert batch_api.update.call_args[0][0]["inputs"] == [
+            {"id": "1", "properties": {"email": "Old@Example.com", "firstname": "Old"}}
+        ]
+        assert [r["status"] for r in results] == ["updated", "created", "error"]
+        assert results[1]["id"] == "2"
+
+    def test_keys_resolving_to_one_contact(self):
+        """Test that two emails of one contact each get a result and one update"""
+        client = MagicMock()
+        batch_api = client.crm.contacts.batch_api
+        batch_api.read.return_value = SimpleNamespace(results=[
+            contact("1", "first@example.com"), contact("1", "second@example.com")])
+        batch_api.update.return_value = SimpleNamespace(results=[contact("1", "second@example.com")])
+
+        inputs = [
+            {"properties": {"email": "first@example.com", "firstname": "First"}},
+            {"properties": {"email": "second@example.com", "firstname": "Second"}},
+        ]
+
+        with patch.object(HubSpotClient, "client", new_callable=PropertyMock, return_value=client):
+            results = ContactService().batch_create_or_update_contacts(inputs)
+
+        assert batch_api.update.call_args[0][0]["inputs"] == [
+            {"id": "1", "properties": {"email": "second@example.com", "firstname": "Second"}}
+        ]
+        assert [r["status"] for r in results] == ["error", "updated"]
+        assert results[0]["error"] == "Contact is also matched by second@example.com"
+
+    def test_inputs_are_chunked(self):
+        """Test that inputs are sent to HubSpot in chunks of 100"""
+        client = MagicMock()
+        batch_api = client.crm.contacts.batch_api
+        batch_api.read.return_value = SimpleNamespace(results=[])
+        batch_api.create.side_effect = lambda body: SimpleNamespace(results=[
+            contact(item["properties"]["email"], item["properties"]["email"])
+            for item in body["inputs"]
+        ])
+
+        inputs = [{"properties": {"email": f"user{i}@example.com"}} for i in range(250)]
+
+        with patch.object(HubSpotClient, "client", new_callable=PropertyMock, return_value=client):
+            results = ContactService().batch_create_or_update_contacts(inputs)
+
+        assert batch_api.read.call_count == 3
+        assert batch_api.create.call_count == 3
+        batch_api.update.assert_not_called()
+        assert all(result["status"] == "created" for result in results)
+
+    def test_only_keyed_services_batch_upsert(self):
+        """Test that batch upserts need a service that resolves its keys"""
+        class UnkeyedService(BatchUpsertMixin, HubSpotClient):
+            object_type = "tickets"
+
+        assert not hasattr(SupportTicketService(), "batch_create_or_update")
+        with pytest.raises(TypeError):
+            UnkeyedService()
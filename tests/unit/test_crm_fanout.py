@@ -0,0 +1,90 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from app.config import Config
+from app.routes.integration import _fetch_sections
+
+
+class TestCrmFanout:
+    """Test the concurrent section fetches behind /new_crm_objects"""
+
+    def test_sections_fetched_concurrently(self):
+        """Test that latency is close to the slowest fetch, not the sum"""
+        def slow_fetch():
+            time.sleep(0.2)
+            return [{"id": "1"}]
+
+        start = time.monotonic()
+        sections, status = _fetch_sections({
+            "contacts": slow_fetch, "deals": slow_fetch, "tickets": slow_fetch})
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 0.4
+        assert status == {"contacts": "ok", "deals": "ok", "tickets": "ok"}
+        assert sections["deals"] == [{"id": "1"}]
+
+    def test_failures_degrade_only_their_section(self):
+        """Test that an error or a timeout only empties its own section"""
+        def failing_fetch():
+            raise RuntimeError("HubSpot unavailable")
+
+        def hanging_fetch():
+            time.sleep(0.5)
+            return [{"id": "late"}]
+
+        with patch.object(Config, "CRM_FETCH_TIMEOUT", 0.1):
+            sections, status = _fetch_sections({
+                "contacts": lambda: [{"id": "1"}],
+                "deals": failing_fetch,
+                "tickets": hanging_fetch,
+            })
+
+        assert status == {"contacts": "ok", "deals": "error", "tickets": "timeout"}
+        assert sections == {"contacts": [{"id": "1"}], "deals": [], "tickets": []}
+
+    def test_abandoned_fetches_are_cancelled(self):
+        """Test that fetches still queued at the timeout never run and free their slot"""
+        release = threading.Event()
+        started = []
+
+        def hanging_fetch():
+            started.append("contacts")
+            release.wait(2)
+            return []
+
+        def queued_fetch():
+            started.append("deals")
+            return []
+
+        slots = threading.BoundedSemaphore(2)
+        with ThreadPoolExecutor(max_workers=1) as executor, \
+                patch("app.routes.integration.fetch_executor", executor), \
+                patch("app.routes.integration.fetch_slots", slots), \
+                patch.object(Config, "CRM_FETCH_TIMEOUT", 0.1):
+            _, status = _fetch_sections({"contacts": hanging_fetch, "deals": queued_fetch})
+            # The cancelled fetch gave its slot back at once
+            assert slots.acquire(blocking=False)
+            release.set()
+
+        assert status == {"contacts": "timeout", "deals": "timeout"}
+        assert started == ["contacts"]
+
+    def test_saturated_executor_reports_busy(self):
+        """Test that sections are not queued behind hung fetches once every slot is taken"""
+        release = threading.Event()
+
+        with patch("app.routes.integration.fetch_slots", threading.BoundedSemaphore(1)), \
+                patch.object(Config, "CRM_FETCH_TIMEOUT", 0.05):
+            # Abandoned by its request, the hung fetch keeps running
+            _, hung = _fetch_sections({"contacts": lambda: release.wait(2)})
+
+            start = time.monotonic()
+            sections, status = _fetch_sections({"deals": lambda: [{"id": "1"}]})
+            elapsed = time.monotonic() - start
+            release.set()
+
+        assert hung == {"contacts": "timeout"}
+        assert status == {"deals": "busy"}
+        assert sections == {"deals": []}
+        assert elapsed < 0.05
@@ -0,0 +1,104 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch, PropertyMock, MagicMock
+from app.services.crm_search import SearchQuery
+from app.services.contact_service import ContactService
+from app.services.deal_service import DealService
+
+
+class TestSearchQuery:
+    """Test parsing of filter_by and sort_by"""
+
+    def test_parse_filters_and_sort(self):
+        """Test property filters, free text and a descending sort"""
+        query = SearchQuery.from_args(
+            ["email:contains_token:*@example.com", "createdate:GT:2024-01-01T00:00:00Z",
+             "phone:HAS_PROPERTY", "jane"], "-createdate")
+
+        assert query.filters == [
+            ("email", "CONTAINS_TOKEN", "*@example.com"),
+            ("createdate", "GT", "2024-01-01T00:00:00Z"),
+            ("phone", "HAS_PROPERTY", None),
+        ]
+        assert query.text == "jane"
+        assert (query.sort_by, query.descending) == ("createdate", True)
+        assert not query.is_listing
+
+    def test_default_query_uses_list_api(self):
+        """Test that no filter and the default sort keep the list API"""
+        assert SearchQuery.from_args([], "id").is_listing
+        assert SearchQuery.from_args(["archived:EQ:false"], "id").is_listing
+
+    def test_invalid_filters(self):
+        """Test that malformed filters are rejected"""
+        with pytest.raises(ValueError):
+            SearchQuery.from_args(["email:EQ:"], "id")
+        with pytest.raises(ValueError):
+            SearchQuery.from_args(["bad name:EQ:x"], "id")
+        with pytest.raises(ValueError):
+            SearchQuery.from_args([], "name;drop")
+
+    def test_local_fields_apply_to_page(self):
+        """Test the Python fallback for fields HubSpot cannot search on"""
+        query = SearchQuery.from_args(["archived:EQ:true"], "-archived_at")
+        objects = [
+            {"id": "1", "archived": True, "archived_at": "2024-01-01"},
+            {"id": "2", "archived": False, "archived_at": None},
+            {"id": "3", "archived": True, "archived_at": "2024-03-01"},
+        ]
+
+        assert [o["id"] for o in query.apply_local(objects)] == ["3", "1"]
+
+
+class TestSearchPushdown:
+    """Test that filters and sorts are sent to the HubSpot search API"""
+
+    def _patch_client(self, service_class, api):
+        client = SimpleNamespace(crm=SimpleNamespace(**{service_class.object_type: api}))
+        return patch.object(service_class, "client", new_callable=PropertyMock,
+                            return_value=client)
+
+    def test_search_request_sent(self, fake_page_caches):
+        """Test the filterGroups, query and sorts of a search"""
+        api = MagicMock()
+        api.search_api.do_search.return_value = SimpleNamespace(
+            results=[{"id": "7"}], paging=SimpleNamespace(next=SimpleNamespace(after="10")))
+        query = SearchQuery.from_args(["updated_at:GTE:1700000000000", "acme"], "-id")
+
+        with self._patch_client(ContactService, api):
+            objects, next_after = ContactService().get_recent_contacts(1, 10, query=query)
+
+        api.basic_api.get_page.assert_not_called()
+        api.search_api.do_search.assert_called_once_with({
+            "filterGroups": [{"filters": [{
+                "propertyName": "lastmodifieddate", "operator": "GTE", "value": "1700000000000"}]}],
+            "query": "acme",
+            "sorts": [{"propertyName": "hs_object_id", "direction": "DESCENDING"}],
+            "limit": 10,
+            "properties": ["email", "firstname", "lastname", "phone", "createdate", "lastmodifieddate"],
+        })
+        assert (objects, next_after) == ([{"id": "7"}], "10")
+
+    def test_search_pages_follow_cursors(self, fake_page_caches):
+        """Test that a later page of a search starts from the stored cursor"""
+        api = MagicMock()
+
+        def do_search(search_request):
+            start = int(search_request.get("after", 0))
+            return SimpleNamespace(
+                results=[{"id": str(start + i)} for i in range(search_request["limit"])],
+                paging=SimpleNamespace(next=SimpleNamespace(after=str(start + search_request["limit"]))))
+
+        api.search_api.do_search.side_effect = do_search
+        query = SearchQuery.from_args(["dealstage:EQ:closedwon"], "amount")
+
+        with self._patch_client(DealService, api):
+            objects, _ = DealService().get_recent_deals(3, 5, query=query)
+            assert [o["id"] for o in objects] == ["10", "11", "12", "13", "14"]
+
+            # A different search does not reuse these cursors
+            other = SearchQuery.from_args(["dealstage:EQ:closedlost"], "amount")
+            DealService().get_recent_deals(2, 5, query=other)
+
+        afters = [call.args[0].get("after") for call in api.search_api.do_search.call_args_list]
+        assert afters == [None, "5", "10", None, "5"]
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, PropertyMock, patch
+from app.services import HubSpotClient
+from app.services.deal_service import DealService
+
+
+def deal(deal_id, name):
+    return SimpleNamespace(id=deal_id, properties={"dealname": name})
+
+
+class TestBatchDealUpsert:
+    """Test the batch deal upsert"""
+
+    def test_names_resolved_with_one_search(self):
+        """Test that a chunk is resolved with one IN search and written in batches"""
+        client = MagicMock()
+        client.crm.deals.search_api.do_search.return_value = SimpleNamespace(
+            results=[deal("7", "Acme Renewal")], paging=None)
+        batch_api = client.crm.deals.batch_api
+        batch_api.create.return_value = SimpleNamespace(results=[deal("8", "Globex Renewal")])
+        batch_api.update.return_value = SimpleNamespace(results=[deal("7", "Acme Renewal")])
+
+        inputs = [
+            {"properties": {"dealname": "Acme Renewal", "amount": 100}},
+            {"properties": {"dealname": "Globex Renewal", "amount": 200}},
+        ]
+
+        with patch.object(HubSpotClient, "client", new_callable=PropertyMock, return_value=client):
+            results = DealService().batch_create_or_update_deals(inputs)
+
+        search_request = client.crm.deals.search_api.do_search.call_args[0][0]
+        assert search_request["filterGroups"][0]["filters"][0]["operator"] == "IN"
+        assert sorted(search_request["filterGroups"][0]["filters"][0]["values"]) == [
+            "acme renewal", "globex renewal"]
+        assert [(r["status"], r["id"]) for r in results] == [("updated", "7"), ("created", "8")]
+
+    def test_failed_chunk_reports_errors(self):
+        """Test that a failed batch write marks only its items as errors"""
+        from hubspot.crm.deals import ApiException
+
+        client = MagicMock()
+        client.crm.deals.search_api.do_search.return_value = SimpleNamespace(results=[], paging=None)
+        client.crm.deals.batch_api.create.side_effect = ApiException(status=400, reason="Bad Request")
+
+        inputs = [{"properties": {"dealname": "Broken Deal"}}, {"properties": {}}]
+
+        with patch.object(HubSpotClient, "client", new_callable=PropertyMock, return_value=client):
+            results = DealService().batch_create_or_update_deals(inputs)
+
+        assert results[0]["status"] == "error"
+        assert results[0]["status_code"] == 400
+        assert results[1] == {"index": 1, "status": "error", "error": "dealname is required"}
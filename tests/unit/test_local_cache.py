@@ -0,0 +1,123 @@
+import time
+import logging
+from unittest.mock import MagicMock, patch
+import pytest
+from redis.exceptions import ConnectionError
+from app.redis.local_cache import LocalCache
+from app.redis.redis_client import RedisClient
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class StopListening(BaseException):
+    """Ends a listener loop from a patched time.sleep"""
+
+
+def run_listener(cache, client, circuit_open=False, attempts=5):
+    """Run cache._listen until it has slept attempts times, return the pauses"""
+    delays = []
+
+    def sleep(seconds):
+        delays.append(seconds)
+        if len(delays) >= attempts:
+            raise StopListening()
+
+    with patch("app.redis.local_cache.time.sleep", sleep), \
+            patch("app.redis.local_cache.circuit_of", return_value=MagicMock(is_open=circuit_open)):
+        with pytest.raises(StopListening):
+            cache._listen(client)
+    return delays
+
+
+class TestLocalCache:
+    """Test the in-process L1 cache"""
+
+    def test_lru_eviction_by_size(self):
+        """Test that the least recently used entries go once max_bytes is exceeded"""
+        cache = LocalCache(max_bytes=100, ttl=60)
+        cache.set("a", "A", 40)
+        cache.set("b", "B", 40)
+        cache.get("a")
+        cache.set("c", "C", 40)
+
+        assert cache.get("a") == (True, "A")
+        assert cache.get("b") == (False, None)
+        assert cache.stats()["bytes"] == 80
+        assert cache.stats()["evictions"] == 1
+
+    def test_entry_ttl(self):
+        """Test that an entry is never served past its TTL"""
+        cache = LocalCache(max_bytes=100, ttl=60)
+        cache.set("a", "A", 1, ttl=0)
+
+        assert cache.get("a") == (False, None)
+
+    def test_l1_in_front_of_redis(self, l1_redis_client):
+        """Test that a value read once is served from memory afterwards"""
+        redis_client = l1_redis_client
+        other = RedisClient(local_cache=None)
+        other.client = other.binary_client = redis_client.client
+        other.set_cache_value("page", {"results": [1]})
+
+        assert redis_client.get_cache_value("page") == {"results": [1]}
+        redis_client.client.delete("page")
+        assert redis_client.get_cache_value("page") == {"results": [1]}
+
+        stats = redis_client.local_cache.stats()
+        assert (stats["l1_hits"], stats["l2_hits"], stats["l2_misses"]) == (1, 1, 0)
+
+    def test_writes_invalidate_other_processes(self, fake_redis_client):
+        """Test that a write by one replica drops the key from another's L1"""
+        shared = fake_redis_client.client
+        replicas = []
+        for _ in range(2):
+            replica = RedisClient(local_cache=LocalCache(max_bytes=10000, ttl=60))
+            replica.client = replica.binary_client = shared
+            replicas.append(replica)
+        first, second = replicas
+
+        first.set_cache_value("page", "v1")
+        assert second.get_cache_value("page") == "v1"
+        assert wait_for(lambda: len(shared.subscribers) == 2)
+
+        first.set_cache_value("page", "v2")
+
+        assert wait_for(lambda: second.local_cache.stats()["invalidations"] == 1)
+        assert second.get_cache_value("page") == "v2"
+        # A process ignores its own invalidations
+        assert first.local_cache.stats()["invalidations"] == 0
+
+    def test_listener_backs_off_and_logs_once(self, caplog):
+        """Test that resubscribing waits longer after each failure and warns once"""
+        client = MagicMock()
+        client.pubsub.side_effect = ConnectionError("refused")
+
+        with caplog.at_level(logging.WARNING, logger="app.redis.local_cache"):
+            delays = run_listener(LocalCache(), client, attempts=7)
+
+        assert delays == [1, 2, 4, 8, 16, 30, 30]
+        assert len(caplog.records) == 1
+
+    def test_listener_waits_for_open_circuit(self):
+        """Test that no subscription is attempted while the Redis circuit is open"""
+        client = MagicMock()
+
+        run_listener(LocalCache(), client, circuit_open=True)
+
+        client.pubsub.assert_not_called()
+
+    def test_no_publish_while_circuit_is_open(self):
+        """Test that invalidations are not published, or warned about, during an outage"""
+        client = MagicMock()
+        cache = LocalCache()
+
+        with patch("app.redis.local_cache.circuit_of", return_value=MagicMock(is_open=True)), \
+                patch.object(cache, "listen"):
+            cache.publish(client, "page")
+
+        client.publish.assert_not_called()
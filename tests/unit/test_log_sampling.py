@@ -0,0 +1,117 @@
+import json
+import random
+import logging
+from unittest.mock import patch
+from app.utils.log_sampling import RequestLogSampler, RepeatedMessageFilter
+from app.utils.logging import JSONFormatter
+
+
+def make_record(message, level=logging.INFO, name="app.services.contact_service", args=None):
+    return logging.LogRecord(name, level, __file__, 1, message, args, None)
+
+
+class TestRequestLogSampler:
+    """Test the sampling of request log lines"""
+
+    def test_all_requests_logged_below_threshold(self):
+        """Test that sampling only starts past the per-second threshold"""
+        sampler = RequestLogSampler(rate=0.5, threshold=3, slow_ms=1000)
+        with patch("app.utils.log_sampling.time.monotonic", return_value=100.0), \
+                patch("app.utils.log_sampling.random.random", side_effect=[0.1, 0.9]):
+            weights = [sampler.weight(200, 5) for _ in range(5)]
+
+        assert weights == [1, 1, 1, 2.0, None]
+        assert sampler.stats()["logged"] == 4
+        assert sampler.stats()["sampled_out"] == 1
+
+    def test_threshold_resets_every_second(self):
+        """Test that the count of logged requests starts over each second"""
+        sampler = RequestLogSampler(rate=0, threshold=1, slow_ms=1000)
+        with patch("app.utils.log_sampling.time.monotonic", side_effect=[100.0, 100.5, 101.0]):
+            weights = [sampler.weight(200, 5) for _ in range(3)]
+
+        assert weights == [1, None, 1]
+
+    def test_failed_and_slow_requests_always_logged(self):
+        """Test that 4xx, 5xx and slow requests bypass sampling"""
+        sampler = RequestLogSampler(rate=0, threshold=0, slow_ms=500)
+
+        assert sampler.weight(404, 5) == 1
+        assert sampler.weight(502, 5) == 1
+        assert sampler.weight(200, 750) == 1
+        assert sampler.weight(200, 5) is None
+
+    def test_weights_add_up_to_request_count(self):
+        """Test that summed weights estimate the number of requests"""
+        sampler = RequestLogSampler(rate=0.25, threshold=10, slow_ms=1000)
+        with patch("app.utils.log_sampling.time.monotonic", return_value=100.0), \
+                patch("app.utils.log_sampling.random.random", random.Random(7).random):
+            weights = [sampler.weight(200, 5) for _ in range(4000)]
+
+        total = sum(weight for weight in weights if weight is not None)
+        assert abs(total - 4000) < 400
+
+
+class TestRepeatedMessageFilter:
+    """Test the token bucket per logger and message"""
+
+    def test_repeats_beyond_burst_are_dropped_and_weighed_later(self):
+        """Test that the next record let through stands for the dropped ones"""
+        limit = RepeatedMessageFilter(rate=1, burst=2)
+        with patch("app.utils.log_sampling.time.monotonic", return_value=100.0):
+            passed = [limit.filter(make_record("Created %s", args=(i,))) for i in range(5)]
+        assert passed == [True, True, False, False, False]
+
+        record = make_record("Created %s", args=(5,))
+        with patch("app.utils.log_sampling.time.monotonic", return_value=101.0):
+            assert limit.filter(record)
+        assert record.sample_weight == 4
+        assert limit.stats()["suppressed"] == 3
+
+    def test_buckets_are_per_logger_and_message(self):
+        """Test that other messages and loggers keep their own budget"""
+        limit = RepeatedMessageFilter(rate=1, burst=1)
+        with patch("app.utils.log_sampling.time.monotonic", return_value=100.0):
+            assert limit.filter(make_record("first"))
+            assert not limit.filter(make_record("first"))
+            assert limit.filter(make_record("second"))
+            assert limit.filter(make_record("first", name="app.services.deal_service"))
+
+    def test_warnings_and_sampled_records_pass(self):
+        """Test that warnings, errors and already sampled records are not limited"""
+        limit = RepeatedMessageFilter(rate=1, burst=0)
+        sampled = make_record("Request processed: %s", args=({},))
+        sampled.sample_weight = 10
+
+        assert limit.filter(make_record("Retrying", logging.WARNING))
+        assert limit.filter(make_record("Failed", logging.ERROR))
+        assert limit.filter(sampled)
+        assert not limit.filter(make_record("Created"))
+
+    def test_weight_is_written_to_the_log_file(self):
+        """Test that the JSON line carries the sampling weight"""
+        record = make_record("Request processed: %s", args=({},))
+        record.sample_weight = 10
+
+        assert json.loads(JSONFormatter().format(record))["sample_weight"] == 10
+        assert "sample_weight" not in json.loads(JSONFormatter().format(make_record("plain")))
+
+
+class TestRequestLogging:
+    """Test the sampling decision of LoggingMiddleware"""
+
+    def test_sampled_out_requests_are_not_logged(self, client):
+        with patch("app.middleware.logging.request_log_sampler.weight", return_value=None), \
+                patch("app.middleware.logging.logging.Logger.info") as info:
+            client.get("/health")
+        assert not info.called
+
+    def test_logged_requests_carry_their_weight(self, client):
+        with patch("app.middleware.logging.request_log_sampler.weight", return_value=10.0), \
+                patch("app.middleware.logging.logging.Logger.info") as info:
+            client.get("/health")
+        assert info.call_args.kwargs["extra"] == {"sample_weight": 10.0}
+
+    def test_log_stats_report_sampling(self, client):
+        response = client.get("/log_stats")
+        assert {"request_sampling", "rate_limited"} <= set(response.json)
@@ -0,0 +1,178 @@
+import sys
+import json
+import time
+import logging
+import threading
+import pytest
+from flask import request as flask_request
+from unittest.mock import Mock
+from app.utils.logging import BoundedQueueHandler, JSONFormatter, RequestFormatter, lazy
+
+
+class RecordingHandler(logging.Handler):
+    """Keeps the records it handles and the thread that handled them"""
+
+    def __init__(self, gate=None):
+        super().__init__()
+        self.records = []
+        self.threads = []
+        self.gate = gate
+        self.done = threading.Event()
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.records.append(record)
+        self.threads.append(threading.current_thread())
+        self.done.set()
+
+
+def make_record(message, level=logging.INFO, args=None, exc_info=None):
+    return logging.LogRecord("test", level, __file__, 1, message, args, exc_info)
+
+
+@pytest.fixture
+def pipeline():
+    handlers = []
+
+    def build(*targets, **kwargs):
+        handler = BoundedQueueHandler(list(targets), **kwargs)
+        handlers.append(handler)
+        return handler
+
+    yield build
+    for handler in handlers:
+        handler.close()
+
+
+class TestBoundedQueueHandler:
+    """Test the queue-backed log pipeline"""
+
+    def test_records_are_written_on_the_writer_thread(self, pipeline):
+        """Test that the calling thread only enqueues the record"""
+        target = RecordingHandler()
+        handler = pipeline(target)
+
+        handler.handle(make_record("created %s", args=("contact",)))
+        handler.stop()
+
+        assert [record.getMessage() for record in target.records] == ["created contact"]
+        assert target.threads[0] is not threading.current_thread()
+        assert handler.stats()["enqueued"] == 1
+
+    def test_request_context_is_captured_before_queueing(self, app, pipeline):
+        """Test that the writer thread sees the request of the calling thread"""
+        target = RecordingHandler()
+        target.setFormatter(JSONFormatter())
+        handler = pipeline(target)
+
+        with app.test_request_context("/api/contacts", method="POST"):
+            handler.handle(make_record("Request processed"))
+        handler.stop()
+
+        logged = json.loads(target.format(target.records[0]))
+        assert logged["request"]["method"] == "POST"
+        assert logged["request"]["url"].endswith("/api/contacts")
+
+    def test_exceptions_are_queued_as_text(self, pipeline):
+        """Test that the traceback reaches the file formatter"""
+        target = RecordingHandler()
+        target.setFormatter(JSONFormatter())
+        handler = pipeline(target)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            handler.handle(make_record("failed", logging.ERROR, exc_info=sys.exc_info()))
+        handler.stop()
+
+        record = target.records[0]
+        assert record.exc_info is None
+        assert "ValueError: boom" in json.loads(target.format(record))["exception"]
+
+    def test_full_queue_drops_and_counts_records(self, pipeline):
+        """Test that a full queue drops info at once and warnings after the timeout"""
+        gate = threading.Event()
+        target = RecordingHandler(gate)
+        handler = pipeline(target, max_size=1, block_timeout=0.01)
+
+        # The writer holds the first record, the second fills the queue
+        handler.handle(make_record("first"))
+        deadline = time.monotonic() + 2
+        while handler.queue.qsize() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        handler.handle(make_record("second"))
+        handler.handle(make_record("dropped info"))
+        handler.handle(make_record("dropped warning", logging.WARNING))
+
+        stats = handler.stats()
+        assert stats["dropped"] == 2
+        assert stats["dropped_by_level"] == {"INFO": 1, "WARNING": 1}
+        assert stats["max_size"] == 1
+
+        gate.set()
+        handler.stop()
+        assert [record.getMessage() for record in target.records] == ["first", "second"]
+
+    def test_forked_process_starts_its_own_writer(self, pipeline):
+        """Test that a record in another process starts a new writer thread"""
+        target = RecordingHandler()
+        handler = pipeline(target)
+        handler.handle(make_record("parent"))
+        parent_listener = handler.listener
+
+        # As seen by a forked worker, whose pid differs from the starter's
+        handler._pid = -1
+        handler.handle(make_record("child"))
+
+        assert handler.listener is not parent_listener
+        handler.stop()
+        parent_listener.stop()
+        assert {record.getMessage() for record in target.records} == {"parent", "child"}
+
+
+class TestFormatters:
+    """Test the structured and console formatters"""
+
+    def test_request_context_is_read_once_per_request(self, app):
+        """Test that later records reuse the context but see the user id once set"""
+        formatter = JSONFormatter()
+        with app.test_request_context("/api/deals", method="GET"):
+            first = json.loads(formatter.format(make_record("first")))
+            context = flask_request._log_context
+            flask_request.user_id = 7
+            second = json.loads(formatter.format(make_record("second")))
+
+            assert flask_request._log_context is context
+        assert "user_id" not in first["request"]
+        assert second["request"] == {**first["request"], "user_id": 7}
+
+    def test_cached_timestamp_matches_the_standard_layout(self):
+        """Test that the cached date and time render like logging.Formatter's"""
+        formatter = RequestFormatter("%(asctime)s %(message)s")
+        for created in (1700000000.123, 1700000000.987, 1700000001.5):
+            record = make_record("tick")
+            record.created, record.msecs = created, (created % 1) * 1000
+
+            assert formatter.formatTime(record) == logging.Formatter().formatTime(record)
+
+    def test_lazy_arguments_are_computed_only_when_logged(self):
+        """Test that a filtered record never computes its lazy argument"""
+        logger = logging.getLogger("tests.lazy")
+        logger.setLevel(logging.INFO)
+        expensive = Mock(return_value="computed")
+
+        logger.debug("Payload: %s", lazy(expensive))
+        assert not expensive.called
+
+        assert make_record("Payload: %s", args=(lazy(expensive, 1),)).getMessage() == "Payload: computed"
+        expensive.assert_called_once_with(1)
+
+
+class TestLogStatsEndpoint:
+    """Test the /log_stats endpoint"""
+
+    def test_reports_queue_and_drops(self, client):
+        response = client.get("/log_stats")
+
+        assert response.status_code == 200
+        assert {"queued", "max_size", "enqueued", "dropped", "dropped_by_level"} <= set(response.json)
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+from redis.exceptions import ConnectionError
+from app.redis.lookup_index import LookupIndex
+
+
+class BrokenRedis:
+    def mget(self, keys):
+        raise ConnectionError("Redis is down")
+
+
+class TestLookupIndex:
+    """Test the Redis-backed lookup index"""
+
+    def test_positive_negative_and_miss(self, fake_redis_client):
+        """Test the three lookup outcomes and their counters"""
+        redis = fake_redis_client.client
+        index = LookupIndex(fake_redis_client, "test_email", ttl=100, negative_ttl=10)
+
+        index.set(" User@Example.com ", 123)
+        index.set_missing("gone@example.com")
+
+        assert index.lookup("user@example.com") == (True, "123")
+        assert index.lookup("GONE@example.com") == (True, None)
+        assert index.lookup("unknown@example.com") == (False, None)
+        assert redis.ttls["index:test_email:user@example.com"] == 100
+        assert redis.ttls["index:test_email:gone@example.com"] == 10
+
+        stats = index.stats()
+        assert (stats["hits"], stats["negative_hits"], stats["misses"]) == (1, 1, 1)
+
+    def test_lookup_many_normalizes_keys(self, fake_redis_client):
+        """Test that bulk lookups are keyed by normalized value"""
+        index = LookupIndex(fake_redis_client, "test_bulk")
+        index.set_many({"a@example.com": "1", "b@example.com": "2"})
+
+        results = index.lookup_many(["A@example.com", "b@example.com", "c@example.com"])
+
+        assert results == {
+            "a@example.com": (True, "1"),
+            "b@example.com": (True, "2"),
+            "c@example.com": (False, None),
+        }
+
+    def test_redis_errors_are_misses(self):
+        """Test that an unreachable Redis is treated as a miss"""
+        index = LookupIndex(SimpleNamespace(client=BrokenRedis()), "test_broken")
+
+        assert index.lookup("user@example.com") == (False, None)
+        assert index.stats()["misses"] == 1
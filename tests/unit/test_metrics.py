@@ -0,0 +1,151 @@
+import os
+import json
+import time
+from flask import Flask, Response
+from app.middleware.metrics import MetricsMiddleware, label_route, request_duration, response_size
+from app.utils.metrics import MetricsRegistry
+
+# No process runs with this pid
+EXITED_PID = 2 ** 22 + 12345
+
+
+def write_snapshot(directory, pid, started, in_flight):
+    (directory / f"{pid}-{started}.json").write_text(json.dumps({
+        "pid": pid, "started": started, "values": {
+            "latency_seconds": [[["/health"], [[0, 1], 2.0, 1]]],
+            "in_flight": [[[], in_flight]],
+        }}))
+
+
+def series(metric, *labels):
+    return dict((tuple(key), value) for key, value in metric.values()).get(labels)
+
+
+class TestMetricsRegistry:
+    """Test the metrics registry and its text format"""
+
+    def test_renders_cumulative_buckets(self):
+        """Test that histogram buckets, sum and count follow the Prometheus format"""
+        registry = MetricsRegistry(directory=None)
+        histogram = registry.histogram("latency_seconds", "Latency.", ("route",), (0.1, 1))
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value, "/api/contacts")
+
+        text = registry.render()
+
+        assert "# TYPE latency_seconds histogram" in text
+        assert 'latency_seconds_bucket{route="/api/contacts",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{route="/api/contacts",le="1"} 2' in text
+        assert 'latency_seconds_bucket{route="/api/contacts",le="+Inf"} 3' in text
+        assert 'latency_seconds_sum{route="/api/contacts"} 5.55' in text
+        assert 'latency_seconds_count{route="/api/contacts"} 3' in text
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry(directory=None)
+        registry.gauge("in_flight", "In flight.", ("route",)).set(2, 'a"b\\c')
+
+        assert 'in_flight{route="a\\"b\\\\c"} 2' in registry.render()
+
+    def test_adds_up_processes_from_the_directory(self, tmp_path):
+        """Test that histograms of all workers add up and gauges only of running ones"""
+        registry = MetricsRegistry(directory=str(tmp_path))
+        histogram = registry.histogram("latency_seconds", "Latency.", ("route",), (1,))
+        gauge = registry.gauge("in_flight", "In flight.")
+        histogram.observe(0.5, "/health")
+        gauge.inc()
+
+        for pid, in_flight in ((os.getppid(), 3), (EXITED_PID, 5)):
+            write_snapshot(tmp_path, pid, 1, in_flight)
+
+        text = registry.render()
+
+        assert 'latency_seconds_bucket{route="/health",le="1"} 1' in text
+        assert 'latency_seconds_bucket{route="/health",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{route="/health"} 3' in text
+        assert "in_flight 4" in text
+        assert (tmp_path / f"{os.getpid()}-{registry._started}.json").exists()
+
+    def test_exited_workers_are_archived(self, tmp_path):
+        """Test that counts of exited workers, also on a reused pid, never go backwards"""
+        registry = MetricsRegistry(directory=str(tmp_path))
+        registry.histogram("latency_seconds", "Latency.", ("route",), (1,))
+        registry.gauge("in_flight", "In flight.")
+        write_snapshot(tmp_path, EXITED_PID, 1, 5)
+        # A worker that exited, and the worker that got its pid afterwards
+        write_snapshot(tmp_path, os.getppid(), 1, 2)
+        write_snapshot(tmp_path, os.getppid(), 2, 3)
+
+        first = registry.render()
+        second = registry.render()
+
+        assert 'latency_seconds_count{route="/health"} 3' in first
+        assert "in_flight 3" in first
+        assert second == first
+        assert sorted(path.name for path in tmp_path.glob("*.json")) == sorted(
+            ["archive.json", f"{os.getppid()}-2.json", f"{os.getpid()}-{registry._started}.json"])
+
+    def test_clear_removes_an_earlier_run(self, tmp_path):
+        registry = MetricsRegistry(directory=str(tmp_path))
+        write_snapshot(tmp_path, EXITED_PID, 1, 5)
+        (tmp_path / "archive.json").write_text("{}")
+
+        registry.clear()
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_forked_process_starts_from_zero(self):
+        """Test that a worker does not report the values of the process it was forked from"""
+        registry = MetricsRegistry(directory=None)
+        histogram = registry.histogram("latency_seconds", "Latency.")
+        registry.start()
+        histogram.observe(0.5)
+
+        # As seen by a forked worker, whose pid differs from the starter's
+        registry._pid = -1
+        registry.start()
+
+        assert histogram.values() == []
+
+
+class TestMetricsMiddleware:
+    """Test the request metrics recorded by MetricsMiddleware"""
+
+    def make_app(self):
+        app = Flask(__name__)
+        app.before_request(label_route)
+
+        @app.route("/metrics-test/stream/<int:chunks>")
+        def stream(chunks):
+            def body():
+                for _ in range(chunks):
+                    time.sleep(0.02)
+                    yield "x" * 10
+            return Response(body())
+
+        app.wsgi_app = MetricsMiddleware(app.wsgi_app)
+        return app
+
+    def test_duration_includes_the_response_body(self):
+        """Test that the timer stops once the streamed body was sent"""
+        client = self.make_app().test_client()
+
+        client.get("/metrics-test/stream/3", buffered=True)
+
+        counts, total, count = series(request_duration, "GET", "/metrics-test/stream/<int:chunks>", "200")
+        assert count == 1
+        assert total >= 0.06
+        assert series(response_size, "GET", "/metrics-test/stream/<int:chunks>")[1] == 30
+
+    def test_unknown_paths_share_one_label(self):
+        client = self.make_app().test_client()
+
+        client.get("/metrics-test/missing", buffered=True)
+
+        assert series(request_duration, "GET", "unmatched", "404") is not None
+
+    def test_metrics_endpoint(self, client):
+        response = client.get("/metrics", buffered=True)
+
+        assert response.status_code == 200
+        assert response.content_type.startswith("text/plain; version=0.0.4")
+        assert "# TYPE http_request_duration_seconds histogram" in response.get_data(as_text=True)
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+from unittest.mock import patch, PropertyMock, MagicMock
+from app.services.deal_service import DealService
+
+
+def deal(deal_id, name=None):
+    return {"id": deal_id, "properties": {"dealname": name or f"Deal {deal_id}"}}
+
+
+class TestObjectCache:
+    """Test pages cached as id lists over a per-object cache"""
+
+    def _api(self, deals):
+        api = MagicMock()
+        api.basic_api.get_page.return_value = SimpleNamespace(results=deals, paging=None)
+        api.batch_api.read.side_effect = lambda body: SimpleNamespace(
+            results=[deal(item["id"], "Renamed") for item in body["inputs"]])
+        return api
+
+    def _patch_client(self, api):
+        client = SimpleNamespace(crm=SimpleNamespace(deals=api))
+        return patch.object(DealService, "client", new_callable=PropertyMock, return_value=client)
+
+    def test_page_stored_as_ids_and_objects(self, fake_page_caches, fake_redis_client):
+        """Test that a page is cached as ids and each object on its own"""
+        api = self._api([deal("1"), deal("2")])
+
+        with self._patch_client(api):
+            objects, _ = DealService().get_recent_deals(1, 10)
+            cached, _ = DealService().get_recent_deals(1, 10)
+
+        assert objects == cached == [deal("1"), deal("2")]
+        assert fake_redis_client.mget_cache_values(
+            ["deals_object_1", "deals_object_2"]) == [deal("1"), deal("2")]
+        api.basic_api.get_page.assert_called_once()
+        api.batch_api.read.assert_not_called()
+
+    def test_update_refetches_only_that_object(self, fake_page_caches):
+        """Test that an updated object is batch-read while the page of ids is kept"""
+        api = self._api([deal("1"), deal("2"), deal("3")])
+
+        with self._patch_client(api), patch("app.services.deal_service.deal_index"):
+            service = DealService()
+            service.get_recent_deals(1, 10)
+            service.invalidate_objects(["2"])
+            objects, _ = service.get_recent_deals(1, 10)
+
+        api.basic_api.get_page.assert_called_once()
+        api.batch_api.read.assert_called_once()
+        assert api.batch_api.read.call_args.args[0]["inputs"] == [{"id": "2"}]
+        assert objects == [deal("1"), deal("2", "Renamed"), deal("3")]
+
+    def test_mget_uses_l1_then_one_redis_round_trip(self, l1_redis_client):
+        """Test that keys held in memory are not read from Redis again"""
+        fake_redis_client = l1_redis_client
+        fake_redis_client.mset_cache_values({"a": 1, "b": 2})
+        fake_redis_client.local_cache.delete("b")
+
+        with patch.object(fake_redis_client.binary_client, "mget",
+                          wraps=fake_redis_client.binary_client.mget) as mget:
+            assert fake_redis_client.mget_cache_values(["a", "b", "c"]) == [1, 2, None]
+
+        mget.assert_called_once_with(["b", "c"])
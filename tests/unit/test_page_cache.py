@@ -0,0 +1,151 @@
+import time
+import threading
+from unittest.mock import MagicMock
+from app.redis.page_cache import PageCache
+
+
+class TestPageCache:
+    """Test the stale-while-revalidate page cache"""
+
+    def _cache(self, redis_client, executor):
+        return PageCache(redis_client, soft_ttl=60, hard_ttl=600, executor=executor)
+
+    def test_miss_then_fresh_hit(self, fake_redis_client, inline_executor):
+        """Test that only a miss calls the loader"""
+        cache = self._cache(fake_redis_client, inline_executor)
+        loader = MagicMock(return_value={"results": [1]})
+
+        assert cache.get("deals_page", loader) == {"results": [1]}
+        assert cache.get("deals_page", loader) == {"results": [1]}
+
+        loader.assert_called_once()
+        assert fake_redis_client.client.ttls["deals_page"] == 600
+        stats = cache.stats()
+        assert (stats["misses"], stats["fresh_hits"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+    def test_stale_value_served_and_refreshed(self, fake_redis_client, inline_executor):
+        """Test that a stale value is served at once and replaced in the background"""
+        cache = self._cache(fake_redis_client, inline_executor)
+        fake_redis_client.set_cache_value(
+            "deals_page", {"value": "old", "fresh_until": time.time() - 30})
+
+        assert cache.get("deals_page", lambda: "new") == "old"
+        assert cache.get("deals_page", lambda: "newer") == "new"
+
+        stats = cache.stats()
+        assert (stats["stale_hits"], stats["refreshes"], stats["fresh_hits"]) == (1, 1, 1)
+        assert stats["stale_age_seconds_max"] >= 30
+
+    def test_refresh_skipped_while_another_worker_holds_the_lock(self, fake_redis_client, inline_executor):
+        """Test that only the worker holding the refresh lock calls HubSpot"""
+        cache = self._cache(fake_redis_client, inline_executor)
+        fake_redis_client.set_cache_value(
+            "deals_page", {"value": "old", "fresh_until": time.time() - 30})
+        fake_redis_client.client.set("lock:deals_page", "other-worker")
+        loader = MagicMock(return_value="new")
+
+        assert cache.get("deals_page", loader) == "old"
+
+        loader.assert_not_called()
+        assert cache.stats()["refresh_skipped"] == 1
+
+    def test_failed_refresh_keeps_stale_value(self, fake_redis_client, inline_executor):
+        """Test that a failing background refresh is counted and the old value kept"""
+        cache = self._cache(fake_redis_client, inline_executor)
+        fake_redis_client.set_cache_value(
+            "deals_page", {"value": "old", "fresh_until": time.time() - 30})
+
+        assert cache.get("deals_page", MagicMock(side_effect=RuntimeError("HubSpot down"))) == "old"
+        assert cache.get("deals_page", lambda: "new") == "old"
+        assert cache.stats()["refresh_errors"] == 1
+
+
+class TestPageCacheCoalescing:
+    """Test single-flight loading of missing pages"""
+
+    def test_concurrent_misses_share_one_load(self, fake_redis_client, inline_executor):
+        """Test that threads missing the same key wait for a single loader call"""
+        cache = PageCache(fake_redis_client, executor=inline_executor)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "page"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(cache.get("deals_page", loader)))
+        leader.start()
+        started.wait(5)
+
+        # Followers arrive while the leader is still loading
+        followers = [threading.Thread(target=lambda: results.append(cache.get("deals_page", loader)))
+                     for _ in range(5)]
+        for thread in followers:
+            thread.start()
+        while cache.stats()["coalesced"] < 5:
+            time.sleep(0.01)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == ["page"] * 6
+
+    def test_waits_for_lease_holder_in_another_worker(self, fake_redis_client, inline_executor):
+        """Test that a worker without the lease takes the value the holder stores"""
+        cache = PageCache(fake_redis_client, executor=inline_executor, poll_interval=0.01)
+        fake_redis_client.client.set("lease:deals_page", "other-worker")
+        loader = MagicMock(return_value="mine")
+
+        # The other worker stores its page while this one is polling
+        original_read = cache._read
+        reads = []
+
+        def read(key):
+            reads.append(key)
+            if len(reads) == 3:
+                cache._write(key, "theirs")
+            return original_read(key)
+
+        cache._read = read
+
+        assert cache.get("deals_page", loader) == "theirs"
+        loader.assert_not_called()
+        assert cache.stats()["lease_waits"] == 1
+
+    def test_loads_itself_when_lease_holder_is_gone(self, fake_redis_client, inline_executor):
+        """Test that waiting for a lease is bounded"""
+        cache = PageCache(fake_redis_client, executor=inline_executor,
+                          lease_wait=0.05, poll_interval=0.01)
+        fake_redis_client.client.set("lease:deals_page", "dead-worker")
+
+        assert cache.get("deals_page", lambda: "mine") == "mine"
+        assert cache.stats()["lease_timeouts"] == 1
+
+    def test_loads_at_once_when_lease_holder_fails(self, fake_redis_client, inline_executor):
+        """Test that a lease released without a page ends the wait"""
+        cache = PageCache(fake_redis_client, executor=inline_executor,
+                          lease_wait=5, poll_interval=0.01)
+        fake_redis_client.client.set("lease:deals_page", "other-worker")
+
+        # The other worker's HubSpot call fails and it releases the lease
+        original_read = cache._read
+        reads = []
+
+        def read(key):
+            reads.append(key)
+            if len(reads) == 3:
+                fake_redis_client.client.delete("lease:deals_page")
+            return original_read(key)
+
+        cache._read = read
+        started = time.monotonic()
+
+        assert cache.get("deals_page", lambda: "mine") == "mine"
+        assert time.monotonic() - started < 1
+        assert cache.stats()["lease_abandoned"] == 1
+        assert cache.stats()["lease_timeouts"] == 0
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+from unittest.mock import patch, PropertyMock
+from app.routes.integration import _encode_cursor, _decode_cursor
+from app.services.contact_service import ContactService
+
+
+def listing(total_pages, page_size):
+    """Fake basic_api.get_page walking total_pages pages with string cursors"""
+    calls = []
+
+    def get_page(limit, after=None, properties=None):
+        calls.append(after)
+        page = int(after) if after else 1
+        results = [{"id": f"{page}-{i}"} for i in range(limit)]
+        next_page = SimpleNamespace(after=str(page + 1)) if page < total_pages else None
+        return SimpleNamespace(results=results, paging=SimpleNamespace(next=next_page))
+
+    return get_page, calls
+
+
+class TestPagination:
+    """Test cursor-based paging of the list endpoints"""
+
+    def _service(self, get_page):
+        service = ContactService()
+        client = SimpleNamespace(crm=SimpleNamespace(
+            contacts=SimpleNamespace(basic_api=SimpleNamespace(get_page=get_page))))
+        return service, patch.object(
+            ContactService, "client", new_callable=PropertyMock, return_value=client)
+
+    def test_page_jump_reuses_stored_cursors(self, fake_page_caches):
+        """Test that page N is reached once and then served from the caches"""
+        get_page, calls = listing(total_pages=5, page_size=2)
+        service, client_patch = self._service(get_page)
+
+        with client_patch:
+            objects, next_after = service.get_recent_contacts(page=4, page_size=2)
+            assert [obj["id"] for obj in objects] == ["4-0", "4-1"]
+            assert next_after == "5"
+            assert calls == [None, "2", "3", "4"]
+
+            # Every page on the way is cached, so nothing hits HubSpot again
+            service.get_recent_contacts(page=3, page_size=2)
+            objects, next_after = service.get_recent_contacts(page=4, page_size=2)
+            assert calls == [None, "2", "3", "4"]
+
+            # Page 5 starts from the cursor stored for it
+            objects, next_after = service.get_recent_contacts(page=5, page_size=2)
+            assert calls == [None, "2", "3", "4", "5"]
+            assert next_after is None
+
+    def test_page_past_the_end_is_empty(self, fake_page_caches):
+        """Test that a page beyond the last one returns no objects"""
+        get_page, _ = listing(total_pages=2, page_size=2)
+        service, client_patch = self._service(get_page)
+
+        with client_patch:
+            assert service.get_recent_contacts(page=4, page_size=2) == ([], None)
+
+    def test_cursor_round_trip(self):
+        """Test that response cursors decode to the page and section cursors"""
+        cursor = _encode_cursor(3, {"contacts": "abc", "deals": None})
+        assert _decode_cursor(cursor) == (3, {"contacts": "abc", "deals": None})
@@ -0,0 +1,102 @@
+import os
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock, patch
+import pytest
+from werkzeug.security import generate_password_hash
+from app.models import User
+from app.repository.user_repository import UserRepository
+from app.utils.passwords import PasswordHasher, PasswordHashTimeout
+
+
+class TestPasswordHasher:
+    """Test password hashing off the request thread"""
+
+    def test_hash_and_verify_on_process_pool(self):
+        """Test that hashes made on the pool verify"""
+        hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=1)
+        try:
+            password_hash = hasher.hash("secret")
+
+            assert password_hash.startswith("pbkdf2:sha256:1000$")
+            assert hasher.verify(password_hash, "secret")
+            assert not hasher.verify(password_hash, "wrong")
+        finally:
+            hasher.shutdown()
+
+    def test_needs_rehash(self):
+        """Test that hashes made with another method or work factor are reported"""
+        hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=0)
+
+        assert not hasher.needs_rehash(hasher.hash("secret"))
+        assert hasher.needs_rehash(generate_password_hash("secret", "pbkdf2:sha256:2000"))
+        assert hasher.needs_rehash(generate_password_hash("secret", "pbkdf2:sha512:1000"))
+
+    def test_default_iterations_are_spelled_out(self):
+        """Test that a method without work factor matches werkzeug's stored form"""
+        hasher = PasswordHasher(method="pbkdf2:sha256", workers=0)
+
+        assert not hasher.needs_rehash(generate_password_hash("secret", "pbkdf2:sha256"))
+
+
+    def test_timeout_cancels_the_job(self):
+        """Test that a saturated pool raises PasswordHashTimeout and drops the job"""
+        hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=1, timeout=0.01)
+        future = MagicMock()
+        future.result.side_effect = FutureTimeoutError()
+        hasher._executor, hasher._pid = MagicMock(), os.getpid()
+        hasher._executor.submit.return_value = future
+
+        with pytest.raises(PasswordHashTimeout):
+            hasher.hash("secret")
+        future.cancel.assert_called_once()
+
+    def test_broken_pool_is_shut_down_and_replaced(self):
+        """Test that a dead pool is stopped and the password hashed inline"""
+        hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=1)
+        broken = MagicMock()
+        broken.submit.side_effect = BrokenProcessPool("worker died")
+        hasher._executor, hasher._pid = broken, os.getpid()
+
+        assert hasher.hash("secret").startswith("pbkdf2:sha256:1000$")
+        broken.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+        assert hasher._executor is None
+
+
+class TestPasswordHashTimeoutResponses:
+    """Test the answer of the auth routes when hashing times out"""
+
+    def test_login_answers_503(self, client):
+        with patch.object(UserRepository, "authenticate", side_effect=PasswordHashTimeout("slow")):
+            response = client.post("/api/auth/login", json={"username": "jane", "password": "Secret123"})
+
+        assert response.status_code == 503
+        assert response.json["error"]
+
+    def test_register_answers_503(self, client):
+        with patch.object(UserRepository, "create", side_effect=PasswordHashTimeout("slow")):
+            response = client.post("/api/auth/register", json={"username": "jane", "password": "Secret123!"})
+
+        assert response.status_code == 503
+
+
+class TestRehashOnLogin:
+    """Test the transparent upgrade of old hashes"""
+
+    def test_old_hash_is_upgraded(self, session):
+        """Test that a successful login rehashes with the configured method"""
+        hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=0)
+        user = User(username="rehash_me")
+        user.password_hash = generate_password_hash("secret", "pbkdf2:sha256:2000")
+        session.add(user)
+        session.commit()
+
+        with patch("app.models.password_hasher", hasher), \
+                patch("app.repository.user_repository.password_hasher", hasher):
+            repo = UserRepository()
+            assert repo.authenticate("rehash_me", "wrong") is None
+            assert user.password_hash.startswith("pbkdf2:sha256:2000$")
+
+            assert repo.authenticate("REHASH_ME", "secret").id == user.id
+            assert user.password_hash.startswith("pbkdf2:sha256:1000$")
+            assert repo.authenticate("rehash_me", "secret").id == user.id
@@ -0,0 +1,134 @@
+import time
+import threading
+from unittest.mock import MagicMock
+import pytest
+import redis
+from redis.exceptions import ConnectionError
+from app.redis.circuit import RedisCircuit, CircuitBreakerConnection
+from app.redis.fallback import FallbackStore
+from app.redis.redis_client import RedisClient
+
+
+def unreachable_client(circuit):
+    """Redis client whose connections are refused at once"""
+    pool = redis.ConnectionPool(
+        connection_class=CircuitBreakerConnection, host="127.0.0.1", port=1,
+        socket_connect_timeout=1, circuit=circuit)
+    return redis.Redis(connection_pool=pool)
+
+
+@pytest.fixture
+def degraded_redis_client():
+    """RedisClient whose Redis is down, with its own fallback store"""
+    redis_client = RedisClient(local_cache=None, fallback=FallbackStore())
+    redis_client.client = redis_client.binary_client = unreachable_client(RedisCircuit(retry_interval=60))
+    return redis_client
+
+
+class TestRedisCircuit:
+    """Test the connection circuit breaker"""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that connections are refused without trying once the circuit is open"""
+        circuit = RedisCircuit(failure_threshold=2, retry_interval=60)
+        client = unreachable_client(circuit)
+
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                client.get("key")
+        assert circuit.stats()["mode"] == "degraded"
+
+        with pytest.raises(ConnectionError, match="circuit is open"):
+            client.get("key")
+        assert circuit.stats()["rejected_connections"] == 1
+        assert circuit.stats()["opened"] == 1
+
+    def test_success_resets_failures(self):
+        """Test that only consecutive failures open the circuit"""
+        circuit = RedisCircuit(failure_threshold=2)
+        circuit.record_failure(ConnectionError("refused"))
+        circuit.record_success()
+        circuit.record_failure(ConnectionError("refused"))
+
+        assert circuit.allow()
+        assert circuit.stats()["mode"] == "redis"
+
+    def test_background_probe_closes_circuit(self):
+        """Test that the circuit closes once the background probe reaches Redis"""
+        circuit = RedisCircuit(failure_threshold=1, retry_interval=0.01)
+        circuit.probe = MagicMock(side_effect=[ConnectionError("refused"), True])
+
+        circuit.record_failure(ConnectionError("refused"))
+        assert not circuit.allow()
+
+        deadline = time.monotonic() + 2
+        while circuit.is_open and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert circuit.allow()
+        assert circuit.probe.call_count == 2
+        assert circuit.stats()["closed"] == 1
+
+
+class TestDegradedRedisClient:
+    """Test the in-process fallback of RedisClient"""
+
+    def test_cache_falls_back(self, degraded_redis_client):
+        """Test that strings and values are kept in memory while Redis is down"""
+        degraded_redis_client.set_cache("a", "1")
+        degraded_redis_client.set_cache_value("b", {"id": "2"})
+        degraded_redis_client.mset_cache_values({"c": [3]})
+
+        assert degraded_redis_client.get_cache("a") == "1"
+        assert degraded_redis_client.mget_cache(["a", "missing"]) == ["1", None]
+        assert degraded_redis_client.get_cache_value("b") == {"id": "2"}
+        assert degraded_redis_client.mget_cache_values(["b", "c"]) == [{"id": "2"}, [3]]
+
+        degraded_redis_client.delete_cache("a")
+        assert degraded_redis_client.get_cache("a") is None
+
+    def test_token_survives_outage(self, degraded_redis_client):
+        """Test that the HubSpot token is stored in memory while Redis is down"""
+        degraded_redis_client.set_token("token", 1800)
+
+        assert degraded_redis_client.get_token()[0] == "token"
+
+    def test_lock_falls_back_to_process_lock(self, degraded_redis_client):
+        """Test that locks still coordinate the threads of this process"""
+        first = degraded_redis_client.lock("name", timeout=10, blocking_timeout=0)
+        second = degraded_redis_client.lock("name", timeout=10, blocking_timeout=0)
+
+        assert first.acquire(blocking=False)
+        assert not second.acquire(blocking=False)
+        first.release()
+        assert second.acquire()
+        second.release()
+
+    def test_locked_reports_the_process_lock(self, degraded_redis_client):
+        """Test that lock holders can be seen while Redis is down"""
+        holder = degraded_redis_client.lock("name", timeout=10, blocking_timeout=0)
+        observer = degraded_redis_client.lock("name", timeout=10, blocking_timeout=0)
+
+        assert not observer.locked()
+        holder.acquire(blocking=False)
+        assert observer.locked()
+        holder.release()
+        assert not observer.locked()
+
+    def test_blocking_lock_waits_for_local_holder(self, degraded_redis_client):
+        """Test that a blocking acquire waits up to its blocking timeout"""
+        holder = degraded_redis_client.lock("name", timeout=10, blocking_timeout=1)
+        holder.acquire()
+        threading.Timer(0.05, holder.release).start()
+
+        waiter = degraded_redis_client.lock("name", timeout=10, blocking_timeout=1)
+        assert waiter.acquire()
+        waiter.release()
+
+    def test_without_fallback_errors_are_raised(self, degraded_redis_client):
+        """Test that a client without fallback store still raises"""
+        degraded_redis_client.fallback = None
+
+        with pytest.raises(ConnectionError):
+            degraded_redis_client.get_cache("a")
+        with pytest.raises(ConnectionError):
+            degraded_redis_client.set_cache_value("a", 1)
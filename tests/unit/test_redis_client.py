@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+from unittest.mock import patch, PropertyMock, MagicMock
+import redis
+from app.redis.circuit import circuit, circuit_of
+from app.redis.redis_client import RedisClient
+from app.services import HubSpotClient, prefetch_pages
+from app.services.contact_service import ContactService
+from app.services.deal_service import DealService
+
+
+class TestRedisClient:
+    """Test the pooled Redis client"""
+
+    def test_clients_share_one_pool(self):
+        """Test that every RedisClient in a process uses the same pools"""
+        first, second = RedisClient(), RedisClient()
+
+        assert first.client.connection_pool is second.client.connection_pool
+        assert first.binary_client.connection_pool is second.binary_client.connection_pool
+        assert first.client.connection_pool is not first.binary_client.connection_pool
+
+    def test_pool_settings(self):
+        """Test TLS and timeouts come from the configuration"""
+        pool = RedisClient().client.connection_pool
+
+        assert issubclass(pool.connection_class, redis.SSLConnection)
+        assert pool.connection_kwargs["circuit"] is circuit
+        assert circuit_of(RedisClient().client) is circuit
+        assert pool.connection_kwargs["socket_timeout"] == 5
+        assert pool.connection_kwargs["health_check_interval"] == 30
+
+    def test_mset_and_mget(self, fake_redis_client):
+        """Test batch string reads and writes"""
+        fake_redis_client.mset_cache({"a": "1", "b": "2"}, timeout=60)
+
+        assert fake_redis_client.mget_cache(["a", "b", "c"]) == ["1", "2", None]
+        assert fake_redis_client.client.ttls["a"] == 60
+
+
+class TestPrefetch:
+    """Test reading the cached pages of /new_crm_objects together"""
+
+    def test_sections_read_in_one_round_trip(self, fake_page_caches, l1_redis_client):
+        """Test that cached pages of all sections are prefetched with single reads"""
+        api = MagicMock()
+        api.basic_api.get_page.return_value = SimpleNamespace(
+            results=[{"id": "1"}, {"id": "2"}], paging=None)
+        client = SimpleNamespace(crm=SimpleNamespace(contacts=api, deals=api))
+
+        with patch.object(HubSpotClient, "client", new_callable=PropertyMock, return_value=client):
+            contacts, deals = ContactService(), DealService()
+            contacts.get_recent_contacts(1, 10)
+            deals.get_recent_deals(1, 10)
+            l1_redis_client.local_cache.clear()
+
+            redis = l1_redis_client.client
+            with patch.object(redis, "mget", wraps=redis.mget) as mget:
+                prefetch_pages([(contacts, 1, 10, None, None), (deals, 1, 10, None, None)])
+                # Generations, then pages, then objects
+                assert mget.call_count == 3
+
+                assert contacts.get_recent_contacts(1, 10)[0] == [{"id": "1"}, {"id": "2"}]
+                assert deals.get_recent_deals(1, 10)[0] == [{"id": "1"}, {"id": "2"}]
+                assert mget.call_count == 3
+
+        assert api.basic_api.get_page.call_count == 2
@@ -0,0 +1,97 @@
+from unittest.mock import patch
+from flask_jwt_extended import create_access_token
+import pytest
+from app.validations.base import ValidationError
+from app.validations.contact_validator import ContactValidator
+from app.validations.deal_validator import DealValidator
+from app.validations.user_validator import UserValidator
+
+
+CONTACT = {
+    "properties": {
+        "email": " Jane@Example.com ",
+        "firstname": "Jane",
+        "lastname": "Doe",
+        "phone": "+1234567890",
+    },
+    "associations": [{"to": {"id": "1"}}],
+}
+
+
+class TestSchema:
+    """Test the compiled request schemas"""
+
+    def test_payload_is_normalized(self):
+        """Test that declared fields are normalized and the rest is kept"""
+        payload = ContactValidator.create_schema.validate(CONTACT)
+
+        assert payload["properties"]["email"] == "jane@example.com"
+        assert payload["associations"] == CONTACT["associations"]
+        # The request body itself is left as it was
+        assert CONTACT["properties"]["email"] == " Jane@Example.com "
+
+    def test_all_errors_are_collected(self):
+        """Test that every invalid field is reported in one pass"""
+        with pytest.raises(ValidationError) as excinfo:
+            ContactValidator.create_schema.validate({
+                "properties": {"email": "not-an-email", "firstname": "J", "phone": 12345678}})
+
+        assert excinfo.value.errors == {
+            "properties.email": "Invalid email format.",
+            "properties.firstname": "firstname must be at least 2 characters",
+            "properties.lastname": "lastname is required",
+            "properties.phone": "Phone must be a string",
+        }
+
+    def test_missing_object(self):
+        """Test that a missing nested object is reported by its name"""
+        _, errors = DealValidator.create_schema.check({})
+
+        assert errors == {"properties": "properties is required"}
+
+    def test_numbers(self):
+        """Test that numeric fields reject strings, booleans and negatives"""
+        deal = {"dealname": "Renewal", "dealstage": "won", "contact_id": "12345",
+                "pipeline": "default"}
+        for amount, error in (("1500", "amount must be a number."),
+                              (True, "amount must be a number."),
+                              (-1, "amount must be at least 0")):
+            _, errors = DealValidator.create_schema.check({"properties": {**deal, "amount": amount}})
+            assert errors == {"properties.amount": error}
+
+        _, errors = DealValidator.create_schema.check({"properties": {**deal, "amount": 1500}})
+        assert errors == {}
+
+    def test_pattern(self):
+        """Test that the password complexity rule is checked"""
+        _, errors = UserValidator.registration_schema.check(
+            {"username": "jane", "password": "alllowercase1"})
+
+        assert errors == {"password": "Password must contain at least one uppercase "
+                                      "letter, one lowercase letter, and one digit"}
+
+
+class TestValidateRequest:
+    """Test that views receive the validated payload"""
+
+    def test_view_gets_normalized_payload(self, app, client):
+        """Test that /create_contact hands the normalized payload to the service"""
+        headers = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+
+        with patch("app.routes.integration.contact_service") as service:
+            service.create_or_update_contact.return_value = {"id": "1"}
+            response = client.post("/api/create_contact", json=CONTACT, headers=headers)
+
+        assert response.status_code == 200
+        payload = service.create_or_update_contact.call_args[0][0]
+        assert payload["properties"]["email"] == "jane@example.com"
+
+    def test_invalid_payload_is_rejected(self, app, client):
+        """Test that all validation errors are returned with 422"""
+        headers = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+
+        response = client.post("/api/create_contact", json={"properties": {}}, headers=headers)
+
+        assert response.status_code == 422
+        assert set(response.get_json()["details"]) == {
+            "properties.email", "properties.firstname", "properties.lastname", "properties.phone"}
@@ -0,0 +1,87 @@
+import time
+import threading
+from unittest.mock import patch
+from app.services.token_manager import TokenManager
+
+
+class FakeRedisClient:
+    """Minimal stand-in for RedisClient's token and lock helpers"""
+
+    def __init__(self):
+        self.token_data = None
+        self.reads = 0
+        self._lock = threading.Lock()
+
+    def get_token(self):
+        self.reads += 1
+        return self.token_data
+
+    def set_token(self, token, expires_in):
+        self.token_data = (token, time.time() + expires_in)
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        shared = self._lock
+
+        class Lock:
+            def acquire(self):
+                return shared.acquire(timeout=blocking_timeout)
+
+            def release(self):
+                shared.release()
+
+        return Lock()
+
+
+class TestTokenManager:
+    """Test the HubSpot token manager"""
+
+    def test_token_served_from_memory(self):
+        """Test that a loaded token does not hit Redis again"""
+        redis_client = FakeRedisClient()
+        redis_client.set_token("shared-token", 1800)
+        manager = TokenManager(redis_client, refresh_margin=60)
+
+        with patch.object(TokenManager, "_request_token") as mock_request:
+            assert manager.get_token() == "shared-token"
+            assert manager.get_token() == "shared-token"
+
+        mock_request.assert_not_called()
+        assert redis_client.reads == 1
+
+    def test_single_refresh_for_concurrent_callers(self):
+        """Test that concurrent callers share a single token refresh"""
+        redis_client = FakeRedisClient()
+        manager = TokenManager(redis_client, refresh_margin=60)
+
+        def slow_request():
+            time.sleep(0.05)
+            return "new-token", 1800
+
+        with patch.object(TokenManager, "_request_token", side_effect=slow_request) as mock_request:
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(manager.get_token()))
+                for _ in range(10)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert mock_request.call_count == 1
+        assert results == ["new-token"] * 10
+
+    def test_refresh_reuses_token_stored_by_other_worker(self):
+        """Test that a forced refresh adopts a newer token from Redis"""
+        redis_client = FakeRedisClient()
+        redis_client.set_token("old-token", 1800)
+        manager = TokenManager(redis_client, refresh_margin=60)
+        assert manager.get_token() == "old-token"
+
+        # Another worker already replaced the rejected token
+        redis_client.set_token("other-worker-token", 1800)
+
+        with patch.object(TokenManager, "_request_token") as mock_request:
+            assert manager.refresh() == "other-worker-token"
+
+        mock_request.assert_not_called()
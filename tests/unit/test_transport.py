@@ -0,0 +1,79 @@
+import certifi
+import urllib3
+import pytest
+from unittest.mock import patch
+from urllib3.connectionpool import HTTPConnectionPool
+from hubspot import HubSpot
+from app.services import HubSpotClient
+from app.services.transport import HubSpotTransport, transport
+
+
+class TestHubSpotTransport:
+    """Test the shared HubSpot HTTP transport"""
+
+    def test_sdk_clients_share_pool(self):
+        """Test that every SDK API client sends through the same pool manager"""
+        contacts_api = HubSpotClient()._client.crm.contacts.basic_api
+        deals_api = HubSpotClient()._client.crm.deals.search_api
+
+        assert contacts_api.api_client.rest_client.pool_manager is transport.pool_manager
+        assert deals_api.api_client.rest_client.pool_manager is transport.pool_manager
+
+    def test_pool_verifies_certificates(self):
+        """Test that connections from the shared pool check the server certificate"""
+        pool = HubSpotTransport().pool_manager.connection_from_host(
+            "api.hubapi.com", 443, scheme="https")
+
+        assert pool.cert_reqs == "CERT_REQUIRED"
+        assert pool.ca_certs == certifi.where()
+
+    def test_sdk_proxy_is_honoured(self):
+        """Test that SDK clients configured with a proxy share a proxy pool"""
+        shared = HubSpotTransport()
+        client = HubSpot(api_factory=shared.api_factory, proxy="http://proxy.local:3128")
+        contacts_api = client.crm.contacts.basic_api
+        deals_api = client.crm.deals.basic_api
+
+        pool_manager = contacts_api.api_client.rest_client.pool_manager
+        assert isinstance(pool_manager, urllib3.ProxyManager)
+        assert pool_manager.proxy.host == "proxy.local"
+        assert deals_api.api_client.rest_client.pool_manager is pool_manager
+        assert pool_manager.connection_pool_kw["cert_reqs"] == "CERT_REQUIRED"
+
+    def test_sdk_requests_use_transport_timeouts(self):
+        """Test that SDK calls without _request_timeout get the configured timeouts"""
+        shared = HubSpotTransport(connect_timeout=2, read_timeout=7)
+        basic_api = HubSpot(access_token="token", api_factory=shared.api_factory).crm.contacts.basic_api
+        used = []
+
+        def urlopen(pool, method, url, **kwargs):
+            used.append(pool._get_timeout(kwargs.get("timeout")))
+            raise urllib3.exceptions.NewConnectionError(None, "not sent")
+
+        with patch.object(HTTPConnectionPool, "urlopen", autospec=True, side_effect=urlopen):
+            with pytest.raises(urllib3.exceptions.NewConnectionError):
+                basic_api.get_page()
+            with pytest.raises(urllib3.exceptions.NewConnectionError):
+                basic_api.get_page(_request_timeout=(1, 3))
+
+        assert (used[0].connect_timeout, used[0].read_timeout) == (2, 7)
+        assert (used[1].connect_timeout, used[1].read_timeout) == (1, 3)
+
+    def test_session_uses_shared_pool(self):
+        """Test that the requests session is backed by the shared pool manager"""
+        shared = HubSpotTransport(maxsize=3)
+        adapter = shared.session.get_adapter("https://api.hubapi.com")
+
+        assert adapter.poolmanager is shared.pool_manager
+
+    def test_stats(self):
+        """Test pool statistics for a host that has been used"""
+        shared = HubSpotTransport(maxsize=3)
+        shared.pool_manager.connection_from_host("api.hubapi.com", 443, scheme="https")
+
+        stats = shared.stats()
+
+        assert stats["maxsize"] == 3
+        host_stats = stats["hosts"]["https://api.hubapi.com:443"]
+        assert host_stats == {"in_use": 0, "idle": 0, "created": 0, "reused": 0, "maxsize": 3}
+        assert stats["totals"]["created"] == 0
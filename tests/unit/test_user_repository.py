@@ -0,0 +1,51 @@
+import uuid
+from unittest.mock import patch
+from app.repository.user_repository import UserRepository
+from app.models import User
+
+
+class TestNormalizedUsername:
+    """Test lookups and registration through users.username_lower"""
+
+    def test_username_lower_is_kept_in_sync(self):
+        """Test that assigning a username stores its normalized form"""
+        user = User(username="MixedCase")
+
+        assert user.username_lower == "mixedcase"
+
+    def test_create_and_get_user(self, session):
+        """Test that a created user is found regardless of case"""
+        username = f"New_{uuid.uuid4().hex[:8]}"
+        repo = UserRepository()
+
+        user = repo.create(username, "strongpassword")
+
+        assert user.id is not None
+        assert user.username == username
+        assert user.check_password("strongpassword")
+        assert repo.get_user(username.upper()).id == user.id
+
+    def test_duplicate_is_rejected_in_one_statement(self, session):
+        """Test that a case variant of an existing username is not inserted"""
+        username = f"dup_{uuid.uuid4().hex[:8]}"
+        repo = UserRepository()
+        repo.create(username, "password1")
+
+        with patch.object(repo, "get_user") as get_user:
+            assert repo.create(username.upper(), "password2") is None
+            get_user.assert_not_called()
+        assert session.query(User).filter_by(username_lower=username).count() == 1
+
+
+class TestRegisterRoute:
+    """Test the register endpoint on top of the single-statement insert"""
+
+    def test_register_then_duplicate(self, client, session):
+        """Test that a second registration of a username returns 409"""
+        data = {"username": f"route_{uuid.uuid4().hex[:8]}", "password": "Password123!"}
+
+        first = client.post("/api/auth/register", json=data)
+        second = client.post("/api/auth/register", json={**data, "username": data["username"].upper()})
+
+        assert first.status_code == 201
+        assert second.status_code == 409